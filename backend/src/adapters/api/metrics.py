@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from specklepy.transports.server import ServerTransport
-from adapters.speckle.get_client import get_client
-from adapters.speckle.get_latest_version import get_latest_version
-from adapters.speckle.receive_data import receive_data
-from config import PROJECT_ID
-from infrastructure.metrics_storage import get_metrics, get_latest_metrics, list_all_metrics
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from adapters.api.responses import build_response, get_materialized
+from config import ProjectConfig, get_projects
+from infrastructure.metrics_storage import (
+    get_metrics, get_latest_version_id, get_version_entry, list_all_metrics, get_storage_namespace, project_storage,
+)
 from infrastructure.clerk_auth import verify_clerk_token
-from application.metrics_service import calculate_and_save_metrics
-import json
-from pathlib import Path
+from application.metrics_jobs import JobQueueFullError, get_job, submit_backfill_job, submit_calculation_job
+from domain.loader import get_definitions_hash, load_metrics
+
+PROJECTABLE_FIELDS = (
+    "name", "formula", "action", "label", "benchmark", "total_value",
+    "value_per_level", "value_per_cluster", "chart_data",
+)
 
 router = APIRouter(
     prefix="/api/metrics",
@@ -24,11 +29,9 @@ async def preflight_handler(path: str = None):
 
 
 def _load_metric_definitions():
-    """Load metric definitions from metrics.json"""
-    json_path = Path(__file__).parent.parent.parent / "domain" / "json" / "metrics.json"
+    """Metric definitions from metrics.json, shared with the domain layer (no per-call disk I/O)"""
     try:
-        with open(json_path, 'r') as f:
-            return json.load(f)
+        return load_metrics()
     except FileNotFoundError:
         return {}
 
@@ -66,35 +69,137 @@ def _enrich_metrics(calculated_metrics):
     return enriched
 
 
+def _parse_csv(value: Optional[str]) -> Optional[tuple]:
+    """Parse a comma-separated query parameter into a sorted, de-duplicated tuple."""
+    if value is None:
+        return None
+    items = tuple(sorted({item.strip() for item in value.split(",") if item.strip()}))
+    return items or None
+
+
+def _project_metrics(enriched, metrics: Optional[tuple], fields: Optional[tuple]):
+    """
+    Keep only the requested metrics and fields, in document order.
+    
+    Raises:
+        HTTPException 400 for unknown metric keys or fields
+    """
+    if metrics is not None:
+        unknown = [metric for metric in metrics if metric not in enriched]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(unknown)}")
+    if fields is not None:
+        unknown = [field for field in fields if field not in PROJECTABLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    projected = {}
+    for metric_key, metric_data in enriched.items():
+        if metrics is not None and metric_key not in metrics:
+            continue
+        if fields is not None and isinstance(metric_data, dict):
+            metric_data = {key: value for key, value in metric_data.items() if key in fields}
+        projected[metric_key] = metric_data
+    return projected
+
+
+def _get_project_namespace(
+    project_id: Optional[str] = Query(None, description="Speckle project id; the default project if omitted"),
+    model_id: Optional[str] = Query(None, description="Speckle model id; required with project_id"),
+) -> Optional[str]:
+    """
+    Storage namespace of the requested project/model pair.
+    
+    Raises:
+        HTTPException 400 if only one of project_id/model_id is given,
+        404 if the pair is not one of the configured projects
+    """
+    if project_id is None and model_id is None:
+        return None
+    if project_id is None or model_id is None:
+        raise HTTPException(status_code=400, detail="project_id and model_id must be given together")
+    
+    project = ProjectConfig(project_id, model_id)
+    if project not in get_projects() and project.storage_namespace is not None:
+        raise HTTPException(status_code=404, detail=f"Unknown project {project_id}:{model_id}")
+    return project.storage_namespace
+
+
+def _get_enriched_response(version_id: str, metrics: Optional[tuple] = None, fields: Optional[tuple] = None):
+    """
+    Return the pre-serialized enriched metrics of a version in the current
+    storage namespace, or None if not stored.
+    Built once per namespace, saved version, definitions revision and projection, then reused.
+    """
+    entry = get_version_entry(version_id)
+    if entry is None:
+        return None
+    
+    def build():
+        stored = get_metrics(version_id)
+        if stored is None:
+            return None
+        enriched = _enrich_metrics(stored)
+        if metrics is None and fields is None:
+            return enriched
+        return _project_metrics(enriched, metrics, fields)
+    
+    key = (get_storage_namespace(), version_id, entry.get("saved_at"), get_definitions_hash(), metrics, fields)
+    return get_materialized(key, build)
+
+
 @router.get("")
-async def fetch_latest_metrics(token: dict = Depends(verify_clerk_token)):
+async def fetch_latest_metrics(
+    request: Request,
+    metrics: Optional[str] = Query(None, description="Comma-separated metric keys to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per metric"),
+    namespace: Optional[str] = Depends(_get_project_namespace),
+    token: dict = Depends(verify_clerk_token),
+):
     """
     Fetch the latest calculated metrics enriched with definitions.
     Returns calculated values + names, formulas, benchmarks from backend.
     
+    Args:
+        metrics: Optional comma-separated metric keys, e.g. "green_space_index,daylight_potential"
+        fields: Optional comma-separated fields, e.g. "total_value,benchmark"
+        project_id, model_id: Optional project/model pair from SPECKLE_PROJECTS
+    
     Returns:
         Dictionary of latest metrics with both definitions and values
     """
-    metrics = get_latest_metrics()
+    with project_storage(namespace):
+        version_id = get_latest_version_id()
+        materialized = (
+            _get_enriched_response(version_id, _parse_csv(metrics), _parse_csv(fields))
+            if version_id else None
+        )
     
-    if metrics is None:
+    if materialized is None:
         raise HTTPException(
             status_code=404, 
             detail="No metrics found in cache. Run metrics calculation first."
         )
     
-    return _enrich_metrics(metrics)
+    return build_response(request, materialized, headers={"X-Metrics-Version": version_id})
 
 
 @router.get("/history")
-async def list_saved_metrics(token: dict = Depends(verify_clerk_token)):
+async def list_saved_metrics(
+    namespace: Optional[str] = Depends(_get_project_namespace),
+    token: dict = Depends(verify_clerk_token),
+):
     """
     List all saved metric versions (history).
     
+    Args:
+        project_id, model_id: Optional project/model pair from SPECKLE_PROJECTS
+    
     Returns:
         Dictionary mapping version_id to file path
     """
-    versions = list_all_metrics()
+    with project_storage(namespace):
+        versions = list_all_metrics()
     
     if not versions:
         return {"message": "No metrics cached yet", "versions": {}}
@@ -102,58 +207,108 @@ async def list_saved_metrics(token: dict = Depends(verify_clerk_token)):
     return {"message": f"Found {len(versions)} cached versions", "versions": versions}
 
 
-@router.post("/calculate")
-async def calculate_metrics(token: dict = Depends(verify_clerk_token)):
+@router.post("/calculate", status_code=202)
+async def calculate_metrics(force: bool = False, token: dict = Depends(verify_clerk_token)):
     """
-    Calculate metrics for the latest Speckle version.
+    Queue a metrics calculation for the latest Speckle version.
     Triggered by deployment/webhook.
     
+    Args:
+        force: Recalculate even if the version already has metrics for the current definitions
+    
     Returns:
-        Dictionary of newly calculated metrics
+        Job id and the URL to poll for its status
     """
     try:
-        # Get latest version and model data
-        client = get_client()
-        version = get_latest_version(client)
-        
-        if not version:
-            raise HTTPException(
-                status_code=404,
-                detail="No versions found in Speckle project"
-            )
-        
-        transport = ServerTransport(stream_id=PROJECT_ID, client=client)
-        model = receive_data(version, transport)
-        
-        # Calculate and save metrics
-        metrics = calculate_and_save_metrics(version.id, model)
-        
-        return {"message": "Metrics calculated successfully", "metrics": metrics}
+        job = submit_calculation_job(force=force)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    
+    return {
+        "message": "Metrics calculation queued",
+        "job_id": job.id,
+        "status_url": f"{router.prefix}/jobs/{job.id}"
+    }
+
+
+@router.post("/backfill", status_code=202)
+async def backfill_metrics(force: bool = False, token: dict = Depends(verify_clerk_token)):
+    """
+    Queue a backfill of every Speckle version that has no metrics yet.
+    
+    Args:
+        force: Recalculate versions that already have metrics for the current definitions
     
-    except Exception as e:
+    Returns:
+        Job id and the URL to poll for its status and summary
+    """
+    try:
+        job = submit_backfill_job(force=force)
+    except JobQueueFullError as e:
         raise HTTPException(
-            status_code=500,
-            detail=f"Error calculating metrics: {str(e)}"
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": "30"}
         )
+    
+    return {
+        "message": "Metrics backfill queued",
+        "job_id": job.id,
+        "status_url": f"{router.prefix}/jobs/{job.id}"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def fetch_job_status(job_id: str, token: dict = Depends(verify_clerk_token)):
+    """
+    Poll a metrics calculation job.
+    
+    Args:
+        job_id: Id returned by POST /api/metrics/calculate or /api/metrics/backfill
+        
+    Returns:
+        Job status, stage and progress; version_id once succeeded
+    """
+    job = get_job(job_id)
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return job.to_dict()
 
 
 @router.get("/{version_id}")
-async def fetch_metrics(version_id: str, token: dict = Depends(verify_clerk_token)):
+async def fetch_metrics(
+    version_id: str,
+    request: Request,
+    metrics: Optional[str] = Query(None, description="Comma-separated metric keys to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per metric"),
+    namespace: Optional[str] = Depends(_get_project_namespace),
+    token: dict = Depends(verify_clerk_token),
+):
     """
     Fetch cached metrics for a specific Speckle version, enriched with definitions.
     
     Args:
         version_id: Unique identifier for the Speckle version
+        metrics: Optional comma-separated metric keys to return
+        fields: Optional comma-separated fields to return per metric
+        project_id, model_id: Optional project/model pair from SPECKLE_PROJECTS
         
     Returns:
         Dictionary of metrics with definitions merged in, or error if not found
     """
-    metrics = get_metrics(version_id)
+    with project_storage(namespace):
+        materialized = _get_enriched_response(version_id, _parse_csv(metrics), _parse_csv(fields))
     
-    if metrics is None:
+    if materialized is None:
         raise HTTPException(
             status_code=404, 
             detail=f"Metrics not found for version {version_id}"
         )
     
-    return _enrich_metrics(metrics)
\ No newline at end of file
+    return build_response(request, materialized)
\ No newline at end of file
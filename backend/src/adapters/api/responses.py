@@ -0,0 +1,174 @@
+"""
+Pre-serialized metrics responses.
+
+The enriched JSON body is serialized and compressed once per saved version and
+served from memory with a strong ETag. Entries are keyed by (version_id,
+saved_at), so re-saving a version produces a fresh entry. The body of a URL can
+still change (a forced recalculation re-saves the version, and reloaded
+definitions are merged in), so every response is revalidated against its ETag
+instead of being cached as immutable.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Declared in requirements; without it only gzip variants are built
+    brotli = None
+
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class MaterializedResponse:
+    body: bytes
+    gzip_body: bytes
+    brotli_body: Optional[bytes]
+    etag: str
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag of one content-coding of the representation."""
+        if encoding == "identity":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+    def all_etags(self) -> set[str]:
+        return {self.etag_for(encoding) for encoding in ("identity", "gzip", "br")}
+
+
+_responses: "OrderedDict[Hashable, MaterializedResponse]" = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def _get_response_cache_max_entries() -> int:
+    value = os.getenv("METRICS_RESPONSE_CACHE_SIZE", "64")
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 64
+
+
+def materialize(payload: Any) -> MaterializedResponse:
+    """Serialize a payload once and precompute its compressed variants."""
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return MaterializedResponse(
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        brotli_body=brotli.compress(body) if brotli is not None else None,
+        etag=hashlib.sha256(body).hexdigest()[:32],
+    )
+
+
+def get_materialized(key: Hashable, build: Callable[[], Any]) -> Optional[MaterializedResponse]:
+    """
+    Return the materialized response for `key`, building it on a miss.
+
+    Args:
+        key: Cache key; must change whenever the payload would change
+        build: Returns the payload to serialize, or None if there is nothing to serve
+
+    Returns:
+        MaterializedResponse or None when `build` returned None
+    """
+    with _responses_lock:
+        cached = _responses.get(key)
+        if cached is not None:
+            _responses.move_to_end(key)
+            return cached
+
+    payload = build()
+    if payload is None:
+        return None
+    materialized = materialize(payload)
+
+    with _responses_lock:
+        _responses[key] = materialized
+        _responses.move_to_end(key)
+        while len(_responses) > _get_response_cache_max_entries():
+            _responses.popitem(last=False)
+    return materialized
+
+
+def clear_materialized() -> None:
+    with _responses_lock:
+        _responses.clear()
+
+
+def _select_encoding(request: Request, materialized: MaterializedResponse) -> str:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+
+    if materialized.brotli_body is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def _if_none_match(request: Request, materialized: MaterializedResponse) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return bool(candidates & materialized.all_etags())
+
+
+def build_response(
+    request: Request,
+    materialized: MaterializedResponse,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """
+    Serve a materialized body, negotiating content-coding and honouring If-None-Match.
+
+    Args:
+        request: Incoming request
+        materialized: Pre-serialized response
+        headers: Extra headers to add
+
+    Returns:
+        200 response with the selected encoding, or 304 Not Modified
+    """
+    encoding = _select_encoding(request, materialized)
+    response_headers = {
+        "ETag": materialized.etag_for(encoding),
+        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        **(headers or {}),
+    }
+
+    if _if_none_match(request, materialized):
+        return Response(status_code=304, headers=response_headers)
+
+    if encoding == "br":
+        body = materialized.brotli_body
+        response_headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        body = materialized.gzip_body
+        response_headers["Content-Encoding"] = "gzip"
+    else:
+        body = materialized.body
+
+    return Response(content=body, media_type="application/json", headers=response_headers)
@@ -1,15 +1,61 @@
 import os
+import threading
+import time
+from typing import Optional
+
 from dotenv import load_dotenv
 from specklepy.api.client import SpeckleClient
 
+# One authenticated client per process, shared by the calculation worker threads.
+# gql's synchronous client cannot run two queries at once, so GraphQL calls on the
+# shared client (and its creation and health checks) hold client_lock.
+client_lock = threading.RLock()
+_client: Optional[SpeckleClient] = None
+_client_key: Optional[tuple[str, str]] = None
+_client_checked_at = 0.0
+_dotenv_loaded = False
+
+
+def _get_health_check_interval() -> float:
+    """Seconds between health checks of the shared client (SPECKLE_CLIENT_HEALTH_CHECK_SECONDS)."""
+    value = os.getenv("SPECKLE_CLIENT_HEALTH_CHECK_SECONDS", "300")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return 300.0
+
+
+def _is_healthy(client: SpeckleClient) -> bool:
+    """True if the client's token is still accepted by the server."""
+    try:
+        return client.active_user.get() is not None
+    except Exception as e:
+        print(f"Speckle client health check failed: {e}")
+        return False
+
+
+def _create_client(server_host: str, token: str) -> SpeckleClient:
+    client = SpeckleClient(host=server_host)
+    client.authenticate_with_token(token)
+    return client
+
 
 def get_client() -> SpeckleClient:
     """
-    Authenticate and return a SpeckleClient instance.
+    Return the process-wide authenticated SpeckleClient.
+
+    The client is created on first use and reused afterwards. It is health-checked
+    at most every SPECKLE_CLIENT_HEALTH_CHECK_SECONDS and re-authenticated when the
+    server stops accepting its token. A changed SPECKLE_TOKEN or SPECKLE_SERVER
+    creates a new client.
     Requires SPECKLE_TOKEN in environment or .env file.
     """
+    global _client, _client_key, _client_checked_at, _dotenv_loaded
+
     # Load environment variables from a local .env file, if present
-    load_dotenv()
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
 
     # Get token and server host from environment
     token = os.environ.get("SPECKLE_TOKEN")
@@ -18,15 +64,30 @@ def get_client() -> SpeckleClient:
     if not token:
         raise ValueError("Set SPECKLE_TOKEN in your .env file and re-run.")
 
-    # Authenticate
-    client = SpeckleClient(host=server_host)
-    client.authenticate_with_token(token)
+    with client_lock:
+        now = time.monotonic()
+        if _client is None or _client_key != (server_host, token):
+            _client = _create_client(server_host, token)
+            _client_key = (server_host, token)
+            _client_checked_at = now
+        elif now - _client_checked_at >= _get_health_check_interval():
+            if not _is_healthy(_client):
+                print("Re-authenticating Speckle client")
+                _client = _create_client(server_host, token)
+            _client_checked_at = now
+        return _client
 
-    return client
+
+def reset_client() -> None:
+    """Drop the shared client; the next get_client() authenticates again."""
+    global _client, _client_key
+    with client_lock:
+        _client = None
+        _client_key = None
 
 
 if __name__ == "__main__":
     # Test authentication when running this script directly
     client = get_client()
     user = client.active_user.get()
-    print(f"✓ Logged in as {user.name} on {client.url}")
\ No newline at end of file
+    print(f"✓ Logged in as {user.name} on {client.url}")
@@ -1,13 +1,15 @@
 from config import PROJECT_ID, SOURCE_MODEL_ID
 from specklepy.api.client import SpeckleClient
+from adapters.speckle.get_client import client_lock
 
-def get_latest_version(client: SpeckleClient):
+def get_latest_version(client: SpeckleClient, project_id: str = PROJECT_ID, model_id: str = SOURCE_MODEL_ID):
     # Get the latest version
-    versions = client.version.get_versions(SOURCE_MODEL_ID, PROJECT_ID, limit=1)
+    with client_lock:
+        versions = client.version.get_versions(model_id, project_id, limit=1)
     if not versions.items:
         print("No versions found.")
         return
     latest_version = versions.items[0]
     print(f"✓ Fetching version: {latest_version.id}")
     
-    return latest_version
\ No newline at end of file
+    return latest_version
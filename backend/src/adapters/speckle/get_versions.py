@@ -0,0 +1,35 @@
+from typing import Iterator, Optional
+
+from config import PROJECT_ID, SOURCE_MODEL_ID
+from specklepy.api.client import SpeckleClient
+from adapters.speckle.get_client import client_lock
+
+
+def iter_version_pages(
+    client: SpeckleClient,
+    project_id: str = PROJECT_ID,
+    model_id: str = SOURCE_MODEL_ID,
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+) -> Iterator[tuple[list, Optional[str], int]]:
+    """
+    Page through all versions of a model, newest first.
+    
+    Args:
+        client: Authenticated SpeckleClient
+        project_id: Speckle project id
+        model_id: Speckle model id
+        page_size: Versions requested per page
+        cursor: Cursor to resume from (as yielded with an earlier page)
+        
+    Yields:
+        Tuples of (versions, cursor of the next page or None, total version count)
+    """
+    while True:
+        with client_lock:
+            page = client.version.get_versions(model_id, project_id, limit=page_size, cursor=cursor)
+        next_cursor = page.cursor if len(page.items) >= page_size else None
+        yield page.items, next_cursor, page.total_count
+        if next_cursor is None:
+            return
+        cursor = next_cursor
@@ -1,9 +1,51 @@
-from domain.model.elements import Facade
+import os
+
+from domain.model.elements import Facade, GeometrySummary
 from domain.model.enum import ProgramType
 from domain.model.model import OpenSpace, Unit
 
+# SPECKLE_MAPPING_MODE values
+FULL = "full"                # keep the received Speckle object as `geometry`
+LIGHTWEIGHT = "lightweight"  # keep only a GeometrySummary so the received tree can be freed
+
+
+def get_mapping_mode() -> str:
+    """
+    SPECKLE_MAPPING_MODE, default full.
+
+    Lightweight mode shrinks the memory a Model keeps after mapping, because
+    the received Speckle objects can be freed. It does not lower the peak of a
+    receive: operations.receive still builds the whole tree before mapping.
+    """
+    mode = os.getenv("SPECKLE_MAPPING_MODE", FULL).strip().lower()
+    return mode if mode in (FULL, LIGHTWEIGHT) else FULL
+
+
+def _iter_vertex_lists(speckle_obj):
+    """Flat vertex lists of the object's display meshes, or of the object itself if it is a mesh."""
+    meshes = getattr(speckle_obj, "displayValue", None)
+    if meshes is None:
+        meshes = [speckle_obj]
+    elif not isinstance(meshes, list):
+        meshes = [meshes]
+    for mesh in meshes:
+        vertices = getattr(mesh, "vertices", None)
+        if vertices:
+            yield vertices
 
-def speckle_to_unit(speckle_obj) -> Unit:
+
+def _element_id(speckle_obj):
+    element_id = getattr(speckle_obj, "id", None)
+    return element_id if isinstance(element_id, str) else None
+
+
+def _map_geometry(speckle_obj, mode: str):
+    if mode == LIGHTWEIGHT:
+        return GeometrySummary.from_vertices(_iter_vertex_lists(speckle_obj))
+    return speckle_obj
+
+
+def speckle_to_unit(speckle_obj, mode: str = None) -> Unit:
     """Convert Speckle object to domain Unit."""
     return Unit(
         cluster_id=speckle_obj.properties["cluster_id"],
@@ -11,21 +53,23 @@ def speckle_to_unit(speckle_obj) -> Unit:
         name=ProgramType(speckle_obj.properties["program"].title()),
         area=round(speckle_obj.area, 2),
         speckle_type=speckle_obj.speckle_type,
-        geometry=speckle_obj
+        geometry=_map_geometry(speckle_obj, mode or get_mapping_mode()),
+        element_id=_element_id(speckle_obj)
     )
 
-def speckle_to_open_space(speckle_obj) -> OpenSpace:
+def speckle_to_open_space(speckle_obj, mode: str = None) -> OpenSpace:
     """Convert Speckle object to domain OpenSpace."""
     return OpenSpace(
         cluster_id=speckle_obj.properties["cluster_id"],
         level=speckle_obj.properties["level"],
         area=round(speckle_obj.area, 2),
         speckle_type=speckle_obj.speckle_type,
-        geometry=speckle_obj
+        geometry=_map_geometry(speckle_obj, mode or get_mapping_mode()),
+        element_id=_element_id(speckle_obj)
     )
     
 
-def speckle_to_facade(speckle_obj) -> Facade:
+def speckle_to_facade(speckle_obj, mode: str = None) -> Facade:
     """Convert Speckle object to domain Facade."""
     return Facade(
         cluster_id=speckle_obj.properties["cluster_id"],
@@ -34,5 +78,6 @@ def speckle_to_facade(speckle_obj) -> Facade:
         area=round(speckle_obj.area, 2),
         thickness=0,
         speckle_type=speckle_obj.speckle_type,
-        geometry=speckle_obj
-    )
\ No newline at end of file
+        geometry=_map_geometry(speckle_obj, mode or get_mapping_mode()),
+        element_id=_element_id(speckle_obj)
+    )
@@ -0,0 +1,346 @@
+"""
+Persistent local object cache for Speckle receives.
+
+Consecutive versions of a model share most of their child objects. The cache
+is a SQLite transport passed to operations.receive as the local transport, so
+only objects it has not seen are downloaded from the server. Entries are
+evicted least recently used first once the cache exceeds
+SPECKLE_OBJECT_CACHE_MAX_MB.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from specklepy.transports.abstract_transport import AbstractTransport
+
+from infrastructure.metrics_storage import METRICS_CACHE_DIR
+
+OBJECT_CACHE_FILENAME = "speckle_objects.sqlite3"
+
+# SQLite limits the number of bound parameters per statement
+_ID_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_objects_last_used ON objects (last_used);
+"""
+
+
+def _chunks(items: List[str], size: int = _ID_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@dataclass(eq=False)
+class ReceiveStats:
+    """
+    Objects read from and written to the cache by one receive.
+
+    A hit is an object the receive found in the cache without downloading it;
+    reading back an object saved earlier in the same receive is not a hit.
+    """
+    hit_ids: Set[str] = field(default_factory=set)
+    downloaded_ids: Set[str] = field(default_factory=set)
+    # Every object read or written, for the LRU timestamps and eviction protection
+    touched: Set[str] = field(default_factory=set)
+
+    @property
+    def hits(self) -> int:
+        return len(self.hit_ids)
+
+    @property
+    def downloads(self) -> int:
+        return len(self.downloaded_ids)
+
+    def record_hits(self, ids) -> None:
+        self.touched.update(ids)
+        self.hit_ids.update(id for id in ids if id not in self.downloaded_ids)
+
+    @property
+    def kind(self) -> str:
+        if self.hits == 0 and self.downloads == 0:
+            return "empty"
+        if self.downloads == 0:
+            return "warm"
+        return "cold" if self.hits == 0 else "partial"
+
+
+class ObjectCacheTransport(AbstractTransport):
+    """
+    SQLite transport with LRU eviction, used as the local side of a receive.
+
+    One instance is shared by concurrent receives. The lock only guards the
+    connection; each receive counts its own hits and downloads in a
+    ReceiveStats bound to the receiving thread.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._pending: List[tuple] = []
+        self._local = threading.local()
+        # Stats of accesses outside receiving(), and of the receives in progress
+        self._idle_stats = ReceiveStats()
+        self._active: List[ReceiveStats] = []
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    @property
+    def name(self) -> str:
+        return "ObjectCache"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _stats(self) -> ReceiveStats:
+        return getattr(self._local, "stats", None) or self._idle_stats
+
+    def begin_write(self) -> None:
+        pass
+
+    def end_write(self) -> None:
+        self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO objects (id, data, size, last_used) VALUES (?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+
+    def save_object(self, id: str, serialized_object: str) -> None:
+        with self._lock:
+            self._pending.append((id, serialized_object, len(serialized_object), time.time()))
+            stats = self._stats()
+            stats.downloaded_ids.add(id)
+            stats.touched.add(id)
+            if len(self._pending) >= _ID_CHUNK_SIZE:
+                self._flush_pending()
+
+    def save_object_from_transport(self, id: str, source_transport: AbstractTransport) -> None:
+        serialized_object = source_transport.get_object(id)
+        if serialized_object is not None:
+            self.save_object(id, serialized_object)
+
+    def get_object(self, id: str) -> Optional[str]:
+        with self._lock:
+            self._flush_pending()
+            row = self._conn.execute("SELECT data FROM objects WHERE id = ?", (id,)).fetchone()
+            if row is None:
+                return None
+            self._stats().record_hits((id,))
+            return row[0]
+
+    def has_objects(self, id_list: List[str]) -> Dict[str, bool]:
+        found = set()
+        with self._lock:
+            self._flush_pending()
+            for chunk in _chunks(list(id_list)):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT id FROM objects WHERE id IN ({placeholders})", chunk
+                )
+                found.update(row[0] for row in rows)
+            self._stats().record_hits(found)
+        return {id: id in found for id in id_list}
+
+    def copy_object_and_children(self, id: str, target_transport: AbstractTransport) -> str:
+        root = self.get_object(id)
+        if root is None:
+            raise LookupError(f"Object {id} is not in the local object cache")
+        children = list(json.loads(root).get("__closure", {}).keys())
+        target_transport.begin_write()
+        for child_id in children:
+            child = self.get_object(child_id)
+            if child is not None:
+                target_transport.save_object(child_id, child)
+        target_transport.save_object(id, root)
+        target_transport.end_write()
+        return root
+
+    def has_complete_tree(self, id: str) -> bool:
+        """True if the object and every child listed in its closure are cached."""
+        root = self.get_object(id)
+        if root is None:
+            return False
+        children = list(json.loads(root).get("__closure", {}).keys())
+        return all(self.has_objects(children).values())
+
+    def discard(self, id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM objects WHERE id = ?", (id,))
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def finish_receive(self, stats: Optional[ReceiveStats] = None) -> int:
+        """
+        Record the objects used by a receive and evict down to the size cap.
+
+        Args:
+            stats: The receive's stats; the accesses outside receiving() when None
+
+        Returns:
+            Number of evicted objects
+        """
+        stats = stats or self._idle_stats
+        with self._lock:
+            self._flush_pending()
+            now = time.time()
+            with self._conn:
+                for chunk in _chunks(list(stats.touched)):
+                    placeholders = ",".join("?" * len(chunk))
+                    self._conn.execute(
+                        f"UPDATE objects SET last_used = ? WHERE id IN ({placeholders})", [now, *chunk]
+                    )
+            stats.touched.clear()
+            if stats is self._idle_stats:
+                self._idle_stats = ReceiveStats()
+            return self._evict()
+
+    def _evict(self) -> int:
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+        # Objects a receive in progress has found in the cache must stay until it finishes
+        in_use = set().union(*(stats.touched for stats in self._active))
+        evicted = []
+        rows = self._conn.execute("SELECT id, size FROM objects ORDER BY last_used ASC")
+        for object_id, size in rows:
+            if excess <= 0:
+                break
+            if object_id in in_use:
+                continue
+            evicted.append(object_id)
+            excess -= size
+        with self._conn:
+            for chunk in _chunks(evicted):
+                placeholders = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM objects WHERE id IN ({placeholders})", chunk)
+        return len(evicted)
+
+    @contextmanager
+    def receiving(self, object_id: str):
+        """
+        Wrap one operations.receive that uses this cache as its local transport.
+
+        Drops a cached root whose children were evicted (operations.receive trusts
+        a cached root to have all of them), then records the objects used,
+        evicts down to the size cap and reports the receive timing. The lock is
+        held only for the root check and the bookkeeping afterwards, so receives
+        on other threads run concurrently.
+
+        Yields:
+            The ReceiveStats of this receive
+        """
+        stats = ReceiveStats()
+        self._local.stats = stats
+        try:
+            with self._lock:
+                self._active.append(stats)
+                if not self.has_complete_tree(object_id):
+                    self.discard(object_id)
+                # The root check is not part of the receive; its objects stay protected from eviction
+                stats.hit_ids.clear()
+
+            started = time.perf_counter()
+            yield stats
+            elapsed = time.perf_counter() - started
+        finally:
+            self._local.stats = None
+            with self._lock:
+                self._active.remove(stats)
+                evicted = self.finish_receive(stats)
+
+        print(
+            f"✓ Received {object_id} ({stats.kind}) in {elapsed:.2f}s: "
+            f"{stats.hits} cached, {stats.downloads} downloaded, {evicted} evicted"
+        )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._pending = []
+            self._idle_stats = ReceiveStats()
+            self._conn.execute("DELETE FROM objects")
+
+
+def _is_object_cache_enabled() -> bool:
+    return os.getenv("SPECKLE_OBJECT_CACHE", "true").strip().lower() != "false"
+
+
+def get_object_cache_path() -> Path:
+    """Location of the object cache, overridable with SPECKLE_OBJECT_CACHE_PATH."""
+    value = os.getenv("SPECKLE_OBJECT_CACHE_PATH", "").strip()
+    return Path(value) if value else METRICS_CACHE_DIR / OBJECT_CACHE_FILENAME
+
+
+def _get_object_cache_max_bytes() -> int:
+    value = os.getenv("SPECKLE_OBJECT_CACHE_MAX_MB", "512")
+    try:
+        return max(1, int(float(value) * 1024 * 1024))
+    except ValueError:
+        return 512 * 1024 * 1024
+
+
+_object_caches: Dict[Path, ObjectCacheTransport] = {}
+_object_caches_lock = threading.Lock()
+
+
+def get_object_cache() -> Optional[ObjectCacheTransport]:
+    """Return the shared object cache, or None when SPECKLE_OBJECT_CACHE=false."""
+    if not _is_object_cache_enabled():
+        return None
+
+    db_path = get_object_cache_path()
+    with _object_caches_lock:
+        cache = _object_caches.get(db_path)
+        if cache is None:
+            cache = ObjectCacheTransport(db_path, _get_object_cache_max_bytes())
+            _object_caches[db_path] = cache
+        cache.max_bytes = _get_object_cache_max_bytes()
+    return cache
+
+
+if __name__ == "__main__":
+    # Compare a cold receive (empty cache) with a warm one of the latest version
+    from specklepy.transports.server import ServerTransport
+
+    from adapters.speckle.get_client import get_client
+    from adapters.speckle.get_latest_version import get_latest_version
+    from adapters.speckle.receive_data import receive_data
+    from config import PROJECT_ID
+
+    client = get_client()
+    version = get_latest_version(client)
+    if version:
+        transport = ServerTransport(stream_id=PROJECT_ID, client=client)
+        get_object_cache().clear()
+        for label in ("cold", "warm"):
+            started = time.perf_counter()
+            receive_data(version, transport)
+            print(f"{label}: {time.perf_counter() - started:.2f}s")
@@ -1,23 +1,84 @@
-from dataclasses import dataclass
-from typing import Any, Dict
 from specklepy.api import operations
 
-from adapters.speckle.mappers import speckle_to_facade, speckle_to_open_space, speckle_to_unit
+from adapters.speckle.mappers import (
+    LIGHTWEIGHT,
+    get_mapping_mode,
+    speckle_to_facade,
+    speckle_to_open_space,
+    speckle_to_unit,
+)
+from adapters.speckle.object_cache import get_object_cache
 from domain.model.model import Model
-    
+
+# Speckle collection name -> Model field
+COLLECTION_FIELDS = {
+    "UNITS": "units",
+    "OPEN_SPACES": "open_spaces",
+    "FACADES": "facades",
+}
+
+_MAPPERS = {
+    "units": speckle_to_unit,
+    "open_spaces": speckle_to_open_space,
+    "facades": speckle_to_facade,
+}
+
+
+class ModelBuilder:
+    """
+    Collects mapped elements into a Model, accumulating levels and clusters on
+    the fly; the Model's columnar copy (which provides the area sums) is built
+    once at the end.
+    """
+
+    def __init__(self):
+        self.elements = {name: [] for name in COLLECTION_FIELDS.values()}
+        self.levels = set()
+        self.clusters = set()
+
+    def add(self, field_name: str, element) -> None:
+        self.elements[field_name].append(element)
+        if field_name == "units":
+            self.levels.add(element.level)
+            self.clusters.add(element.cluster_id)
+
+    def build(self) -> Model:
+        for collection_name, field_name in COLLECTION_FIELDS.items():
+            if not self.elements[field_name]:
+                print(f"Warning: no elements in collection {collection_name}")
+        model = Model(
+            units=self.elements["units"],
+            open_spaces=self.elements["open_spaces"],
+            facades=self.elements["facades"],
+            levels=list(self.levels),
+            clusters=list(self.clusters),
+        )
+        model.get_columnar()
+        return model
+
+
 def receive_data(version, transport):
-    # Receive the full data tree
-    data = operations.receive(version.referenced_object, transport)
-    units_collection = next(collection for collection in data.elements if collection.name == "UNITS")
-    units = [speckle_to_unit(u) for u in units_collection.elements]
-    
-    open_spaces_collection = next(collection for collection in data.elements if collection.name == "OPEN_SPACES")
-    green_spaces = [speckle_to_open_space(gs) for gs in open_spaces_collection.elements]
-    
-    facades_collection = next(collection for collection in data.elements if collection.name == "FACADES")
-    facades = [speckle_to_facade(f) for f in facades_collection.elements]
-    
-    levels = set(unit.level for unit in units)
-    clusters = set(unit.cluster_id for unit in units)
-    
-    return Model(units=units, open_spaces=green_spaces, facades=facades, levels=list(levels), clusters=list(clusters))
\ No newline at end of file
+    # Receive the full data tree, reading objects seen before from the local object cache
+    cache = get_object_cache()
+    if cache is None:
+        data = operations.receive(version.referenced_object, transport)
+    else:
+        with cache.receiving(version.referenced_object):
+            data = operations.receive(version.referenced_object, transport, cache)
+
+    mode = get_mapping_mode()
+    builder = ModelBuilder()
+
+    # One pass over the tree: each element goes straight to its collection's mapper
+    for collection in data.elements:
+        field_name = COLLECTION_FIELDS.get(getattr(collection, "name", None))
+        if field_name is None:
+            continue
+        mapper = _MAPPERS[field_name]
+        for speckle_obj in collection.elements:
+            builder.add(field_name, mapper(speckle_obj, mode))
+        if mode == LIGHTWEIGHT:
+            # Nothing in the Model references the received objects; let them go as we go
+            collection.elements = []
+
+    return builder.build()
@@ -0,0 +1,183 @@
+"""
+Local Speckle snapshots for offline calculation and benchmarking.
+
+A snapshot is a gzip-compressed JSON file holding a version's id, creation
+time and its mapped elements (scalar properties plus the geometry summary, if
+any), which is everything the metrics read. Recording happens after a normal
+receive. Replaying rebuilds the Model without contacting Speckle, so the
+calculate pipeline and POST /api/metrics/calculate run reproducibly offline.
+
+    SPECKLE_SNAPSHOT_RECORD_DIR=snapshots   record every received version
+    SPECKLE_SNAPSHOT_REPLAY=snapshots/<version_id>.json.gz   calculate from a snapshot
+"""
+
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from adapters.speckle.receive_data import COLLECTION_FIELDS, ModelBuilder
+from domain.model.elements import Facade, GeometrySummary, OpenSpace, Unit
+from domain.model.enum import ProgramType
+from domain.model.model import Model
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = ".json.gz"
+
+
+@dataclass(frozen=True)
+class SnapshotVersion:
+    """Stands in for a specklepy Version when calculating from a snapshot."""
+    id: str
+    created_at: Optional[str] = None
+    referenced_object: Optional[str] = None
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _geometry_to_dict(geometry) -> Optional[Dict[str, list]]:
+    if not isinstance(geometry, GeometrySummary):
+        return None
+    return {
+        "centroid": list(geometry.centroid),
+        "bbox_min": list(geometry.bbox_min),
+        "bbox_max": list(geometry.bbox_max),
+    }
+
+
+def _geometry_from_dict(data: Optional[Dict[str, list]]) -> Optional[GeometrySummary]:
+    if not data:
+        return None
+    return GeometrySummary(
+        centroid=tuple(data["centroid"]),
+        bbox_min=tuple(data["bbox_min"]),
+        bbox_max=tuple(data["bbox_max"]),
+    )
+
+
+def _element_to_dict(field_name: str, element) -> Dict[str, Any]:
+    record = {
+        "element_id": element.element_id,
+        "cluster_id": element.cluster_id,
+        "level": element.level,
+        "area": element.area,
+        "speckle_type": element.speckle_type,
+        "geometry": _geometry_to_dict(element.geometry),
+    }
+    if field_name == "units":
+        record["name"] = _plain(element.name)
+    elif field_name == "facades":
+        record["material"] = _plain(element.material)
+        record["thickness"] = element.thickness
+    return record
+
+
+def _element_from_dict(field_name: str, record: Dict[str, Any]):
+    common = {
+        "cluster_id": record["cluster_id"],
+        "level": record["level"],
+        "area": record["area"],
+        "speckle_type": record["speckle_type"],
+        "geometry": _geometry_from_dict(record.get("geometry")),
+        "element_id": record.get("element_id"),
+    }
+    if field_name == "units":
+        return Unit(name=ProgramType(record["name"]), **common)
+    if field_name == "facades":
+        return Facade(material=record["material"], thickness=record.get("thickness", 0), **common)
+    return OpenSpace(**common)
+
+
+def record_snapshot(version, model: Model, path: Path) -> Path:
+    """
+    Write a version's mapped elements to a snapshot file.
+
+    Args:
+        version: specklepy Version (or SnapshotVersion) the model was received from
+        model: Mapped Model
+        path: Snapshot file, or a directory to write <version_id>.json.gz into
+
+    Returns:
+        Path of the written snapshot
+    """
+    path = Path(path)
+    if path.is_dir() or not path.name.endswith(SNAPSHOT_SUFFIX):
+        path = path / f"{version.id}{SNAPSHOT_SUFFIX}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    created_at = getattr(version, "created_at", None)
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "version": {
+            "id": version.id,
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+            "referenced_object": getattr(version, "referenced_object", None),
+        },
+        "elements": {
+            field_name: [_element_to_dict(field_name, element) for element in getattr(model, field_name)]
+            for field_name in COLLECTION_FIELDS.values()
+        },
+    }
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(gzip.compress(body, mtime=0))
+    os.replace(tmp_path, path)
+    print(f"✓ Recorded snapshot of version {version.id} to {path}")
+    return path
+
+
+def load_snapshot(path: Path) -> tuple[SnapshotVersion, Model]:
+    """
+    Rebuild a version and its Model from a snapshot file, without any network access.
+
+    Raises:
+        ValueError: if the file is not a supported snapshot
+    """
+    payload = json.loads(gzip.decompress(Path(path).read_bytes()))
+    if payload.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format in {path}: {payload.get('format')}")
+
+    version = SnapshotVersion(**payload["version"])
+    builder = ModelBuilder()
+    for field_name in COLLECTION_FIELDS.values():
+        for record in payload["elements"].get(field_name, []):
+            builder.add(field_name, _element_from_dict(field_name, record))
+    return version, builder.build()
+
+
+def get_record_dir() -> Optional[Path]:
+    """Directory to record received versions into (SPECKLE_SNAPSHOT_RECORD_DIR), if set."""
+    value = os.getenv("SPECKLE_SNAPSHOT_RECORD_DIR", "").strip()
+    return Path(value) if value else None
+
+
+def get_replay_path() -> Optional[Path]:
+    """Snapshot to calculate from instead of Speckle (SPECKLE_SNAPSHOT_REPLAY), if set."""
+    value = os.getenv("SPECKLE_SNAPSHOT_REPLAY", "").strip()
+    return Path(value) if value else None
+
+
+if __name__ == "__main__":
+    # Time mapping and calculation for a snapshot:
+    #   PYTHONPATH=src python -m adapters.speckle.snapshots snapshots/<version_id>.json.gz
+    import sys
+
+    from application.metrics_service import calculate_all_metrics
+
+    started = time.perf_counter()
+    version, model = load_snapshot(Path(sys.argv[1]))
+    loaded = time.perf_counter()
+    calculate_all_metrics(model)
+    finished = time.perf_counter()
+    print(
+        f"Version {version.id}: {len(model.units)} units, {len(model.facades)} facades, "
+        f"{len(model.open_spaces)} open spaces | load {loaded - started:.3f}s, "
+        f"calculate {finished - loaded:.3f}s"
+    )
@@ -0,0 +1,207 @@
+"""
+Backfill of historical Speckle versions.
+
+The calculate pipeline only looks at the newest version, so every version
+pushed between two calculations is missing from the history. A backfill pages
+through all versions of a model, skips those already stored with the current
+definitions and receives and calculates the others on a bounded worker pool.
+
+After every page the cursor of the next page and the running counts are
+written to a checkpoint file in the project's storage directory, so an
+interrupted backfill resumes where it stopped. The checkpoint is removed once
+the last page is done.
+
+    PYTHONPATH=src python -m application.metrics_backfill [--force]
+"""
+
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Optional
+
+from adapters.speckle.get_client import get_client
+from adapters.speckle.get_versions import iter_version_pages
+from application.metrics_service import SKIPPED, calculate_version_once
+from application.metrics_workflow import calculate_on_eval_pool, receive_version
+from config import PROJECT_ID, SOURCE_MODEL_ID, ProjectConfig
+from domain.loader import get_definitions_hash
+from infrastructure.metrics_storage import ensure_cache_dir, get_storage_dir, get_version_entry, project_storage
+
+# Not *.json: every JSON file in the storage directory is indexed as a metrics version
+BACKFILL_CHECKPOINT_FILENAME = "backfill.checkpoint"
+
+ProgressCallback = Callable[[str, float], None]
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+@dataclass
+class BackfillReport:
+    """Counts and throughput of one backfill run (cumulative across resumes)."""
+    project_id: str
+    model_id: str
+    total: int = 0
+    calculated: int = 0
+    skipped: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.calculated + self.skipped + len(self.failed)
+
+    @property
+    def versions_per_minute(self) -> float:
+        """Calculated versions per minute; skipped versions cost next to nothing and are left out."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.calculated * 60 / self.elapsed_seconds
+
+    def to_dict(self) -> Dict[str, object]:
+        result = asdict(self)
+        result["versions_per_minute"] = round(self.versions_per_minute, 2)
+        return result
+
+
+def get_checkpoint_path():
+    """Checkpoint file of the current storage namespace."""
+    return get_storage_dir() / BACKFILL_CHECKPOINT_FILENAME
+
+
+def _load_checkpoint(project: ProjectConfig) -> tuple[Optional[str], Optional[BackfillReport]]:
+    """Cursor and report of an interrupted backfill of this project, if any."""
+    path = get_checkpoint_path()
+    try:
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None, None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Ignoring unreadable backfill checkpoint {path}: {e}")
+        return None, None
+
+    report = checkpoint.get("report", {})
+    if (report.get("project_id"), report.get("model_id")) != (project.project_id, project.model_id):
+        return None, None
+    report.pop("versions_per_minute", None)
+    return checkpoint.get("cursor"), BackfillReport(**report)
+
+
+def _save_checkpoint(cursor: str, report: BackfillReport) -> None:
+    ensure_cache_dir()
+    path = get_checkpoint_path()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"cursor": cursor, "report": report.to_dict()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _is_up_to_date(version_id: str, definitions_hash: str) -> bool:
+    entry = get_version_entry(version_id)
+    return entry is not None and entry.get("definitions_hash") == definitions_hash
+
+
+def backfill_versions(
+    project: Optional[ProjectConfig] = None,
+    force: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+    page_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> BackfillReport:
+    """
+    Calculate and save metrics for every version of a model that has none yet.
+
+    Args:
+        project: Project/model pair to backfill; the default project if omitted
+        force: Recalculate versions that already have up-to-date metrics
+        on_progress: Optional callback receiving (stage, progress 0..1)
+        page_size: Versions per Speckle page (BACKFILL_PAGE_SIZE, default 50)
+        concurrency: Versions received and calculated at once (BACKFILL_CONCURRENCY, default 4)
+
+    Returns:
+        BackfillReport with counts, failures by version_id and throughput
+    """
+    if project is None:
+        project = ProjectConfig(PROJECT_ID, SOURCE_MODEL_ID)
+    page_size = page_size or _get_int_env("BACKFILL_PAGE_SIZE", 50)
+    concurrency = concurrency or _get_int_env("BACKFILL_CONCURRENCY", 4)
+
+    with project_storage(project.storage_namespace):
+        cursor, report = _load_checkpoint(project)
+        if report is None:
+            report = BackfillReport(project.project_id, project.model_id)
+        else:
+            print(f"Resuming backfill after {report.processed} versions")
+
+        client = get_client()
+        definitions_hash = get_definitions_hash()
+        started = time.perf_counter() - report.elapsed_seconds
+
+        def calculate(version) -> str:
+            def load_model():
+                return receive_version(client, project, version)
+
+            _, outcome = calculate_version_once(
+                version.id, load_model, created_at=version.created_at, force=force, calculate=calculate_on_eval_pool
+            )
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="metrics-backfill") as executor:
+            for versions, next_cursor, total in iter_version_pages(
+                client, project.project_id, project.model_id, page_size=page_size, cursor=cursor
+            ):
+                report.total = total
+
+                futures = {}
+                for version in versions:
+                    if not force and _is_up_to_date(version.id, definitions_hash):
+                        report.skipped += 1
+                        continue
+                    # Workers run in this project's storage namespace
+                    context = contextvars.copy_context()
+                    futures[version.id] = executor.submit(context.run, calculate, version)
+
+                for version_id, future in futures.items():
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        print(f"Warning: Failed to backfill version {version_id}: {e}")
+                        report.failed[version_id] = str(e)
+                        continue
+                    if outcome == SKIPPED:
+                        report.skipped += 1
+                    else:
+                        report.calculated += 1
+
+                report.elapsed_seconds = time.perf_counter() - started
+                print(
+                    f"Backfill: {report.processed}/{report.total} versions "
+                    f"({report.calculated} calculated, {report.skipped} skipped, {len(report.failed)} failed), "
+                    f"{report.versions_per_minute:.1f} versions/min"
+                )
+                if on_progress is not None:
+                    on_progress("backfilling", min(1.0, report.processed / total) if total else 1.0)
+
+                if next_cursor is None:
+                    break
+                _save_checkpoint(next_cursor, report)
+
+        get_checkpoint_path().unlink(missing_ok=True)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = backfill_versions(force="--force" in sys.argv[1:])
+    print(json.dumps(result.to_dict(), indent=2))
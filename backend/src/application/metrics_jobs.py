@@ -0,0 +1,207 @@
+"""
+Background execution of metric calculations.
+
+POST /api/metrics/calculate used to run the Speckle download and the whole
+metric chain inside the event loop. Calculations now run on a small worker
+pool; callers get a job id and poll its stage and progress. Backfills of
+historical versions can run for hours, so they get a pool of their own with
+one worker and at most one backfill is queued or running at a time.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from application.metrics_backfill import backfill_versions
+from application.metrics_workflow import calculate_latest_metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+LATEST = "latest"
+BACKFILL = "backfill"
+
+
+class JobQueueFullError(Exception):
+    """Raised when the calculation queue is at capacity."""
+
+
+@dataclass
+class CalculationJob:
+    id: str
+    kind: str = LATEST
+    status: str = QUEUED
+    stage: str = QUEUED
+    progress: float = 0.0
+    force: bool = False
+    version_id: Optional[str] = None
+    outcome: Optional[str] = None
+    error: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 2),
+            "force": self.force,
+            "version_id": self.version_id,
+            "outcome": self.outcome,
+            "error": self.error,
+            "summary": self.summary,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+_jobs: "OrderedDict[str, CalculationJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+# One pool per job kind, so a long backfill never delays /calculate
+_executors: Dict[str, ThreadPoolExecutor] = {}
+# Queued or running jobs per kind
+_active_jobs: Dict[str, int] = {LATEST: 0, BACKFILL: 0}
+
+
+def _get_max_active(kind: str) -> int:
+    if kind == BACKFILL:
+        return 1
+    return _get_int_env("METRICS_JOB_QUEUE_DEPTH", 4)
+
+
+def _get_executor(kind: str) -> ThreadPoolExecutor:
+    if kind not in _executors:
+        if kind == BACKFILL:
+            _executors[kind] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metrics-backfill")
+        else:
+            _executors[kind] = ThreadPoolExecutor(
+                max_workers=_get_int_env("METRICS_JOB_WORKERS", 1),
+                thread_name_prefix="metrics-job",
+            )
+    return _executors[kind]
+
+
+def _prune_finished_jobs() -> None:
+    """Keep at most METRICS_JOB_HISTORY finished jobs, dropping the oldest."""
+    max_finished = _get_int_env("METRICS_JOB_HISTORY", 100)
+    finished = [job_id for job_id, job in _jobs.items() if job.status in (SUCCEEDED, FAILED)]
+    for job_id in finished[:max(0, len(finished) - max_finished)]:
+        del _jobs[job_id]
+
+
+def _run_job(job: CalculationJob) -> None:
+    def on_progress(stage: str, progress: float) -> None:
+        job.stage = stage
+        job.progress = progress
+
+    job.status = RUNNING
+    job.started_at = time.time()
+    status = FAILED
+    try:
+        if job.kind == BACKFILL:
+            job.summary = backfill_versions(force=job.force, on_progress=on_progress).to_dict()
+        else:
+            result = calculate_latest_metrics(on_progress=on_progress, force=job.force)
+            if result is None:
+                raise LookupError("No versions found in Speckle project")
+            job.version_id, _, job.outcome = result
+        job.stage = "done"
+        job.progress = 1.0
+        status = SUCCEEDED
+    except Exception as e:
+        print(f"Metrics job {job.id} failed: {e}")
+        job.error = str(e)
+    finally:
+        with _jobs_lock:
+            # Free the queue slot before the job is reported as finished
+            _active_jobs[job.kind] -= 1
+            job.finished_at = time.time()
+            job.status = status
+            _prune_finished_jobs()
+
+
+def submit_calculation_job(force: bool = False) -> CalculationJob:
+    """
+    Queue a calculation of the latest Speckle version.
+
+    Args:
+        force: Recalculate even if up-to-date metrics are stored
+
+    Returns:
+        The queued CalculationJob
+
+    Raises:
+        JobQueueFullError: if METRICS_JOB_QUEUE_DEPTH jobs are already queued or running
+    """
+    return _submit_job(LATEST, force)
+
+
+def submit_backfill_job(force: bool = False) -> CalculationJob:
+    """
+    Queue a backfill of every version of the model that has no metrics yet.
+
+    Args:
+        force: Recalculate versions that already have up-to-date metrics
+
+    Returns:
+        The queued CalculationJob; its summary holds the BackfillReport once finished
+
+    Raises:
+        JobQueueFullError: if a backfill is already queued or running
+    """
+    return _submit_job(BACKFILL, force)
+
+
+def _submit_job(kind: str, force: bool) -> CalculationJob:
+    with _jobs_lock:
+        if _active_jobs[kind] >= _get_max_active(kind):
+            if kind == BACKFILL:
+                raise JobQueueFullError("A metrics backfill is already running")
+            raise JobQueueFullError("Metrics calculation queue is full")
+        job = CalculationJob(id=uuid.uuid4().hex, kind=kind, force=force)
+        _jobs[job.id] = job
+        _active_jobs[kind] += 1
+        executor = _get_executor(kind)
+
+    try:
+        executor.submit(_run_job, job)
+    except Exception:
+        with _jobs_lock:
+            _active_jobs[kind] -= 1
+            _jobs.pop(job.id, None)
+        raise
+    return job
+
+
+def get_job(job_id: str) -> Optional[CalculationJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def shutdown_jobs(wait: bool = False) -> None:
+    """Stop accepting work; running calculations finish in the background unless wait=True."""
+    with _jobs_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
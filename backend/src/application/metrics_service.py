@@ -1,66 +1,215 @@
-from domain.metrics.green_space_index import get_green_space_index_metric
-from domain.metrics.daylight_potential import get_daylight_potential_metric
-from domain.metrics.program_diversity_index import get_program_diversity_index_metric
-from domain.metrics.circulation_efficiency import get_circulation_efficiency_metric
-from domain.metrics.occupancy_efficiency import get_occupancy_efficiency_metric
-from domain.metrics.net_floor_area_ratio import get_net_floor_area_ratio_metric
-from domain.metrics.envelope_efficiency import get_envelope_efficiency_metric
-from domain.metrics.carbon_efficiency import get_carbon_efficiency_metric
-from infrastructure.metrics_storage import save_metrics
+import math
+import os
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict
+from typing import Callable, Optional
+
+from domain.loader import get_definitions_hash
+from domain.metrics.incremental import IncrementalMetrics
+from domain.metrics.registry import METRIC_REGISTRY, evaluate_metrics
+from infrastructure.metrics_storage import get_metrics, get_storage_namespace, get_version_entry, save_metrics
+
+CALCULATED = "calculated"
+SKIPPED = "skipped"
+COALESCED = "coalesced"
+
+# (storage namespace, version_id) -> Future of the calculation currently running for that version
+_inflight: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+# Storage namespace -> running sums of its last computed model, diffed against each new version
+_incremental_states: dict[Optional[str], IncrementalMetrics] = {}
+# Storage namespace -> lock serializing the diffs of that namespace only
+_incremental_locks: dict[Optional[str], threading.Lock] = {}
+_incremental_locks_lock = threading.Lock()
+
+
+def _is_env_flag_set(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() == "true"
 
 
 def calculate_all_metrics(model):
     """
     Calculate all metrics from the model.
     
+    With INCREMENTAL_METRICS=true, daylight potential and green space index
+    are updated incrementally from the elements that changed since the last
+    computed model. The vectorized full calculation is faster for most models,
+    so this is off by default. With INCREMENTAL_VERIFY=true every incremental
+    result is checked against a full recompute.
+    
     Args:
         model: Model object containing units, facades, levels, clusters
         
     Returns:
         Dictionary of all calculated metrics
     """
-    metrics = {
-        "green_space_index": get_green_space_index_metric(
-            model.units, 
-            model.open_spaces, 
-            model.levels, 
-            model.clusters
-        ),
-        "daylight_potential": get_daylight_potential_metric(
-            model.facades, 
-            model.units, 
-            model.levels, 
-            model.clusters
-        ),
-        "program_diversity_index": get_program_diversity_index_metric(),
-        "circulation_efficiency": get_circulation_efficiency_metric(),
-        "occupancy_efficiency": get_occupancy_efficiency_metric(),
-        "net_floor_area_ratio": get_net_floor_area_ratio_metric(),
-        "envelope_efficiency": get_envelope_efficiency_metric(),
-        "carbon_efficiency": get_carbon_efficiency_metric(),
-    }
+    if _is_env_flag_set("INCREMENTAL_METRICS", "false"):
+        metrics = _calculate_incremental_metrics(model)
+        if metrics is not None:
+            if _is_env_flag_set("INCREMENTAL_VERIFY", "false"):
+                verify_metrics_match(metrics, calculate_full_metrics(model))
+            return metrics
+    return calculate_full_metrics(model)
+
+
+def _calculate_incremental_metrics(model):
+    """Metrics with incrementally updated daylight/green space, or None if the model cannot be diffed."""
+    namespace = get_storage_namespace()
+    with _incremental_locks_lock:
+        lock = _incremental_locks.setdefault(namespace, threading.Lock())
+    with lock:
+        state = _incremental_states.get(namespace)
+        if state is None or not state.update(model):
+            state = IncrementalMetrics.from_model(model)
+        if state is None:
+            _incremental_states.pop(namespace, None)
+            return None
+        _incremental_states[namespace] = state
+        added, removed = state.last_diff
+        print(f"Incremental update: {added} elements added, {removed} removed")
+        green_space_index = state.green_space_index_metric(model.levels, model.clusters)
+        daylight_potential = state.daylight_potential_metric(model.levels, model.clusters)
+
+    others = calculate_full_metrics(model, skip=("green_space_index", "daylight_potential"))
+    return {"green_space_index": green_space_index, "daylight_potential": daylight_potential, **others}
+
+
+def _values_match(incremental, full, path: str) -> None:
+    if isinstance(full, dict):
+        if not isinstance(incremental, dict) or list(incremental) != list(full):
+            raise AssertionError(f"{path}: keys differ")
+        for key in full:
+            _values_match(incremental[key], full[key], f"{path}.{key}")
+    elif isinstance(full, float) or isinstance(incremental, float):
+        if not math.isclose(incremental, full, rel_tol=1e-9, abs_tol=1e-9):
+            raise AssertionError(f"{path}: {incremental} != {full}")
+    elif incremental != full:
+        raise AssertionError(f"{path}: {incremental!r} != {full!r}")
+
+
+def verify_metrics_match(incremental: dict, full: dict) -> None:
+    """
+    Assert that incrementally updated metrics equal a full recompute.
+
+    Raises:
+        AssertionError: naming the first differing value
+    """
+    _values_match(
+        {name: asdict(metric) for name, metric in incremental.items()},
+        {name: asdict(metric) for name, metric in full.items()},
+        "metrics",
+    )
+
+
+def calculate_full_metrics(model, skip=()):
+    """
+    Calculate every metric from scratch.
     
-    return metrics
+    Metrics come from the registry in domain.metrics.registry, which computes
+    the intermediates they share (columnar model, area aggregates) once.
+    
+    Args:
+        model: Model object containing units, facades, levels, clusters
+        skip: Metric slugs to leave out
+        
+    Returns:
+        Dictionary of all calculated metrics
+    """
+    return evaluate_metrics(model, [name for name in METRIC_REGISTRY if name not in skip])
 
 
-def calculate_and_save_metrics(version_id: str, model):
+def calculate_and_save_metrics(
+    version_id: str, model, created_at=None, definitions_hash=None, calculate: Optional[Callable] = None
+):
     """
     Calculate all metrics and save to JSON file.
     
     Args:
         version_id: Unique identifier for the Speckle version
         model: Model object containing units, facades, levels, clusters
+        created_at: Speckle creation time of the version, used to order history
+        definitions_hash: Hash of the rulebook/metric definitions; computed if omitted
+        calculate: Callable computing the metrics of a model; calculate_all_metrics if omitted
         
     Returns:
         Dictionary of all calculated metrics
     """
     print(f"Calculating metrics for version {version_id}...")
     
-    metrics = calculate_all_metrics(model)
+    if definitions_hash is None:
+        definitions_hash = get_definitions_hash()
+    metrics = (calculate or calculate_all_metrics)(model)
     
     print("Saving metrics to storage...")
-    save_metrics(version_id, metrics)
+    save_metrics(version_id, metrics, created_at=created_at, definitions_hash=definitions_hash)
     
     print("Metrics successfully calculated and saved!")
     
     return metrics
+
+
+def calculate_version_once(
+    version_id: str,
+    load_model: Callable,
+    created_at=None,
+    force: bool = False,
+    calculate: Optional[Callable] = None,
+):
+    """
+    Calculate and save metrics for a version at most once.
+    
+    Concurrent calls for the same version (in the same storage namespace)
+    share one in-flight calculation.
+    When stored metrics exist for the version and were calculated with the
+    current rulebook/metric definitions, the calculation is skipped and
+    `load_model` is never called, unless `force` is set.
+    
+    Args:
+        version_id: Unique identifier for the Speckle version
+        load_model: Callable returning the Model (e.g. receives it from Speckle)
+        created_at: Speckle creation time of the version
+        force: Recalculate even if up-to-date metrics are stored
+        calculate: Callable computing the metrics of a model; calculate_all_metrics if omitted
+        
+    Returns:
+        Tuple of (metrics, outcome) where outcome is "calculated", "skipped" or "coalesced"
+    """
+    key = (get_storage_namespace(), version_id)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+    
+    if not owner:
+        print(f"Joining in-flight calculation for version {version_id}")
+        metrics, _ = future.result()
+        return metrics, COALESCED
+    
+    try:
+        definitions_hash = get_definitions_hash()
+        entry = get_version_entry(version_id)
+        stored = None
+        if not force and entry is not None and entry.get("definitions_hash") == definitions_hash:
+            stored = get_metrics(version_id)
+        
+        if stored is not None:
+            print(f"Metrics for version {version_id} are up to date. Skipping calculation.")
+            result = (stored, SKIPPED)
+        else:
+            model = load_model()
+            metrics = calculate_and_save_metrics(
+                version_id, model, created_at=created_at, definitions_hash=definitions_hash, calculate=calculate
+            )
+            result = (metrics, CALCULATED)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
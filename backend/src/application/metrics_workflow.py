@@ -1,21 +1,243 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
 from specklepy.transports.server import ServerTransport
 from adapters.speckle.get_client import get_client
 from adapters.speckle.get_latest_version import get_latest_version
 from adapters.speckle.receive_data import receive_data
-from config import PROJECT_ID
-from application.metrics_service import calculate_and_save_metrics
+from adapters.speckle.snapshots import get_record_dir, get_replay_path, load_snapshot, record_snapshot
+from config import PROJECT_ID, SOURCE_MODEL_ID, ProjectConfig, get_projects
+from application.metrics_service import calculate_all_metrics, calculate_version_once
+from infrastructure.metrics_storage import project_storage
+
+ProgressCallback = Callable[[str, float], None]
+ProjectProgressCallback = Callable[[str, str, float], None]
+
+
+def _report(on_progress: Optional[ProgressCallback], stage: str, progress: float) -> None:
+    if on_progress is not None:
+        on_progress(stage, progress)
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+# Speckle downloads of all projects share one limit (SPECKLE_FETCH_CONCURRENCY);
+# metric evaluation runs on its own thread pool (METRICS_EVAL_WORKERS) so a
+# slow download never holds a calculation slot. The pool is threads, not
+# processes: only the NumPy sections of the metrics release the GIL and run in
+# parallel. A process pool would have to pickle each Model (with its Speckle
+# geometry in full mapping mode) and would lose the per-process incremental
+# state.
+_fetch_semaphore: Optional[threading.BoundedSemaphore] = None
+_eval_executor: Optional[ThreadPoolExecutor] = None
+_pools_lock = threading.Lock()
+
+
+def _get_fetch_semaphore() -> threading.BoundedSemaphore:
+    global _fetch_semaphore
+    with _pools_lock:
+        if _fetch_semaphore is None:
+            _fetch_semaphore = threading.BoundedSemaphore(_get_int_env("SPECKLE_FETCH_CONCURRENCY", 4))
+        return _fetch_semaphore
+
+
+def _get_eval_executor() -> ThreadPoolExecutor:
+    global _eval_executor
+    with _pools_lock:
+        if _eval_executor is None:
+            _eval_executor = ThreadPoolExecutor(
+                max_workers=_get_int_env("METRICS_EVAL_WORKERS", os.cpu_count() or 1),
+                thread_name_prefix="metrics-eval",
+            )
+        return _eval_executor
+
+
+def calculate_on_eval_pool(model):
+    """
+    Run calculate_all_metrics on the evaluation thread pool, in the caller's storage namespace.
+
+    The pool bounds how many evaluations run at once; only their NumPy sections run in parallel.
+    """
+    context = contextvars.copy_context()
+    return _get_eval_executor().submit(context.run, calculate_all_metrics, model).result()
+
+
+def receive_version(client, project: ProjectConfig, version):
+    """
+    Receive and map a version's model, within the shared Speckle fetch limit.
+    
+    With SPECKLE_SNAPSHOT_RECORD_DIR set, the model is also recorded there.
+    """
+    transport = ServerTransport(stream_id=project.project_id, client=client)
+    with _get_fetch_semaphore():
+        model = receive_data(version, transport)
+    record_dir = get_record_dir()
+    if record_dir is not None:
+        record_snapshot(version, model, record_dir)
+    return model
+
+
+def calculate_latest_metrics(
+    on_progress: Optional[ProgressCallback] = None,
+    force: bool = False,
+    project: Optional[ProjectConfig] = None,
+    calculate: Optional[Callable] = None,
+):
+    """
+    Fetch the latest Speckle version, calculate its metrics and save them.
+    
+    The download and calculation are skipped when the version already has
+    metrics for the current definitions, unless `force` is set.
+    With SPECKLE_SNAPSHOT_REPLAY set, the version and model come from that
+    local snapshot instead of Speckle; with SPECKLE_SNAPSHOT_RECORD_DIR set,
+    every received version is recorded there.
+    
+    Args:
+        on_progress: Optional callback receiving (stage, progress 0..1)
+        force: Recalculate even if up-to-date metrics are stored
+        project: Project/model pair to calculate; the default project if omitted
+        calculate: Callable computing the metrics of a model; calculate_all_metrics if omitted
+        
+    Returns:
+        Tuple of (version_id, metrics, outcome), or None if the model has no versions
+    """
+    if project is None:
+        project = ProjectConfig(PROJECT_ID, SOURCE_MODEL_ID)
+
+    with project_storage(project.storage_namespace):
+        replay_path = get_replay_path()
+        if replay_path is not None:
+            return _calculate_snapshot(replay_path, on_progress, force, calculate)
+
+        _report(on_progress, "connecting", 0.05)
+        client = get_client()
+        
+        _report(on_progress, "fetching_version", 0.1)
+        with _get_fetch_semaphore():
+            version = get_latest_version(client, project.project_id, project.model_id)
+        if not version:
+            return None
+        
+        def load_model():
+            _report(on_progress, "receiving", 0.2)
+            model = receive_version(client, project, version)
+            _report(on_progress, "calculating", 0.7)
+            return model
+        
+        # Calculate and save all metrics
+        metrics, outcome = calculate_version_once(
+            version.id, load_model, created_at=version.created_at, force=force, calculate=calculate
+        )
+        
+        _report(on_progress, "done", 1.0)
+        return version.id, metrics, outcome
+
+
+def _calculate_snapshot(path, on_progress: Optional[ProgressCallback], force: bool, calculate: Optional[Callable]):
+    """calculate_latest_metrics against a recorded snapshot; no network access."""
+    _report(on_progress, "loading_snapshot", 0.1)
+    version, model = load_snapshot(path)
+    print(f"✓ Replaying snapshot of version {version.id} from {path}")
+    
+    def load_model():
+        _report(on_progress, "calculating", 0.7)
+        return model
+    
+    metrics, outcome = calculate_version_once(
+        version.id, load_model, created_at=version.created_at, force=force, calculate=calculate
+    )
+    
+    _report(on_progress, "done", 1.0)
+    return version.id, metrics, outcome
+
+
+@dataclass
+class ProjectRun:
+    """Result of calculating one project/model pair in calculate_projects."""
+    project: ProjectConfig
+    result: Optional[tuple] = None
+    error: Optional[BaseException] = None
+
+
+def calculate_projects(
+    projects: Optional[List[ProjectConfig]] = None,
+    on_progress: Optional[ProjectProgressCallback] = None,
+    force: bool = False,
+) -> List[ProjectRun]:
+    """
+    Calculate the latest version of several project/model pairs concurrently.
+    
+    Every pair is stored in its own namespace. At most SPECKLE_FETCH_CONCURRENCY
+    Speckle downloads run at once, and metrics are evaluated on a separate pool
+    of METRICS_EVAL_WORKERS threads. A failing pair does not stop the others.
+    
+    Args:
+        projects: Pairs to calculate; get_projects() if omitted
+        on_progress: Optional callback receiving (project_id, stage, progress 0..1)
+        force: Recalculate even if up-to-date metrics are stored
+        
+    Returns:
+        One ProjectRun per pair, in the given order
+    """
+    if projects is None:
+        projects = get_projects()
+
+    def run(project: ProjectConfig) -> ProjectRun:
+        def report(stage: str, progress: float) -> None:
+            if on_progress is not None:
+                on_progress(project.project_id, stage, progress)
+
+        try:
+            result = calculate_latest_metrics(
+                on_progress=report, force=force, project=project, calculate=calculate_on_eval_pool
+            )
+            return ProjectRun(project, result=result)
+        except Exception as e:
+            print(f"Warning: Failed to calculate project {project.project_id} model {project.model_id}: {e}")
+            report("failed", 1.0)
+            return ProjectRun(project, error=e)
+
+    if not projects:
+        return []
+    with ThreadPoolExecutor(max_workers=len(projects), thread_name_prefix="metrics-project") as executor:
+        return list(executor.map(run, projects))
+
 
 def run_application():
-    client = get_client()
-    version = get_latest_version(client)
-    if not version:
+    projects = get_projects()
+    if len(projects) > 1:
+        return _run_projects(projects)
+
+    result = calculate_latest_metrics(project=projects[0])
+    if result is None:
         print("No versions found. Exiting.")
         return
     
-    transport = ServerTransport(stream_id=PROJECT_ID, client=client)
-    model = receive_data(version, transport)
-    
-    # Calculate and save all metrics
-    metrics = calculate_and_save_metrics(version.id, model)
-    
-    return metrics
\ No newline at end of file
+    _, metrics, _ = result
+    return metrics
+
+
+def _run_projects(projects: List[ProjectConfig]) -> dict[ProjectConfig, Any]:
+    def print_progress(project_id: str, stage: str, progress: float) -> None:
+        print(f"[{project_id}] {stage} ({progress:.0%})")
+
+    metrics_by_project = {}
+    for run in calculate_projects(projects, on_progress=print_progress):
+        if run.error is not None:
+            continue
+        if run.result is None:
+            print(f"No versions found for project {run.project.project_id} model {run.project.model_id}.")
+            continue
+        _, metrics, _ = run.result
+        metrics_by_project[run.project] = metrics
+    return metrics_by_project
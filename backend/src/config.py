@@ -1,4 +1,46 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
 WORKSPACE_ID = "a1cd06bae2"
 PROJECT_ID = "dcca94731b"
 SOURCE_MODEL_ID = "827526cd48"
-# TARGET_MODEL_ID = "39d99ae41a"
\ No newline at end of file
+# TARGET_MODEL_ID = "39d99ae41a"
+
+
+@dataclass(frozen=True)
+class ProjectConfig:
+    """One Speckle project/model pair to calculate metrics for."""
+    project_id: str
+    model_id: str
+
+    @property
+    def storage_namespace(self) -> Optional[str]:
+        """Storage namespace of the pair; the default project keeps the cache root."""
+        if (self.project_id, self.model_id) == (PROJECT_ID, SOURCE_MODEL_ID):
+            return None
+        return f"{self.project_id}_{self.model_id}"
+
+
+def get_projects() -> List[ProjectConfig]:
+    """
+    Project/model pairs to calculate, from SPECKLE_PROJECTS="project:model,project:model".
+    
+    Defaults to the single PROJECT_ID/SOURCE_MODEL_ID pair.
+    """
+    value = os.getenv("SPECKLE_PROJECTS", "").strip()
+    if not value:
+        return [ProjectConfig(PROJECT_ID, SOURCE_MODEL_ID)]
+
+    projects = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        project_id, separator, model_id = item.partition(":")
+        if not separator or not project_id.strip() or not model_id.strip():
+            raise ValueError(f"Invalid SPECKLE_PROJECTS entry {item!r}, expected project_id:model_id")
+        project = ProjectConfig(project_id.strip(), model_id.strip())
+        if project not in projects:
+            projects.append(project)
+    return projects
@@ -1,13 +1,105 @@
 
+import hashlib
 import json
+import os
+import threading
+import time
+from collections.abc import Mapping
 from pathlib import Path
 
+METRICS_PATH = Path(__file__).parent / "json" / "metrics.json"
+RULEBOOK_PATH = Path(__file__).parent / "json" / "rulebook.json"
+
+
+def _get_reload_interval() -> float:
+    """Seconds between mtime checks of the definition files (DEFINITIONS_RELOAD_INTERVAL)."""
+    value = os.getenv("DEFINITIONS_RELOAD_INTERVAL", "2")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return 2.0
+
+
+class DefinitionsFile:
+    """
+    A JSON definitions file parsed once and shared by domain and API.
+    Reparsed when its mtime changes (checked at most every reload interval) or on reload().
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self._digest = None
+        self._mtime_ns = None
+        self._checked_at = 0.0
+
+    def _load(self, mtime_ns: int) -> None:
+        raw = self.path.read_bytes()
+        self._data = json.loads(raw)
+        self._digest = hashlib.sha256(raw).hexdigest()
+        self._mtime_ns = mtime_ns
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._data is not None and now - self._checked_at < _get_reload_interval():
+            return
+        with self._lock:
+            self._checked_at = now
+            mtime_ns = self.path.stat().st_mtime_ns
+            if force or self._data is None or mtime_ns != self._mtime_ns:
+                self._load(mtime_ns)
+
+    def get(self) -> dict:
+        """Parsed file contents; shared between callers and must not be mutated."""
+        self._refresh()
+        return self._data
+
+    def digest(self) -> str:
+        self._refresh()
+        return self._digest
+
+    def reload(self) -> None:
+        self._refresh(force=True)
+
+
+class LiveDefinitions(Mapping):
+    """Read-only mapping that always reflects the current contents of a DefinitionsFile."""
+
+    def __init__(self, source: DefinitionsFile):
+        self._source = source
+
+    def __getitem__(self, key):
+        return self._source.get()[key]
+
+    def __iter__(self):
+        return iter(self._source.get())
+
+    def __len__(self):
+        return len(self._source.get())
+
+
+_metrics_file = DefinitionsFile(METRICS_PATH)
+_rulebook_file = DefinitionsFile(RULEBOOK_PATH)
+
+# Shared, lazily loaded views used by the metric modules
+METRIC_DEFINITIONS = LiveDefinitions(_metrics_file)
+RULEBOOK = LiveDefinitions(_rulebook_file)
+
 def load_metrics():
-    metrics_path = Path(__file__).parent / "json" / "metrics.json"
-    with open(metrics_path) as f:
-        return json.load(f)
-    
+    return _metrics_file.get()
+
 def load_rulebook():
-    rulebook_path = Path(__file__).parent / "json" / "rulebook.json"
-    with open(rulebook_path) as f:
-        return json.load(f)
\ No newline at end of file
+    return _rulebook_file.get()
+
+def reload_definitions() -> None:
+    """Re-read metrics.json and rulebook.json now, regardless of the mtime check."""
+    _metrics_file.reload()
+    _rulebook_file.reload()
+
+def get_definitions_hash() -> str:
+    """Hash of the rulebook and metric definitions that calculated metrics depend on."""
+    digest = hashlib.sha256()
+    digest.update(_rulebook_file.digest().encode())
+    digest.update(_metrics_file.digest().encode())
+    return digest.hexdigest()[:16]
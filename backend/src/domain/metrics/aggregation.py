@@ -0,0 +1,134 @@
+"""
+Group-by aggregation shared by the metrics.
+
+An Aggregate sums one per-element quantity (or counts elements) of a
+ColumnarModel overall and per level, cluster, program and material. Each
+grouping is one bincount over the element arrays, computed on first use, so a
+metric derives its total, per-level and per-cluster values from a few
+Aggregates instead of re-filtering the elements for every level and cluster.
+"""
+
+from functools import cached_property
+from typing import Iterable, Optional
+
+import numpy as np
+
+from domain.model.columnar import MATERIAL_TYPES, PROGRAM_TYPES, ColumnarModel, ElementColumns, safe_ratio
+from domain.model.enum import MaterialType, ProgramType
+
+
+def _bincount_codes(codes: np.ndarray, weights: Optional[np.ndarray], size: int) -> np.ndarray:
+    """bincount that ignores UNKNOWN (negative) codes."""
+    known = codes >= 0
+    return np.bincount(codes[known], weights=None if weights is None else weights[known], minlength=size)
+
+
+class Aggregate:
+    """Sum and count of a quantity over selected elements of one kind, overall and grouped."""
+
+    def __init__(
+        self,
+        columnar: ColumnarModel,
+        columns: ElementColumns,
+        weights: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            columnar: Model the element columns belong to (provides level and cluster codes)
+            columns: Element kind to aggregate, e.g. columnar.units
+            weights: Per-element values to sum; the sums are counts when None
+            mask: Boolean selection of elements to include
+        """
+        self.columnar = columnar
+        self.columns = columns
+        self.weights = weights
+        self.mask = mask
+
+    def _select(self, codes: np.ndarray) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.mask is None:
+            return codes, self.weights
+        return codes[self.mask], None if self.weights is None else self.weights[self.mask]
+
+    # Overall
+
+    @cached_property
+    def count(self) -> int:
+        return len(self.columns) if self.mask is None else int(np.count_nonzero(self.mask))
+
+    @cached_property
+    def total(self) -> float:
+        if self.weights is None:
+            return float(self.count)
+        weights = self.weights if self.mask is None else self.weights[self.mask]
+        return float(weights.sum())
+
+    # Per group, indexed by level/cluster/program/material code
+
+    @cached_property
+    def sum_per_level_code(self) -> np.ndarray:
+        return self.columnar.sum_by_level(self.columns, self.weights, self.mask)
+
+    @cached_property
+    def count_per_level_code(self) -> np.ndarray:
+        return self.columnar.sum_by_level(self.columns, mask=self.mask)
+
+    @cached_property
+    def sum_per_cluster_code(self) -> np.ndarray:
+        return self.columnar.sum_by_cluster(self.columns, self.weights, self.mask)
+
+    @cached_property
+    def count_per_cluster_code(self) -> np.ndarray:
+        return self.columnar.sum_by_cluster(self.columns, mask=self.mask)
+
+    @cached_property
+    def sum_per_program_code(self) -> np.ndarray:
+        return _bincount_codes(*self._select(self.columns.program), len(PROGRAM_TYPES))
+
+    @cached_property
+    def sum_per_material_code(self) -> np.ndarray:
+        return _bincount_codes(*self._select(self.columns.material), len(MATERIAL_TYPES))
+
+    # Derived values
+
+    def ratio(self, denominator: "Aggregate") -> float:
+        """self.total / denominator.total, 0.0 when the denominator is 0."""
+        if denominator.total == 0:
+            return 0.0
+        return self.total / denominator.total
+
+    def ratio_per_level(self, denominator: "Aggregate", levels: Iterable[int]) -> dict[int, float]:
+        """Per-level ratio of the sums, for the given levels that have denominator elements."""
+        return self.columnar.values_per_level(
+            levels,
+            safe_ratio(self.sum_per_level_code, denominator.sum_per_level_code),
+            denominator.count_per_level_code > 0,
+        )
+
+    def ratio_per_cluster(self, denominator: "Aggregate", clusters: Iterable[str]) -> dict[str, float]:
+        """Per-cluster ratio of the sums, for the given clusters that have denominator elements."""
+        return self.columnar.values_per_cluster(
+            clusters,
+            safe_ratio(self.sum_per_cluster_code, denominator.sum_per_cluster_code),
+            denominator.count_per_cluster_code > 0,
+        )
+
+    def mean_per_level(self, levels: Iterable[int]) -> dict[int, float]:
+        """Mean per level, for the given levels with at least one selected element."""
+        return self.columnar.values_per_level(
+            levels, safe_ratio(self.sum_per_level_code, self.count_per_level_code), self.count_per_level_code > 0
+        )
+
+    def mean_per_cluster(self, clusters: Iterable[str]) -> dict[str, float]:
+        """Mean per cluster, for the given clusters with at least one selected element."""
+        return self.columnar.values_per_cluster(
+            clusters, safe_ratio(self.sum_per_cluster_code, self.count_per_cluster_code), self.count_per_cluster_code > 0
+        )
+
+    def sum_per_program(self) -> dict[ProgramType, float]:
+        """Nonzero sums per program."""
+        return {program: float(value) for program, value in zip(PROGRAM_TYPES, self.sum_per_program_code) if value}
+
+    def sum_per_material(self) -> dict[MaterialType, float]:
+        """Nonzero sums per material."""
+        return {material: float(value) for material, value in zip(MATERIAL_TYPES, self.sum_per_material_code) if value}
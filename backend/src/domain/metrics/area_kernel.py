@@ -0,0 +1,187 @@
+"""
+Fused kernel for the area-based metrics.
+
+Program diversity, circulation efficiency, occupancy efficiency and carbon
+efficiency all reduce unit areas and counts per program, plus the embodied
+carbon of the facades. The kernel makes that one pass:
+- one bincount of units into (level, program) and (cluster, program) matrices
+- one bincount of facade carbon per level and per cluster
+
+Every metric is then evaluated per level, per cluster and for the total, as
+vectorized row operations on those matrices. Rulebook flags and material
+constants are read through lookup tables indexed by program and material code.
+
+Areas are relative to the net floor area, the area of all units, as in the
+daylight potential (aggregate_unit_area). The net floor area ratio also needs
+the gross floor area, which the model does not carry, so it is not computed here.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from domain.loader import load_rulebook
+from domain.model.columnar import MATERIAL_TYPES, PROGRAM_CODES, PROGRAM_TYPES, ColumnarModel, safe_ratio
+from domain.model.enum import ProgramType
+
+# Embodied carbon intensity (kgCO2e per m² of unit area) at which the carbon score reaches 0
+CARBON_TARGET = 600.0
+
+_PROGRAMS = len(PROGRAM_TYPES)
+# Matrix column of units with an unknown program: counted in area totals only
+_UNKNOWN_PROGRAM = _PROGRAMS
+_CIRCULATION = PROGRAM_CODES[ProgramType.CIRCULATION.value]
+
+
+@dataclass(frozen=True, eq=False)
+class RulebookTables:
+    """Rulebook values as arrays indexed by program or material code."""
+    is_usable: np.ndarray      # per program code (bool)
+    is_green: np.ndarray       # per program code (bool)
+    density: np.ndarray        # per material code, plus a trailing 0 for UNKNOWN (-1)
+    carbon_factor: np.ndarray  # same layout as density
+
+    @classmethod
+    def from_rulebook(cls, rulebook: dict) -> "RulebookTables":
+        programs = rulebook.get("program_types", {})
+        materials = rulebook.get("material_types", {})
+
+        def program_table(key: str) -> np.ndarray:
+            return np.array([programs.get(program.value, {}).get(key, False) for program in PROGRAM_TYPES], dtype=bool)
+
+        def material_table(key: str) -> np.ndarray:
+            return np.array([materials.get(material.value, {}).get(key, 0.0) for material in MATERIAL_TYPES] + [0.0])
+
+        return cls(
+            is_usable=program_table("is_usable"),
+            is_green=program_table("is_green"),
+            density=material_table("density"),
+            carbon_factor=material_table("carbon_factor"),
+        )
+
+
+_tables_cache: tuple[Optional[dict], Optional[RulebookTables]] = (None, None)
+
+
+def get_rulebook_tables() -> RulebookTables:
+    """Lookup tables of the current rulebook, rebuilt when rulebook.json is reloaded."""
+    global _tables_cache
+    rulebook = load_rulebook()
+    cached_rulebook, tables = _tables_cache
+    if cached_rulebook is not rulebook:
+        tables = RulebookTables.from_rulebook(rulebook)
+        _tables_cache = (rulebook, tables)
+    return tables
+
+
+@dataclass(frozen=True)
+class GroupedValues:
+    total_value: float
+    value_per_level: dict[int, float]
+    value_per_cluster: dict[str, float]
+
+
+@dataclass(frozen=True)
+class AreaMetrics:
+    """Values of the area-based metrics plus the shares behind their charts."""
+    program_diversity_index: GroupedValues
+    circulation_efficiency: GroupedValues
+    occupancy_efficiency: GroupedValues
+    carbon_efficiency: GroupedValues
+    program_shares: dict[str, float]    # % of units per program
+    occupancy_shares: dict[str, float]  # % of net floor area that is green, otherwise usable, or neither
+    carbon_shares: dict[str, float]     # % of embodied carbon per facade material
+
+
+def _evaluate(counts: np.ndarray, areas: np.ndarray, carbon: np.ndarray, tables: RulebookTables) -> dict[str, np.ndarray]:
+    """
+    All area-based metrics for each row of the program matrices.
+
+    Args:
+        counts: Units per (group, program column)
+        areas: Unit area per (group, program column)
+        carbon: Embodied facade carbon per group
+    """
+    net_floor_area = areas.sum(axis=1)
+    has_area = net_floor_area > 0
+    program_counts = counts[:, :_PROGRAMS]
+    program_units = program_counts.sum(axis=1)
+
+    intensity = safe_ratio(carbon, net_floor_area)
+    return {
+        # Simpson diversity: 1 - sum(n_p²) / N²
+        "program_diversity_index": np.where(
+            program_units > 0, 1 - safe_ratio((program_counts ** 2).sum(axis=1), program_units ** 2), 0.0
+        ),
+        "circulation_efficiency": np.where(has_area, 1 - safe_ratio(areas[:, _CIRCULATION], net_floor_area), 0.0),
+        "occupancy_efficiency": safe_ratio(areas[:, :_PROGRAMS] @ tables.is_usable.astype(np.float64), net_floor_area),
+        "carbon_efficiency": np.where(has_area, np.maximum(0.0, 1 - intensity / CARBON_TARGET), 0.0),
+    }
+
+
+def _shares(values: np.ndarray, names) -> dict[str, float]:
+    total = values.sum()
+    if total <= 0:
+        return {}
+    return {name: float(value / total * 100) for name, value in zip(names, values) if value > 0}
+
+
+def calculate_area_metrics(
+    columnar: ColumnarModel,
+    levels: list[int],
+    clusters: list[str],
+    tables: Optional[RulebookTables] = None,
+) -> AreaMetrics:
+    """
+    Evaluate the area-based metrics in one pass over units and facades.
+
+    Levels and clusters without units are left out of the per-level and
+    per-cluster values, as for daylight potential. Facades without a thickness
+    have no known volume and add no embodied carbon.
+    """
+    tables = tables or get_rulebook_tables()
+    units, facades = columnar.units, columnar.facades
+    width = _PROGRAMS + 1
+    level_count, cluster_count = len(columnar.level_values), len(columnar.clusters)
+
+    program = np.where(units.program >= 0, units.program, _UNKNOWN_PROGRAM)
+    level_cells = units.level_code * width + program
+    cluster_cells = units.cluster * width + program
+    level_counts = np.bincount(level_cells, minlength=level_count * width).reshape(level_count, width)
+    level_areas = np.bincount(level_cells, units.area, minlength=level_count * width).reshape(level_count, width)
+    cluster_counts = np.bincount(cluster_cells, minlength=cluster_count * width).reshape(cluster_count, width)
+    cluster_areas = np.bincount(cluster_cells, units.area, minlength=cluster_count * width).reshape(cluster_count, width)
+
+    # Material code -1 (unknown) picks the trailing zero of each table
+    material = facades.material
+    carbon = facades.area * facades.thickness * tables.density[material] * tables.carbon_factor[material]
+    level_carbon = np.bincount(facades.level_code, carbon, minlength=level_count)
+    cluster_carbon = np.bincount(facades.cluster, carbon, minlength=cluster_count)
+
+    per_level = _evaluate(level_counts, level_areas, level_carbon, tables)
+    per_cluster = _evaluate(cluster_counts, cluster_areas, cluster_carbon, tables)
+    total_counts = level_counts.sum(axis=0)
+    program_areas = level_areas.sum(axis=0)
+    total = _evaluate(total_counts[np.newaxis], program_areas[np.newaxis], np.array([carbon.sum()]), tables)
+
+    level_present = level_counts.sum(axis=1) > 0
+    cluster_present = cluster_counts.sum(axis=1) > 0
+    values = {
+        name: GroupedValues(
+            total_value=float(total[name][0]),
+            value_per_level=columnar.values_per_level(levels, per_level[name], level_present),
+            value_per_cluster=columnar.values_per_cluster(clusters, per_cluster[name], cluster_present),
+        )
+        for name in total
+    }
+    green_area = program_areas[:_PROGRAMS] @ tables.is_green.astype(np.float64)
+    usable_area = program_areas[:_PROGRAMS] @ (tables.is_usable & ~tables.is_green).astype(np.float64)
+    occupancy_areas = np.array([usable_area, green_area, program_areas.sum() - usable_area - green_area])
+    material_carbon = np.bincount(material[material >= 0], carbon[material >= 0], minlength=len(MATERIAL_TYPES))
+    return AreaMetrics(
+        **values,
+        program_shares=_shares(total_counts[:_PROGRAMS], [program.value for program in PROGRAM_TYPES]),
+        occupancy_shares=_shares(occupancy_areas, ["Usable", "Green", "Other"]),
+        carbon_shares=_shares(material_carbon, [material.value for material in MATERIAL_TYPES]),
+    )
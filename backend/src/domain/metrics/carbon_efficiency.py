@@ -1,21 +1,25 @@
-from domain.loader import load_metrics
-from domain.model.metric import MetricResult
+from domain.loader import METRIC_DEFINITIONS
+from domain.metrics.area_kernel import AreaMetrics
+from domain.model.metric import ChartData, MetricResult
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 
-def get_carbon_efficiency_metric() -> MetricResult:
+def get_carbon_efficiency_metric(area_metrics: AreaMetrics) -> MetricResult:
     """
     Calculate the carbon efficiency metric.
+    Values come from the fused area kernel (calculate_area_metrics).
     """
     metric = "carbon_efficiency"
+    values = area_metrics.carbon_efficiency
     
     return MetricResult(
         name=METRICS[metric]["name"],
         benchmark=METRICS[metric]["benchmark"],
-        total_value=None,
-        value_per_level={},
-        value_per_cluster={},
+        total_value=values.total_value,
+        value_per_level=values.value_per_level,
+        value_per_cluster=values.value_per_cluster,
+        chart_data=ChartData(label=METRICS[metric]["label"], values=area_metrics.carbon_shares),
         action=METRICS[metric]["action"],
         formula=METRICS[metric]["formula"],
-        chart_data=None)
+        )
@@ -1,23 +1,25 @@
-from domain.loader import load_metrics
+from domain.loader import METRIC_DEFINITIONS
+from domain.metrics.area_kernel import AreaMetrics
 from domain.model.metric import MetricResult
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 
-def get_circulation_efficiency_metric() -> MetricResult:
+def get_circulation_efficiency_metric(area_metrics: AreaMetrics) -> MetricResult:
     """
     Calculate the circulation efficiency metric.
+    Values come from the fused area kernel (calculate_area_metrics).
     """
     metric = "circulation_efficiency"
+    values = area_metrics.circulation_efficiency
     
     return MetricResult(
         name=METRICS[metric]["name"],
         benchmark=METRICS[metric]["benchmark"],
-        total_value=None,
-        value_per_level={},
-        value_per_cluster={},
+        total_value=values.total_value,
+        value_per_level=values.value_per_level,
+        value_per_cluster=values.value_per_cluster,
         chart_data=None,
         action=METRICS[metric]["action"],
-        formula=METRICS[metric]["formula"]
+        formula=METRICS[metric]["formula"],
         )
-    
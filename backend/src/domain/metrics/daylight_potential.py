@@ -1,10 +1,12 @@
-from domain.loader import load_metrics
+from domain.loader import METRIC_DEFINITIONS
+from domain.metrics.aggregation import Aggregate
+from domain.model.columnar import MATERIAL_CODES, ColumnarModel
 from domain.model.enum import MaterialType
 from domain.model.metric import MetricResult
 from domain.model.elements import Facade, Unit
 
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 def calculate_daylight_potential(facades: list[Facade], units: list[Unit]) -> float:
     """
@@ -19,36 +21,65 @@ def calculate_daylight_potential(facades: list[Facade], units: list[Unit]) -> fl
     
     return windows_area / program_area
 
+def aggregate_window_area(columnar: ColumnarModel) -> Aggregate:
+    """
+    Area of the glass facades.
+    """
+    facades = columnar.facades
+    return Aggregate(columnar, facades, facades.area, facades.material == MATERIAL_CODES[MaterialType.GLASS.value])
+
+
+def aggregate_unit_area(columnar: ColumnarModel) -> Aggregate:
+    """
+    Area of all units (net floor area), also the base of the area-based metrics in area_kernel.py.
+    """
+    return Aggregate(columnar, columnar.units, columnar.units.area)
+
+
+def aggregate_daylight_potential(columnar: ColumnarModel) -> tuple[Aggregate, Aggregate]:
+    """
+    Glass facade area and unit (program) area, the numerator and denominator of daylight potential.
+    """
+    return aggregate_window_area(columnar), aggregate_unit_area(columnar)
+
+
 def calculate_daylight_potential_per_level(facades: list[Facade], units: list[Unit], levels: list[int]) -> dict[int, float]:
-    value_per_level = {}
-    for level in levels:
-        level_units = list(filter(lambda unit: unit.level == level, units))
-        level_facades = list(filter(lambda facade: facade.level == level, facades))
-        if not level_units:  # Skip levels with no units
-            continue
-        value_per_level[level] = calculate_daylight_potential(level_facades, level_units)
-    return value_per_level
+    # Levels with no units are skipped
+    windows, program = aggregate_daylight_potential(ColumnarModel.from_elements(units, facades, []))
+    return windows.ratio_per_level(program, levels)
 
 
 def calculate_daylight_potential_per_cluster(facades: list[Facade], units: list[Unit], clusters: list[str]) -> dict[str, float]:
-    value_per_cluster = {}
-    for cluster in clusters:
-        cluster_units = list(filter(lambda unit: unit.cluster_id == cluster, units))
-        cluster_facades = list(filter(lambda facade: facade.cluster_id == cluster, facades))
-        if not cluster_units:  # Skip clusters with no units
-            continue
-        value_per_cluster[cluster] = calculate_daylight_potential(cluster_facades, cluster_units)
-    return value_per_cluster
+    # Clusters with no units are skipped
+    windows, program = aggregate_daylight_potential(ColumnarModel.from_elements(units, facades, []))
+    return windows.ratio_per_cluster(program, clusters)
 
 
 def get_daylight_potential_metric(facades: list[Facade], units: list[Unit], levels: list[int], clusters: list[str]) -> MetricResult:
     """
     Calculate the overall daylight potential metric for a list of facades and units.
     """
-    value_per_level = calculate_daylight_potential_per_level(facades, units, levels)
-    value_per_cluster = calculate_daylight_potential_per_cluster(facades, units, clusters)
-    total_value = calculate_daylight_potential(facades, units)
-    
+    return get_daylight_potential_metric_columnar(ColumnarModel.from_elements(units, facades, []), levels, clusters)
+
+
+def get_daylight_potential_metric_columnar(columnar: ColumnarModel, levels: list[int], clusters: list[str]) -> MetricResult:
+    """
+    Calculate the daylight potential metric from a ColumnarModel.
+    """
+    windows, program = aggregate_daylight_potential(columnar)
+    return get_daylight_potential_metric_from_aggregates(windows, program, levels, clusters)
+
+
+def get_daylight_potential_metric_from_aggregates(
+    windows: Aggregate, program: Aggregate, levels: list[int], clusters: list[str]
+) -> MetricResult:
+    """
+    Daylight potential metric from the glass facade area and unit area aggregates:
+    total, per-level and per-cluster values are ratios of their sums.
+    """
+    value_per_level = windows.ratio_per_level(program, levels)
+    value_per_cluster = windows.ratio_per_cluster(program, clusters)
+    total_value = windows.ratio(program)
     
     metric = "daylight_potential"
     
@@ -61,4 +92,4 @@ def get_daylight_potential_metric(facades: list[Facade], units: list[Unit], leve
         chart_data=None,
         action=METRICS[metric]["action"],
         formula=METRICS[metric]["formula"]
-        ) 
\ No newline at end of file
+        )
@@ -1,7 +1,7 @@
-from domain.loader import load_metrics
+from domain.loader import METRIC_DEFINITIONS
 from domain.model.metric import MetricResult
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 
 def get_envelope_efficiency_metric() -> MetricResult:
@@ -1,19 +1,51 @@
-from domain.loader import load_metrics, load_rulebook
+import numpy as np
+
+from domain.loader import METRIC_DEFINITIONS, RULEBOOK
+from domain.metrics.aggregation import Aggregate
+from domain.model.columnar import PROGRAM_CODES, ColumnarModel
 from domain.model.enum import ProgramType
 from domain.model.metric import ChartData, MetricResult
 from domain.model.elements import OpenSpace, Unit
 
-RULEBOOK = load_rulebook()
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
+
+# Vertical distance at which the score reaches 0, also assumed when there is no green space
+TARGET_DISTANCE = 300.0
+
+def get_green_levels(green_spaces: list[OpenSpace]) -> np.ndarray:
+    """
+    Sorted distinct levels of the green spaces.
+    """
+    return np.unique(np.fromiter((green_space.level for green_space in green_spaces), np.int64, len(green_spaces)))
+
+
+def get_distances_to_nearest_green(unit_levels: np.ndarray, green_levels: np.ndarray) -> np.ndarray:
+    """
+    Vertical distance from each unit level to the nearest green level.
+    Binary search in the sorted green levels: O(U log G) instead of O(U × G).
+    """
+    if len(green_levels) == 0:
+        return np.full(len(unit_levels), TARGET_DISTANCE)
+    
+    position = np.searchsorted(green_levels, unit_levels)
+    below = green_levels[np.maximum(position - 1, 0)]
+    above = green_levels[np.minimum(position, len(green_levels) - 1)]
+    return np.minimum(np.abs(unit_levels - below), np.abs(unit_levels - above))
+
 
 def get_distance_to_nearest_green(res_unit: Unit, green_spaces: list[OpenSpace]) -> float:
     """
     Calculate the vertical distance to the nearest green space.
     """
-    if not green_spaces:
-        return 300.0
-    
-    return min(abs(res_unit.level - green_space.level) for green_space in green_spaces)
+    distances = get_distances_to_nearest_green(np.array([res_unit.level]), get_green_levels(green_spaces))
+    return distances[0].item()
+
+
+def calculate_green_space_scores(unit_levels: np.ndarray, green_levels: np.ndarray) -> np.ndarray:
+    """
+    Green space index score of each unit level.
+    """
+    return np.maximum(0, 1 - get_distances_to_nearest_green(unit_levels, green_levels) / TARGET_DISTANCE)
 
 
 def calculate_green_space_index(res_unit: Unit, green_spaces: list[OpenSpace]) -> float:
@@ -21,42 +53,37 @@ def calculate_green_space_index(res_unit: Unit, green_spaces: list[OpenSpace]) -
     Calculate green space index score for a single unit.
     """
     distance_to_green = get_distance_to_nearest_green(res_unit, green_spaces)
-    return max(0, 1 - distance_to_green / 300)
+    return max(0, 1 - distance_to_green / TARGET_DISTANCE)
+
+
+def _aggregate_unit_scores(res_units: list[Unit], green_spaces: list[OpenSpace]) -> Aggregate:
+    """
+    Green space index score of every given unit, whatever its program.
+    """
+    columnar = ColumnarModel.from_elements(res_units, [], green_spaces)
+    scores = calculate_green_space_scores(columnar.units.level, np.unique(columnar.open_spaces.level))
+    return Aggregate(columnar, columnar.units, scores)
 
 
 def calculate_green_space_index_avg(res_units: list[Unit], green_spaces: list[OpenSpace]) -> float:
     """
-    Calculate green space index score for a single unit.
+    Calculate the average green space index of the given units.
     """
-    return sum(calculate_green_space_index(unit, green_spaces) for unit in res_units) / len(res_units)
+    return _aggregate_unit_scores(res_units, green_spaces).total / len(res_units)
 
 
 def calculate_green_space_index_per_level(res_units: list[Unit], green_spaces: list[OpenSpace], levels: list[int]) -> dict[int, float]:
     """
     Calculate average green space index per level.
     """
-    value_per_level = {}
-    for level in levels:
-        level_res_units = [unit for unit in res_units if unit.level == level]
-        if not level_res_units:
-            continue
-        avg_score = calculate_green_space_index_avg(level_res_units, green_spaces)
-        value_per_level[level] = avg_score
-    return value_per_level
+    return _aggregate_unit_scores(res_units, green_spaces).mean_per_level(levels)
 
 
 def calculate_green_space_index_per_cluster(res_units: list[Unit], green_spaces: list[OpenSpace], clusters: list[str]) -> dict[str, float]:
     """
     Calculate average green space index per cluster.
     """
-    value_per_cluster = {}
-    for cluster in clusters:
-        cluster_res_units = [unit for unit in res_units if unit.cluster_id == cluster]
-        if not cluster_res_units:
-            continue
-        avg_score = calculate_green_space_index_avg(cluster_res_units, green_spaces)
-        value_per_cluster[cluster] = avg_score
-    return value_per_cluster
+    return _aggregate_unit_scores(res_units, green_spaces).mean_per_cluster(clusters)
 
 
 def calculate_distance_range_percentages(value_per_level: dict[int, float], ranges_count: int = 6) -> dict[str, float]:
@@ -93,11 +120,37 @@ def get_green_space_index_metric(units: list[Unit], green_spaces: list[OpenSpace
     """
     Calculate the overall green space index metric for a list of units.
     """
-    residential_units = [unit for unit in units if unit.name in [ProgramType.LIVING]]
-    
-    total_value = calculate_green_space_index_avg(residential_units, green_spaces)
-    value_per_level = calculate_green_space_index_per_level(residential_units, green_spaces, levels)
-    value_per_cluster = calculate_green_space_index_per_cluster(residential_units, green_spaces, clusters)
+    columnar = ColumnarModel.from_elements(units, [], green_spaces)
+    return get_green_space_index_metric_columnar(columnar, levels, clusters)
+
+
+def get_green_space_index_metric_columnar(columnar: ColumnarModel, levels: list[int], clusters: list[str]) -> MetricResult:
+    """
+    Calculate the green space index metric from a ColumnarModel.
+    """
+    return get_green_space_index_metric_from_scores(aggregate_green_space_scores(columnar), levels, clusters)
+
+
+def aggregate_green_space_scores(columnar: ColumnarModel) -> Aggregate:
+    """
+    Green space index score of every residential unit, scored once against the sorted green levels.
+    """
+    units = columnar.units
+    residential = units.program == PROGRAM_CODES[ProgramType.LIVING.value]
+    unit_scores = np.zeros(len(units))
+    unit_scores[residential] = calculate_green_space_scores(units.level[residential], np.unique(columnar.open_spaces.level))
+    return Aggregate(columnar, units, unit_scores, residential)
+
+
+def get_green_space_index_metric_from_scores(scores: Aggregate, levels: list[int], clusters: list[str]) -> MetricResult:
+    """
+    Green space index metric from the aggregated unit scores; the total,
+    per-level and per-cluster values are their averages. A model without
+    residential units scores 0.0 with empty breakdowns.
+    """
+    total_value = scores.total / scores.count if scores.count else 0.0
+    value_per_level = scores.mean_per_level(levels)
+    value_per_cluster = scores.mean_per_cluster(clusters)
     distance_range_percentages = calculate_distance_range_percentages(value_per_level)
     
     metric = "green_space_index"
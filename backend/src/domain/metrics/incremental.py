@@ -0,0 +1,243 @@
+"""
+Incremental daylight potential and green space index.
+
+Keeps the per-level and per-cluster sums behind both metrics for the last
+computed model. A new version is diffed against it by Speckle object id; since
+ids are content hashes, a modified element shows up as one removal and one
+addition. Only the changed elements touch the sums. Green space scores depend
+only on a unit's level, so they are cached per level and recomputed only when
+the set of green levels changes.
+
+Results match get_daylight_potential_metric / get_green_space_index_metric on
+the same model up to floating point rounding.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, NamedTuple, Optional, Union
+
+from domain.loader import METRIC_DEFINITIONS
+from domain.metrics.green_space_index import calculate_distance_range_percentages
+from domain.model.elements import ModelElement
+from domain.model.enum import MaterialType, ProgramType
+from domain.model.metric import ChartData, MetricResult
+
+METRICS = METRIC_DEFINITIONS
+
+# Collections of a Model that the incremental metrics depend on
+COLLECTIONS = ("units", "open_spaces", "facades")
+
+# Vertical distance assumed when a model has no green space
+NO_GREEN_DISTANCE = 300.0
+
+
+class _ElementRecord(NamedTuple):
+    """What the sums need from an element; the element itself (and its geometry) is not kept."""
+    level: int
+    cluster: str
+    area: float
+    kind: Union[ProgramType, MaterialType, None]  # program of a unit, material of a facade
+
+
+def _record(collection: str, element: ModelElement) -> _ElementRecord:
+    if collection == "units":
+        kind = element.name
+    elif collection == "facades":
+        kind = element.material
+    else:
+        kind = None
+    return _ElementRecord(element.level, element.cluster_id, getattr(element, "area", 0.0), kind)
+
+
+def _cents(area: float) -> int:
+    """Areas are summed as integer hundredths so that removals cancel additions exactly."""
+    return round(area * 100)
+
+
+class IncrementalMetrics:
+    """Running sums for daylight potential and green space index of one model."""
+
+    def __init__(self):
+        # (collection, element_id) -> number of identical elements / their record
+        self._counts: Counter = Counter()
+        self._records: dict[tuple[str, str], _ElementRecord] = {}
+
+        self._unit_count_by_level: Counter = Counter()
+        self._unit_count_by_cluster: Counter = Counter()
+        self._unit_area_by_level: Counter = Counter()
+        self._unit_area_by_cluster: Counter = Counter()
+        self._unit_area_total = 0
+        self._glass_area_by_level: Counter = Counter()
+        self._glass_area_by_cluster: Counter = Counter()
+        self._glass_area_total = 0
+
+        self._residential_by_level: Counter = Counter()
+        self._residential_by_cluster: dict[str, Counter] = {}
+        self._residential_total = 0
+        self._green_levels: Counter = Counter()
+        # Sorted green levels, rebuilt in update() only when open spaces changed
+        self._green_key: tuple = ()
+        self._green_scores: dict[int, float] = {}
+
+        self.last_diff = (0, 0)
+
+    @staticmethod
+    def _keys(model) -> Optional[Counter]:
+        """Count elements by (collection, element_id); None if any element has no id."""
+        keys = Counter()
+        for collection in COLLECTIONS:
+            for element in getattr(model, collection):
+                if element.element_id is None:
+                    return None
+                keys[(collection, element.element_id)] += 1
+        return keys
+
+    @classmethod
+    def from_model(cls, model) -> Optional["IncrementalMetrics"]:
+        """Build the sums for a model, or None if its elements cannot be diffed."""
+        state = cls()
+        return state if state.update(model) else None
+
+    def update(self, model) -> bool:
+        """
+        Bring the sums up to date with `model` by applying only the elements that changed.
+
+        Returns:
+            False (and leaves the state unchanged) if the model has elements without ids
+        """
+        keys = self._keys(model)
+        if keys is None:
+            return False
+
+        removed = self._counts - keys
+        added = keys - self._counts
+        added_records = {}
+        if added:
+            for collection in COLLECTIONS:
+                for element in getattr(model, collection):
+                    key = (collection, element.element_id)
+                    if key in added and key not in added_records:
+                        added_records[key] = _record(collection, element)
+
+        for key, count in removed.items():
+            self._apply(key[0], self._records[key], -count)
+            self._counts[key] -= count
+            if self._counts[key] <= 0:
+                del self._counts[key]
+                del self._records[key]
+        for key, count in added.items():
+            record = added_records[key]
+            self._apply(key[0], record, count)
+            self._counts[key] += count
+            self._records[key] = record
+
+        if any(key[0] == "open_spaces" for key in (*removed, *added)):
+            green_key = tuple(sorted(self._green_levels))
+            if green_key != self._green_key:
+                self._green_key = green_key
+                self._green_scores = {}
+
+        self.last_diff = (sum(added.values()), sum(removed.values()))
+        return True
+
+    def _apply(self, collection: str, record: _ElementRecord, sign: int) -> None:
+        level, cluster = record.level, record.cluster
+        if collection == "units":
+            area = _cents(record.area) * sign
+            self._unit_count_by_level[level] += sign
+            self._unit_count_by_cluster[cluster] += sign
+            self._unit_area_by_level[level] += area
+            self._unit_area_by_cluster[cluster] += area
+            self._unit_area_total += area
+            if record.kind == ProgramType.LIVING:
+                self._residential_by_level[level] += sign
+                self._residential_by_cluster.setdefault(cluster, Counter())[level] += sign
+                self._residential_total += sign
+        elif collection == "facades":
+            if record.kind == MaterialType.GLASS:
+                area = _cents(record.area) * sign
+                self._glass_area_by_level[level] += area
+                self._glass_area_by_cluster[cluster] += area
+                self._glass_area_total += area
+        elif collection == "open_spaces":
+            self._green_levels[level] += sign
+            if self._green_levels[level] <= 0:
+                del self._green_levels[level]
+
+    # Daylight potential
+
+    @staticmethod
+    def _daylight_ratio(window_area: int, program_area: int) -> float:
+        if program_area == 0:
+            return 0.0
+        return window_area / program_area
+
+    def daylight_potential_metric(self, levels: Iterable[int], clusters: Iterable[str]) -> MetricResult:
+        value_per_level = {
+            level: self._daylight_ratio(self._glass_area_by_level[level], self._unit_area_by_level[level])
+            for level in levels
+            if self._unit_count_by_level[level] > 0
+        }
+        value_per_cluster = {
+            cluster: self._daylight_ratio(self._glass_area_by_cluster[cluster], self._unit_area_by_cluster[cluster])
+            for cluster in clusters
+            if self._unit_count_by_cluster[cluster] > 0
+        }
+        total_value = self._daylight_ratio(self._glass_area_total, self._unit_area_total)
+        return _metric_result("daylight_potential", total_value, value_per_level, value_per_cluster, None)
+
+    # Green space index
+
+    def _green_score(self, level: int) -> float:
+        key = self._green_key
+        score = self._green_scores.get(level)
+        if score is None:
+            if not key:
+                distance = NO_GREEN_DISTANCE
+            else:
+                i = bisect_left(key, level)
+                distance = min(abs(level - key[j]) for j in (i - 1, i) if 0 <= j < len(key))
+            score = max(0, 1 - distance / 300)
+            self._green_scores[level] = score
+        return score
+
+    def green_space_index_metric(self, levels: Iterable[int], clusters: Iterable[str]) -> MetricResult:
+        """Scores 0.0 with empty breakdowns when there are no residential units, like the full calculation."""
+        total_value = 0.0
+        if self._residential_total > 0:
+            total_value = sum(
+                count * self._green_score(level) for level, count in self._residential_by_level.items() if count > 0
+            ) / self._residential_total
+        value_per_level = {
+            level: self._green_score(level)
+            for level in levels
+            if self._residential_by_level[level] > 0
+        }
+        value_per_cluster = {}
+        for cluster in clusters:
+            counts = self._residential_by_cluster.get(cluster)
+            count = sum(counts.values()) if counts else 0
+            if count <= 0:
+                continue
+            value_per_cluster[cluster] = sum(
+                n * self._green_score(level) for level, n in counts.items() if n > 0
+            ) / count
+
+        chart = ChartData(
+            label=METRICS["green_space_index"]["label"],
+            values=calculate_distance_range_percentages(value_per_level),
+        )
+        return _metric_result("green_space_index", total_value, value_per_level, value_per_cluster, chart)
+
+
+def _metric_result(metric: str, total_value, value_per_level, value_per_cluster, chart_data) -> MetricResult:
+    return MetricResult(
+        name=METRICS[metric]["name"],
+        benchmark=METRICS[metric]["benchmark"],
+        total_value=total_value,
+        value_per_level=value_per_level,
+        value_per_cluster=value_per_cluster,
+        chart_data=chart_data,
+        action=METRICS[metric]["action"],
+        formula=METRICS[metric]["formula"],
+    )
@@ -1,12 +1,13 @@
-from domain.loader import load_metrics
+from domain.loader import METRIC_DEFINITIONS
 from domain.model.metric import MetricResult
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 
 def get_net_floor_area_ratio_metric() -> MetricResult:
     """
     Calculate the net-floor-area ratio metric.
+    The model carries no gross floor area yet, so no values are computed.
     """
     metric = "net_floor_area_ratio"
     
@@ -1,21 +1,25 @@
-from domain.loader import load_metrics
-from domain.model.metric import MetricResult
+from domain.loader import METRIC_DEFINITIONS
+from domain.metrics.area_kernel import AreaMetrics
+from domain.model.metric import ChartData, MetricResult
 
-METRICS = load_metrics()
+METRICS = METRIC_DEFINITIONS
 
 
-def get_program_diversity_index_metric() -> MetricResult:
+def get_program_diversity_index_metric(area_metrics: AreaMetrics) -> MetricResult:
     """
-    Calculate the program diversity index metric.
+    Calculate the program diversity index metric (Simpson diversity of unit programs).
+    Values come from the fused area kernel (calculate_area_metrics).
     """
     metric = "program_diversity_index"
+    values = area_metrics.program_diversity_index
     
     return MetricResult(
         name=METRICS[metric]["name"],
         benchmark=METRICS[metric]["benchmark"],
-        total_value=None,
-        value_per_level={},
-        value_per_cluster={},
+        total_value=values.total_value,
+        value_per_level=values.value_per_level,
+        value_per_cluster=values.value_per_cluster,
+        chart_data=ChartData(label=METRICS[metric]["label"], values=area_metrics.program_shares),
         action=METRICS[metric]["action"],
         formula=METRICS[metric]["formula"],
-        chart_data=None)
+        )
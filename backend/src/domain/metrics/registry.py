@@ -0,0 +1,182 @@
+"""
+Registry of metrics and the intermediates they share.
+
+Each metric declares the intermediates it reads, such as the unit area
+aggregate or the columnar model. evaluate_metrics computes every intermediate
+at most once per model, memoized in a MetricContext, and runs only the
+requested metrics. A new metric reuses the existing intermediates instead of
+adding another pass over the model.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from domain.metrics.area_kernel import calculate_area_metrics, get_rulebook_tables
+from domain.metrics.carbon_efficiency import get_carbon_efficiency_metric
+from domain.metrics.circulation_efficiency import get_circulation_efficiency_metric
+from domain.metrics.daylight_potential import (
+    aggregate_unit_area,
+    aggregate_window_area,
+    get_daylight_potential_metric_from_aggregates,
+)
+from domain.metrics.envelope_efficiency import get_envelope_efficiency_metric
+from domain.metrics.green_space_index import aggregate_green_space_scores, get_green_space_index_metric_from_scores
+from domain.metrics.net_floor_area_ratio import get_net_floor_area_ratio_metric
+from domain.metrics.occupancy_efficiency import get_occupancy_efficiency_metric
+from domain.metrics.program_diversity_index import get_program_diversity_index_metric
+from domain.model.metric import MetricResult
+
+
+class MetricContext:
+    """One model plus the intermediates computed for it so far."""
+
+    def __init__(self, model):
+        self.model = model
+        self.levels = model.levels
+        self.clusters = model.clusters
+        self._values: dict[str, Any] = {}
+        self._computing: set[str] = set()
+        self.computed: list[str] = []
+
+    def __getitem__(self, name: str) -> Any:
+        """Value of an intermediate, computed on first access."""
+        if name in self._values:
+            return self._values[name]
+        if name in self._computing:
+            raise RuntimeError(f"Intermediate {name!r} depends on itself")
+        compute = INTERMEDIATES[name]
+        self._computing.add(name)
+        try:
+            value = compute(self)
+        finally:
+            self._computing.discard(name)
+        self._values[name] = value
+        self.computed.append(name)
+        return value
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    name: str
+    requires: tuple[str, ...]
+    calculate: Callable[[MetricContext], MetricResult]
+
+
+# Intermediate name -> function of the context (may read other intermediates)
+INTERMEDIATES: dict[str, Callable[[MetricContext], Any]] = {}
+
+# Metric slug -> MetricSpec, in the order metrics are reported
+METRIC_REGISTRY: dict[str, MetricSpec] = {}
+
+
+def register_intermediate(name: str, compute: Callable[[MetricContext], Any]) -> None:
+    if name in INTERMEDIATES:
+        raise ValueError(f"Intermediate {name!r} is already registered")
+    INTERMEDIATES[name] = compute
+
+
+def register_metric(name: str, calculate: Callable[[MetricContext], MetricResult], requires: Iterable[str] = ()) -> None:
+    """
+    Register a metric.
+
+    Args:
+        name: Metric slug, as in metrics.json
+        calculate: Function of the MetricContext returning the MetricResult
+        requires: Intermediates the metric reads from the context
+
+    Raises:
+        ValueError: if the metric is already registered or requires an unknown intermediate
+    """
+    requires = tuple(requires)
+    if name in METRIC_REGISTRY:
+        raise ValueError(f"Metric {name!r} is already registered")
+    unknown = [intermediate for intermediate in requires if intermediate not in INTERMEDIATES]
+    if unknown:
+        raise ValueError(f"Metric {name!r} requires unknown intermediates: {', '.join(unknown)}")
+    METRIC_REGISTRY[name] = MetricSpec(name, requires, calculate)
+
+
+def evaluate_metrics(model, names: Optional[Iterable[str]] = None, context: Optional[MetricContext] = None) -> dict[str, MetricResult]:
+    """
+    Calculate metrics of a model, computing each shared intermediate once.
+
+    Args:
+        model: Model object containing units, facades, levels, clusters
+        names: Metric slugs to calculate, in registry order; all when None
+        context: Context to reuse intermediates from (must be for the same model)
+
+    Returns:
+        Dictionary of metric slug -> MetricResult
+
+    Raises:
+        KeyError: for an unknown metric slug
+    """
+    if names is None:
+        selected = list(METRIC_REGISTRY)
+    else:
+        requested = set(names)
+        unknown = requested - METRIC_REGISTRY.keys()
+        if unknown:
+            raise KeyError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        selected = [name for name in METRIC_REGISTRY if name in requested]
+
+    context = context or MetricContext(model)
+    metrics = {}
+    for name in selected:
+        spec = METRIC_REGISTRY[name]
+        for intermediate in spec.requires:
+            context[intermediate]
+        metrics[name] = spec.calculate(context)
+    return metrics
+
+
+# Shared intermediates
+
+register_intermediate("columnar", lambda ctx: ctx.model.get_columnar())
+register_intermediate("unit_area", lambda ctx: aggregate_unit_area(ctx["columnar"]))
+register_intermediate("window_area", lambda ctx: aggregate_window_area(ctx["columnar"]))
+register_intermediate("green_space_scores", lambda ctx: aggregate_green_space_scores(ctx["columnar"]))
+register_intermediate("rulebook_tables", lambda ctx: get_rulebook_tables())
+register_intermediate(
+    "area_metrics",
+    lambda ctx: calculate_area_metrics(ctx["columnar"], ctx.levels, ctx.clusters, ctx["rulebook_tables"]),
+)
+
+
+# Metrics, in reporting order
+
+register_metric(
+    "green_space_index",
+    lambda ctx: get_green_space_index_metric_from_scores(ctx["green_space_scores"], ctx.levels, ctx.clusters),
+    requires=("green_space_scores",),
+)
+register_metric(
+    "daylight_potential",
+    lambda ctx: get_daylight_potential_metric_from_aggregates(
+        ctx["window_area"], ctx["unit_area"], ctx.levels, ctx.clusters
+    ),
+    requires=("window_area", "unit_area"),
+)
+# The five area-based metrics share one pass of the fused area kernel
+register_metric(
+    "program_diversity_index",
+    lambda ctx: get_program_diversity_index_metric(ctx["area_metrics"]),
+    requires=("area_metrics",),
+)
+register_metric(
+    "circulation_efficiency",
+    lambda ctx: get_circulation_efficiency_metric(ctx["area_metrics"]),
+    requires=("area_metrics",),
+)
+register_metric(
+    "occupancy_efficiency",
+    lambda ctx: get_occupancy_efficiency_metric(ctx["area_metrics"]),
+    requires=("area_metrics",),
+)
+register_metric("net_floor_area_ratio", lambda ctx: get_net_floor_area_ratio_metric())
+register_metric("envelope_efficiency", lambda ctx: get_envelope_efficiency_metric())
+register_metric(
+    "carbon_efficiency",
+    lambda ctx: get_carbon_efficiency_metric(ctx["area_metrics"]),
+    requires=("area_metrics",),
+)
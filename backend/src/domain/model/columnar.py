@@ -0,0 +1,162 @@
+"""
+Columnar companion of a Model.
+
+Metrics over the element lists of a Model re-filter them for every level and
+cluster. ColumnarModel holds the same elements once as contiguous NumPy arrays
+per element kind, with levels, clusters, programs and materials integer-coded,
+so metrics reduce with masks and np.bincount instead of Python loops.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from domain.model.enum import MaterialType, ProgramType
+
+PROGRAM_TYPES = tuple(ProgramType)
+MATERIAL_TYPES = tuple(MaterialType)
+PROGRAM_CODES = {program.value: code for code, program in enumerate(PROGRAM_TYPES)}
+MATERIAL_CODES = {material.value: code for code, material in enumerate(MATERIAL_TYPES)}
+
+# Code of a missing or unrecognized program/material
+UNKNOWN = -1
+
+
+def _code(value, codes: dict[str, int]) -> int:
+    return codes.get(getattr(value, "value", value), UNKNOWN)
+
+
+@dataclass(frozen=True, eq=False)
+class ElementColumns:
+    """Arrays of one element kind, aligned by element index."""
+    level: np.ndarray       # level value (int64)
+    level_code: np.ndarray  # index into ColumnarModel.level_values
+    cluster: np.ndarray     # index into ColumnarModel.clusters
+    area: np.ndarray        # float64
+    program: np.ndarray     # index into PROGRAM_TYPES (units), UNKNOWN otherwise
+    material: np.ndarray    # index into MATERIAL_TYPES (facades), UNKNOWN otherwise
+    thickness: np.ndarray   # float64 (facades), 0 otherwise
+
+    def __len__(self) -> int:
+        return len(self.area)
+
+
+class ColumnarModel:
+    """Units, facades and open spaces of a Model as ElementColumns, sharing level and cluster codes."""
+
+    def __init__(
+        self,
+        units: ElementColumns,
+        facades: ElementColumns,
+        open_spaces: ElementColumns,
+        level_values: np.ndarray,
+        clusters: list[str],
+    ):
+        self.units = units
+        self.facades = facades
+        self.open_spaces = open_spaces
+        self.level_values = level_values
+        self.clusters = clusters
+        self._cluster_codes = {cluster: code for code, cluster in enumerate(clusters)}
+
+    @classmethod
+    def from_elements(cls, units: Sequence, facades: Sequence, open_spaces: Sequence) -> "ColumnarModel":
+        """Encode the element lists of a Model in one pass over each."""
+        kinds = (units, facades, open_spaces)
+        level_arrays = [np.fromiter((element.level for element in elements), np.int64, len(elements)) for elements in kinds]
+        level_values = np.unique(np.concatenate(level_arrays))
+
+        cluster_codes: dict[str, int] = {}
+        columns = []
+        for elements, levels in zip(kinds, level_arrays):
+            count = len(elements)
+            cluster = np.fromiter(
+                (cluster_codes.setdefault(element.cluster_id, len(cluster_codes)) for element in elements),
+                np.int64,
+                count,
+            )
+            columns.append(ElementColumns(
+                level=levels,
+                level_code=np.searchsorted(level_values, levels),
+                cluster=cluster,
+                area=np.fromiter((element.area for element in elements), np.float64, count),
+                program=np.fromiter(
+                    (_code(getattr(element, "name", None), PROGRAM_CODES) for element in elements), np.int8, count
+                ),
+                material=np.fromiter(
+                    (_code(getattr(element, "material", None), MATERIAL_CODES) for element in elements), np.int8, count
+                ),
+                thickness=np.fromiter(
+                    (getattr(element, "thickness", 0) or 0 for element in elements), np.float64, count
+                ),
+            ))
+        return cls(*columns, level_values=level_values, clusters=list(cluster_codes))
+
+    @classmethod
+    def from_model(cls, model) -> "ColumnarModel":
+        return cls.from_elements(model.units, model.facades, model.open_spaces)
+
+    def level_index(self, level: int) -> Optional[int]:
+        """Position of a level value in level_values, or None if no element is on it."""
+        position = int(np.searchsorted(self.level_values, level))
+        if position < len(self.level_values) and self.level_values[position] == level:
+            return position
+        return None
+
+    def cluster_index(self, cluster: str) -> Optional[int]:
+        return self._cluster_codes.get(cluster)
+
+    def sum_by_level(
+        self, columns: ElementColumns, weights: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Sum weights (or count elements when omitted) per level code.
+
+        Args:
+            columns: Element kind to reduce
+            weights: Per-element values to sum; counts when None
+            mask: Boolean selection of elements to include
+
+        Returns:
+            Array of length len(level_values)
+        """
+        return _bincount(columns.level_code, weights, mask, len(self.level_values))
+
+    def sum_by_cluster(
+        self, columns: ElementColumns, weights: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Same as sum_by_level, per cluster code (length len(clusters))."""
+        return _bincount(columns.cluster, weights, mask, len(self.clusters))
+
+    def values_per_level(self, levels: Iterable[int], values: np.ndarray, present: np.ndarray) -> dict[int, float]:
+        """Map the given levels to values[level code], skipping levels where `present` is False."""
+        result = {}
+        for level in levels:
+            position = self.level_index(level)
+            if position is not None and present[position]:
+                result[level] = float(values[position])
+        return result
+
+    def values_per_cluster(self, clusters: Iterable[str], values: np.ndarray, present: np.ndarray) -> dict[str, float]:
+        """Map the given clusters to values[cluster code], skipping clusters where `present` is False."""
+        result = {}
+        for cluster in clusters:
+            position = self._cluster_codes.get(cluster)
+            if position is not None and present[position]:
+                result[cluster] = float(values[position])
+        return result
+
+
+def _bincount(codes: np.ndarray, weights: Optional[np.ndarray], mask: Optional[np.ndarray], size: int) -> np.ndarray:
+    if mask is not None:
+        codes = codes[mask]
+        weights = weights[mask] if weights is not None else None
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise numerator / denominator, 0.0 where the denominator is 0."""
+    result = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
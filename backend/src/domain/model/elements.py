@@ -1,14 +1,44 @@
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+import numpy as np
 
 from domain.model.enum import MaterialType, ProgramType, SectionType
 
+Point = tuple[float, float, float]
+
+@dataclass(frozen=True)
+class GeometrySummary:
+    """Centroid (mean vertex) and axis-aligned bounding box of an element's geometry."""
+    centroid: Point
+    bbox_min: Point
+    bbox_max: Point
+
+    @classmethod
+    def from_vertices(cls, vertex_lists: Iterable[list[float]]) -> Optional["GeometrySummary"]:
+        """Summarize flat [x, y, z, x, y, z, ...] vertex lists; None if there are no vertices."""
+        points = [
+            array[:len(array) - len(array) % 3].reshape(-1, 3)
+            for array in (np.asarray(vertices, dtype=np.float64).ravel() for vertices in vertex_lists)
+        ]
+        points = np.concatenate(points) if points else np.empty((0, 3))
+        if len(points) == 0:
+            return None
+        return cls(
+            centroid=tuple(points.mean(axis=0).tolist()),
+            bbox_min=tuple(points.min(axis=0).tolist()),
+            bbox_max=tuple(points.max(axis=0).tolist()),
+        )
+
+
 @dataclass
 class ModelElement:
     cluster_id: str
     speckle_type: str
     geometry: Any
     level: int
+    # Speckle object id (a content hash): changes whenever the element changes
+    element_id: Optional[str] = field(default=None, kw_only=True)
     
 @dataclass
 class OpenSpace(ModelElement):
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
+from domain.model.columnar import ColumnarModel
 from domain.model.elements import Column, Core, Facade, OpenSpace, Slabs, Unit
 
 @dataclass
@@ -12,4 +13,12 @@ class Model:
     units: list[Unit]
     open_spaces: list[OpenSpace]
     levels: list[int]
-    clusters: list[str]
\ No newline at end of file
+    clusters: list[str]
+    # Columnar copy of the element lists; built by ModelBuilder or on first use
+    columnar: Optional[ColumnarModel] = field(default=None, repr=False, compare=False)
+
+    def get_columnar(self) -> ColumnarModel:
+        """Columnar copy of the elements. The element lists must not change once it is built."""
+        if self.columnar is None:
+            self.columnar = ColumnarModel.from_model(self)
+        return self.columnar
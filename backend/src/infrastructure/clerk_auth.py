@@ -4,20 +4,48 @@ Clerk JWT validation middleware for FastAPI
 Validates JWT tokens issued by Clerk
 """
 
+import asyncio
 import os
+import hashlib
 import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 from fastapi import HTTPException, Depends, Request
 from jose import jwt, JWTError, jwk
 import requests
 
-# Cache for Clerk's public key (valid for 24 hours)
+from infrastructure.shared_state import get_shared_state
+
+# Cache for Clerk's public keys (fresh for CLERK_JWKS_TTL_SECONDS, then served stale while revalidating)
 _clerk_jwks_cache = None
 _clerk_jwks_cache_time = None
-_auth_failures_by_ip: dict[str, list[float]] = {}
+_clerk_keys_by_kid: dict = {}
+_clerk_keys_source = None
+_jwks_refresh_task: Optional["asyncio.Task"] = None
+_jwks_background_task: Optional["asyncio.Task"] = None
+# Stale-while-revalidate task (kept referenced so it is not garbage-collected) and its last failure
+_jwks_revalidate_task: Optional["asyncio.Task"] = None
+_jwks_last_failed_revalidation = float("-inf")
+_jwks_last_forced_refresh = float("-inf")
 logger = logging.getLogger(__name__)
 
+# Verified-token cache: sha256(issuer, audience, token) -> (expires_at, payload)
+_verified_tokens: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+_token_cache_stats = {
+    "hits": 0, "misses": 0, "shared_hits": 0, "evictions": 0, "expirations": 0, "invalidations": 0,
+}
+
+# Auth failures per client IP, least recently failing first
+_auth_failures_by_ip: "OrderedDict[str, _FailureWindow]" = OrderedDict()
+_auth_failures_lock = threading.Lock()
+_auth_failure_stats = {"evictions": 0, "expirations": 0}
+
+# Expired IPs swept from the front of _auth_failures_by_ip per recorded failure
+AUTH_FAILURE_SWEEP_BATCH = 8
+
 
 
 
@@ -37,6 +65,150 @@ def _get_auth_rate_limit_max_attempts() -> int:
         return 20
 
 
+def _get_auth_failure_max_tracked_ips() -> int:
+    value = os.getenv("AUTH_FAILURE_MAX_TRACKED_IPS", "10000")
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 10000
+
+
+def _get_auth_failure_buckets() -> int:
+    value = os.getenv("AUTH_FAILURE_BUCKETS", "10")
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 10
+
+
+def _get_token_cache_max_entries() -> int:
+    value = os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 1024
+
+
+def _get_token_cache_max_ttl_seconds() -> int:
+    value = os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 300
+
+
+def _token_cache_key(token: str, audience: str, issuer: str) -> str:
+    """Hash the raw token together with the claims it was verified against."""
+    return hashlib.sha256(f"{issuer}\0{audience}\0{token}".encode("utf-8")).hexdigest()
+
+
+async def _run_shared(func, *args):
+    """Call func, off the event loop when it may touch the shared auth state (SQLite I/O)."""
+    if get_shared_state() is None:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+def _get_local_token_payload(cache_key: str, now: float) -> Optional[dict]:
+    """Look up a token in this process's cache; None on a miss (not counted) or expiry."""
+    with _verified_tokens_lock:
+        entry = _verified_tokens.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if now >= expires_at:
+            del _verified_tokens[cache_key]
+            _token_cache_stats["expirations"] += 1
+            return None
+        _verified_tokens.move_to_end(cache_key)
+        _token_cache_stats["hits"] += 1
+        return payload
+
+
+def _get_shared_token_payload(cache_key: str, now: float) -> Optional[dict]:
+    """Fall back to the shared auth state after a local miss; the read happens outside the lock."""
+    entry = _get_shared_token_entry(cache_key, now)
+    with _verified_tokens_lock:
+        if entry is None or now >= entry[0]:
+            _token_cache_stats["misses"] += 1
+            return None
+        _verified_tokens[cache_key] = entry
+        _verified_tokens.move_to_end(cache_key)
+        _token_cache_stats["shared_hits"] += 1
+        _token_cache_stats["hits"] += 1
+        return entry[1]
+
+
+def _cache_token_payload(cache_key: str, payload: dict, now: Optional[float] = None) -> None:
+    """Cache a verified payload until its `exp` claim, capped by AUTH_TOKEN_CACHE_TTL_SECONDS."""
+    current_time = time.time() if now is None else now
+    max_entries = _get_token_cache_max_entries()
+    exp = payload.get("exp")
+    if max_entries == 0 or not isinstance(exp, (int, float)):
+        return
+    expires_at = min(float(exp), current_time + _get_token_cache_max_ttl_seconds())
+    if expires_at <= current_time:
+        return
+
+    with _verified_tokens_lock:
+        _verified_tokens[cache_key] = (expires_at, payload)
+        _verified_tokens.move_to_end(cache_key)
+        while len(_verified_tokens) > max_entries:
+            _verified_tokens.popitem(last=False)
+            _token_cache_stats["evictions"] += 1
+
+    shared = get_shared_state()
+    if shared is not None:
+        shared.set("tokens", cache_key, payload, expires_at=expires_at, now=current_time)
+
+
+def _get_shared_token_entry(cache_key: str, now: float) -> Optional[tuple[float, dict]]:
+    """
+    Look up a token verified by another worker in the shared auth state.
+
+    The entry keeps the expiry set when the token was verified, so reading it
+    from another process does not extend the AUTH_TOKEN_CACHE_TTL_SECONDS cap.
+    """
+    shared = get_shared_state()
+    if shared is None:
+        return None
+    entry = shared.get_entry("tokens", cache_key, now=now)
+    if entry is None:
+        return None
+    payload, expires_at = entry
+    if expires_at is None:
+        expires_at = min(float(payload["exp"]), now + _get_token_cache_max_ttl_seconds())
+    return expires_at, payload
+
+
+def _invalidate_token_cache() -> None:
+    """Drop all verified tokens, e.g. after a JWKS key rotation."""
+    with _verified_tokens_lock:
+        if _verified_tokens:
+            _token_cache_stats["invalidations"] += len(_verified_tokens)
+        _verified_tokens.clear()
+
+    shared = get_shared_state()
+    if shared is not None:
+        shared.delete("tokens")
+
+
+def get_token_cache_stats() -> dict:
+    """Hit/miss counters and hit rate of the verified-token cache."""
+    with _verified_tokens_lock:
+        stats = dict(_token_cache_stats)
+        stats["size"] = len(_verified_tokens)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _jwks_kids(jwks: Optional[dict]) -> frozenset:
+    if not isinstance(jwks, dict):
+        return frozenset()
+    return frozenset(key.get("kid") for key in jwks.get("keys", []) if isinstance(key, dict))
+
+
 def _is_local_auth_optional() -> bool:
     """Allow missing auth header in local development unless explicitly disabled."""
     explicit_value = os.getenv("LOCAL_AUTH_OPTIONAL")
@@ -59,33 +231,119 @@ def _get_client_ip(request: Request) -> str:
     return "unknown"
 
 
-def _prune_old_failures(ip_address: str, now: float, window_seconds: int) -> None:
-    failures = _auth_failures_by_ip.get(ip_address, [])
-    cutoff = now - window_seconds
-    active = [timestamp for timestamp in failures if timestamp >= cutoff]
-    if active:
-        _auth_failures_by_ip[ip_address] = active
-    elif ip_address in _auth_failures_by_ip:
+class _FailureWindow:
+    """
+    Sliding window of failure counts for one IP, split into a fixed number of
+    buckets so that recording and checking never depend on the failure count.
+    """
+
+    __slots__ = ("counts", "bucket_seconds", "head", "total", "last_failure")
+
+    def __init__(self, window_seconds: int, buckets: int):
+        self.counts = [0] * buckets
+        self.bucket_seconds = window_seconds / buckets
+        self.head = None
+        self.total = 0
+        self.last_failure = float("-inf")
+
+    def _advance(self, now: float) -> int:
+        bucket = int(now // self.bucket_seconds)
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            size = len(self.counts)
+            for expired in range(self.head + 1, min(bucket, self.head + size) + 1):
+                slot = expired % size
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+            self.head = bucket
+        return bucket
+
+    def record(self, now: float) -> None:
+        bucket = self._advance(now)
+        if bucket < self.head - len(self.counts) + 1:
+            return  # Older than the window
+        self.counts[bucket % len(self.counts)] += 1
+        self.total += 1
+        self.last_failure = max(self.last_failure, now)
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+def _sweep_expired_failures(now: float, window_seconds: int) -> None:
+    """Drop IPs whose last failure left the window, oldest first (callers hold the lock)."""
+    for _ in range(AUTH_FAILURE_SWEEP_BATCH):
+        if not _auth_failures_by_ip:
+            return
+        ip_address, window = next(iter(_auth_failures_by_ip.items()))
+        if now - window.last_failure < window_seconds:
+            return
         del _auth_failures_by_ip[ip_address]
+        _auth_failure_stats["expirations"] += 1
 
 
 def _record_auth_failure(ip_address: str, now: Optional[float] = None) -> None:
     current_time = time.time() if now is None else now
     window_seconds = _get_auth_rate_limit_window_seconds()
-    _prune_old_failures(ip_address, current_time, window_seconds)
-    _auth_failures_by_ip.setdefault(ip_address, []).append(current_time)
+    shared = get_shared_state()
+    if shared is not None:
+        shared.record_failure(
+            ip_address,
+            current_time,
+            window_seconds,
+            _get_auth_failure_buckets(),
+            _get_auth_failure_max_tracked_ips(),
+        )
+        return
 
+    with _auth_failures_lock:
+        window = _auth_failures_by_ip.get(ip_address)
+        if window is None:
+            window = _FailureWindow(window_seconds, _get_auth_failure_buckets())
+            _auth_failures_by_ip[ip_address] = window
+        window.record(current_time)
+        _auth_failures_by_ip.move_to_end(ip_address)
 
-def _is_auth_rate_limited(ip_address: str, now: Optional[float] = None) -> bool:
+        _sweep_expired_failures(current_time, window_seconds)
+        while len(_auth_failures_by_ip) > _get_auth_failure_max_tracked_ips():
+            _auth_failures_by_ip.popitem(last=False)
+            _auth_failure_stats["evictions"] += 1
+
+
+def _count_auth_failures(ip_address: str, now: Optional[float] = None) -> int:
+    """Failures recorded for an IP within the rate limit window."""
     current_time = time.time() if now is None else now
-    window_seconds = _get_auth_rate_limit_window_seconds()
-    max_attempts = _get_auth_rate_limit_max_attempts()
-    _prune_old_failures(ip_address, current_time, window_seconds)
-    return len(_auth_failures_by_ip.get(ip_address, [])) >= max_attempts
+    shared = get_shared_state()
+    if shared is not None:
+        return shared.count_failures(
+            ip_address, current_time, _get_auth_rate_limit_window_seconds(), _get_auth_failure_buckets()
+        )
+
+    with _auth_failures_lock:
+        window = _auth_failures_by_ip.get(ip_address)
+        if window is None:
+            return 0
+        return window.count(current_time)
+
+
+def _is_auth_rate_limited(ip_address: str, now: Optional[float] = None) -> bool:
+    return _count_auth_failures(ip_address, now) >= _get_auth_rate_limit_max_attempts()
 
 
 def _clear_auth_failures(ip_address: str) -> None:
-    _auth_failures_by_ip.pop(ip_address, None)
+    shared = get_shared_state()
+    if shared is not None:
+        shared.clear_failures(ip_address)
+    with _auth_failures_lock:
+        _auth_failures_by_ip.pop(ip_address, None)
+
+
+def get_auth_failure_stats() -> dict:
+    """Tracked IP count plus LRU evictions and sweeper expirations of the failure limiter."""
+    with _auth_failures_lock:
+        return {**_auth_failure_stats, "tracked_ips": len(_auth_failures_by_ip)}
 
 
 def _extract_email_from_payload(payload: dict) -> Optional[str]:
@@ -129,31 +387,261 @@ def _log_auth_failure(reason: str, payload: Optional[dict] = None) -> None:
 
 
 
-async def get_clerk_jwks():
-    """Fetch Clerk's JWKS (public keys) for JWT verification"""
-    import time
+def _get_float_env(name: str, default: float) -> float:
+    value = os.getenv(name, str(default))
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return default
+
+
+def _get_jwks_ttl_seconds() -> float:
+    return _get_float_env("CLERK_JWKS_TTL_SECONDS", 3600)
+
+
+def _get_jwks_refresh_interval_seconds() -> float:
+    return max(1.0, _get_float_env("CLERK_JWKS_REFRESH_SECONDS", 900))
+
+
+def _get_jwks_min_forced_refresh_seconds() -> float:
+    return _get_float_env("CLERK_JWKS_MIN_REFRESH_SECONDS", 60)
+
+
+def _fetch_clerk_jwks_sync(clerk_domain: str) -> dict:
+    """Blocking JWKS download; only ever called from a worker thread."""
+    timeout = _get_float_env("CLERK_JWKS_TIMEOUT_SECONDS", 5) or None
+    response = requests.get(f"https://{clerk_domain}/.well-known/jwks.json", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _set_clerk_jwks(jwks: dict, now: Optional[float] = None) -> None:
     global _clerk_jwks_cache, _clerk_jwks_cache_time
-    
-    # Return cached JWKS if still valid (cache for 1 hour)
-    if _clerk_jwks_cache and _clerk_jwks_cache_time:
-        if time.time() - _clerk_jwks_cache_time < 3600:
-            return _clerk_jwks_cache
-    
-    clerk_domain = os.getenv("CLERK_DOMAIN", "")
+    if _clerk_jwks_cache is not None and _jwks_kids(jwks) != _jwks_kids(_clerk_jwks_cache):
+        logger.info("Clerk JWKS keys rotated; invalidating verified-token cache")
+        _invalidate_token_cache()
+    _clerk_jwks_cache = jwks
+    _clerk_jwks_cache_time = time.time() if now is None else now
+    _get_key_table(jwks)
+
+
+def _get_key_table(jwks: dict) -> dict:
+    """Constructed public keys by kid, rebuilt only when the JWKS document changes."""
+    global _clerk_keys_by_kid, _clerk_keys_source
+    if jwks is not _clerk_keys_source:
+        keys_by_kid = {}
+        for jwk_data in jwks.get("keys", []) if isinstance(jwks, dict) else []:
+            kid = jwk_data.get("kid") if isinstance(jwk_data, dict) else None
+            if not kid:
+                continue
+            try:
+                keys_by_kid[kid] = jwk.construct(jwk_data)
+            except Exception:
+                logger.warning("Skipping unusable Clerk JWKS key | kid=%s", kid)
+        _clerk_keys_by_kid = keys_by_kid
+        _clerk_keys_source = jwks
+    return _clerk_keys_by_kid
+
+
+def _load_clerk_jwks_sync(clerk_domain: str, max_age: float, newer_than: Optional[float]) -> tuple[dict, float]:
+    """
+    Return (jwks, fetched_at), preferring a copy another worker stored in the
+    shared auth state over a network fetch.
+
+    Args:
+        clerk_domain: Clerk frontend API domain
+        max_age: Oldest shared copy, in seconds, that may be reused
+        newer_than: Only reuse a shared copy fetched after this time
+    """
+    shared = get_shared_state()
+    if shared is not None:
+        record = shared.get("jwks", clerk_domain)
+        if record is not None:
+            fetched_at = record["fetched_at"]
+            if time.time() - fetched_at < max_age and (newer_than is None or fetched_at > newer_than):
+                return record["jwks"], fetched_at
+
+    jwks = _fetch_clerk_jwks_sync(clerk_domain)
+    fetched_at = time.time()
+    if shared is not None:
+        shared.set("jwks", clerk_domain, {"jwks": jwks, "fetched_at": fetched_at})
+    return jwks, fetched_at
+
+
+async def _fetch_and_store_jwks(max_age: float) -> dict:
+    clerk_domain = os.getenv("CLERK_DOMAIN", "").strip()
     if not clerk_domain:
         raise HTTPException(status_code=500, detail="CLERK_DOMAIN environment variable not set")
-    
-    try:
-        response = requests.get(f"https://{clerk_domain}/.well-known/jwks.json")
-        response.raise_for_status()
-        _clerk_jwks_cache = response.json()
-        _clerk_jwks_cache_time = time.time()
+    jwks, fetched_at = await asyncio.to_thread(
+        _load_clerk_jwks_sync, clerk_domain, max_age, _clerk_jwks_cache_time
+    )
+    _set_clerk_jwks(jwks, now=fetched_at)
+    return jwks
+
+
+async def _refresh_clerk_jwks(max_age: Optional[float] = None) -> dict:
+    """
+    Fetch JWKS without blocking the event loop; concurrent callers share one fetch.
+
+    Args:
+        max_age: Oldest copy from another worker that may be reused (default CLERK_JWKS_TTL_SECONDS)
+    """
+    global _jwks_refresh_task
+    loop = asyncio.get_running_loop()
+    task = _jwks_refresh_task
+    if task is None or task.done() or task.get_loop() is not loop:
+        task = loop.create_task(_fetch_and_store_jwks(_get_jwks_ttl_seconds() if max_age is None else max_age))
+        _jwks_refresh_task = task
+    return await asyncio.shield(task)
+
+
+def _schedule_background_refresh() -> None:
+    """
+    Revalidate a stale JWKS in the background while the stale copy keeps serving.
+
+    After a failed revalidation the next one waits CLERK_JWKS_MIN_REFRESH_SECONDS,
+    so an outage does not turn every request into another outbound fetch.
+    """
+    global _jwks_revalidate_task
+
+    async def revalidate():
+        global _jwks_last_failed_revalidation
+        try:
+            await _refresh_clerk_jwks()
+        except Exception:
+            _jwks_last_failed_revalidation = time.time()
+            logger.warning("Background Clerk JWKS refresh failed; serving stale keys")
+
+    if time.time() - _jwks_last_failed_revalidation < _get_jwks_min_forced_refresh_seconds():
+        return
+    for task in (_jwks_refresh_task, _jwks_revalidate_task):
+        if task is not None and not task.done():
+            return
+    _jwks_revalidate_task = asyncio.get_running_loop().create_task(revalidate())
+
+
+async def get_clerk_jwks(force_refresh: bool = False):
+    """
+    Fetch Clerk's JWKS (public keys) for JWT verification.
+
+    Fresh copies are served from memory. A stale copy is still served while it is
+    revalidated in the background (stale-while-revalidate); only a cold cache or
+    `force_refresh` waits for the network, and that wait runs in a worker thread.
+    """
+    if _clerk_jwks_cache and _clerk_jwks_cache_time is not None and not force_refresh:
+        if time.time() - _clerk_jwks_cache_time >= _get_jwks_ttl_seconds():
+            _schedule_background_refresh()
         return _clerk_jwks_cache
-    except Exception as e:
+
+    try:
+        return await _refresh_clerk_jwks(_get_jwks_min_forced_refresh_seconds() if force_refresh else None)
+    except HTTPException:
+        raise
+    except Exception:
         logger.exception("Failed to fetch Clerk JWKS")
+        if _clerk_jwks_cache:
+            return _clerk_jwks_cache
         raise HTTPException(status_code=500, detail="Failed to fetch Clerk JWKS")
 
 
+async def _get_signing_key(kid: str):
+    """
+    Look up the public key for a kid. An unknown kid triggers at most one JWKS
+    refresh per CLERK_JWKS_MIN_REFRESH_SECONDS instead of a fetch per request.
+    """
+    global _jwks_last_forced_refresh
+    key = _get_key_table(await get_clerk_jwks()).get(kid)
+    if key is not None:
+        return key
+
+    now = time.monotonic()
+    if now - _jwks_last_forced_refresh < _get_jwks_min_forced_refresh_seconds():
+        return None
+    _jwks_last_forced_refresh = now
+    logger.info("Unknown Clerk key id; refreshing JWKS | kid=%s", kid)
+    return _get_key_table(await get_clerk_jwks(force_refresh=True)).get(kid)
+
+
+async def _decode_clerk_token(token: str, clerk_domain: str) -> dict:
+    """
+    Verify a Clerk JWT and return its payload, using the verified-token cache.
+
+    Raises:
+        JWTError: if the token is invalid
+        HTTPException: if JWKS cannot be obtained
+    """
+    audience = os.getenv("CLERK_FRONTEND_API_URL", "")
+    issuer = os.getenv("CLERK_ISSUER", f"https://{clerk_domain}")
+    cache_key = _token_cache_key(token, audience, issuer)
+    now = time.time()
+    cached_payload = _get_local_token_payload(cache_key, now)
+    if cached_payload is None:
+        cached_payload = await _run_shared(_get_shared_token_payload, cache_key, now)
+    if cached_payload is not None:
+        return cached_payload
+
+    # Get the key ID from token header
+    unverified_header = jwt.get_unverified_header(token)
+    kid = unverified_header.get("kid")
+
+    if not kid:
+        raise JWTError("Token missing 'kid' header")
+
+    key = await _get_signing_key(kid)
+    if not key:
+        raise JWTError(f"Unable to find matching key for kid: {kid}")
+
+    # Verify and decode token
+    payload = jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=audience or None,
+        issuer=issuer
+    )
+
+    await _run_shared(_cache_token_payload, cache_key, payload)
+    return payload
+
+
+async def _jwks_refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(_get_jwks_refresh_interval_seconds())
+        try:
+            await _refresh_clerk_jwks(_get_jwks_refresh_interval_seconds())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Scheduled Clerk JWKS refresh failed; keeping cached keys")
+
+
+async def start_jwks_refresher() -> None:
+    """Prefetch JWKS and keep it fresh in the background (call on app startup)."""
+    global _jwks_background_task
+    if not os.getenv("CLERK_DOMAIN", "").strip():
+        return
+
+    try:
+        await _refresh_clerk_jwks()
+    except Exception:
+        logger.warning("Initial Clerk JWKS prefetch failed; will retry in background")
+
+    if _jwks_background_task is None or _jwks_background_task.done():
+        _jwks_background_task = asyncio.get_running_loop().create_task(_jwks_refresh_loop())
+
+
+async def stop_jwks_refresher() -> None:
+    global _jwks_background_task
+    task = _jwks_background_task
+    _jwks_background_task = None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
 async def verify_clerk_token(request: Request) -> dict:
     """
     Verify Clerk JWT token and return decoded token payload
@@ -178,13 +666,14 @@ async def verify_clerk_token(request: Request) -> dict:
         return {"sub": "local-dev", "email": "dev@iaac.net"}
 
     client_ip = _get_client_ip(request)
-    if _is_auth_rate_limited(client_ip):
+    failures = await _run_shared(_count_auth_failures, client_ip)
+    if failures >= _get_auth_rate_limit_max_attempts():
         logger.warning("Authentication blocked by rate limit | ip=%s", client_ip)
         raise HTTPException(status_code=429, detail="Too many authentication failures. Try again later.")
 
     if not auth_header:
         logger.warning("Authentication failed: Missing authorization header")
-        _record_auth_failure(client_ip)
+        await _run_shared(_record_auth_failure, client_ip)
         raise HTTPException(status_code=401, detail="Missing authorization header")
     
     # If Authorization header IS provided, validate it
@@ -197,55 +686,27 @@ async def verify_clerk_token(request: Request) -> dict:
         scheme, token = auth_header.split(" ", 1)
         if scheme.lower() != "bearer":
             logger.warning("Authentication failed: Invalid authentication scheme")
-            _record_auth_failure(client_ip)
+            await _run_shared(_record_auth_failure, client_ip)
             raise HTTPException(status_code=401, detail="Invalid authentication scheme")
     except ValueError:
         logger.warning("Authentication failed: Invalid authorization header format")
-        _record_auth_failure(client_ip)
+        await _run_shared(_record_auth_failure, client_ip)
         raise HTTPException(status_code=401, detail="Invalid authorization header")
     
     try:
-        jwks = await get_clerk_jwks()
-        
-        # Get the key ID from token header
-        unverified_header = jwt.get_unverified_header(token)
-        kid = unverified_header.get("kid")
-        
-        if not kid:
-            raise JWTError("Token missing 'kid' header")
-        
-        # Find the matching public key
-        key = None
-        for jwk_data in jwks.get("keys", []):
-            if jwk_data["kid"] == kid:
-                key = jwk.construct(jwk_data)
-                break
-        
-        if not key:
-            raise JWTError(f"Unable to find matching key for kid: {kid}")
-        
-        # Verify and decode token
-        audience = os.getenv("CLERK_FRONTEND_API_URL", "")
-        issuer = os.getenv("CLERK_ISSUER", f"https://{clerk_domain}")
-
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=["RS256"],
-            audience=audience or None,
-            issuer=issuer
-        )
-
-        _clear_auth_failures(client_ip)
+        payload = await _decode_clerk_token(token, clerk_domain)
+        if failures:
+            # Only IPs with recorded failures need a (shared state) write
+            await _run_shared(_clear_auth_failures, client_ip)
         return payload
 
     except HTTPException:
-        _record_auth_failure(client_ip)
+        await _run_shared(_record_auth_failure, client_ip)
         raise
         
     except JWTError as e:
         logger.warning("Authentication failed: Invalid token (%s)", str(e))
-        _record_auth_failure(client_ip)
+        await _run_shared(_record_auth_failure, client_ip)
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
@@ -273,48 +734,16 @@ async def get_optional_user(request: Request) -> Optional[dict]:
         logger.warning("Optional auth failed: Invalid authorization header format")
         return None
     
-    # Create a minimal request-like object for verify_clerk_token
+    clerk_domain = os.getenv("CLERK_DOMAIN", "").strip()
+    if not clerk_domain:
+        logger.warning("Optional auth failed: CLERK_DOMAIN environment variable not set")
+        return None
+    
     try:
-        # Temporarily modify request headers for verification
-        clerk_domain = os.getenv("CLERK_DOMAIN", "")
-        if not clerk_domain:
-            logger.warning("Optional auth failed: CLERK_DOMAIN environment variable not set")
-            return None
-        
-        jwks = await get_clerk_jwks()
-        
-        # Get the key ID from token header
-        unverified_header = jwt.get_unverified_header(token)
-        kid = unverified_header.get("kid")
-        
-        if not kid:
-            logger.warning("Optional auth failed: Token missing 'kid' header")
-            return None
-        
-        # Find the matching public key
-        key = None
-        for jwk_data in jwks.get("keys", []):
-            if jwk_data["kid"] == kid:
-                key = jwk.construct(jwk_data)
-                break
-        
-        if not key:
-            logger.warning("Optional auth failed: No matching key for token kid")
-            return None
-        
-        # Verify and decode token
-        audience = os.getenv("CLERK_FRONTEND_API_URL", "")
-        issuer = os.getenv("CLERK_ISSUER", f"https://{clerk_domain}")
-
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=["RS256"],
-            audience=audience or None,
-            issuer=issuer
-        )
-
-        return payload
+        return await _decode_clerk_token(token, clerk_domain)
+    except JWTError as e:
+        logger.warning("Optional auth failed: Invalid token (%s)", str(e))
+        return None
     except Exception:
         logger.warning("Optional auth failed: Token verification error")
         return None
@@ -1,32 +1,426 @@
+import bisect
 import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
 
 # Get the backend directory (parent of src/)
 # When running: python src/main.py from /backend, __file__ will resolve correctly
 BACKEND_DIR = Path(__file__).parent.parent.parent.resolve()
 METRICS_CACHE_DIR = BACKEND_DIR / "metrics_cache"
+METRICS_INDEX_FILENAME = "index.jsonl"
+METRICS_SQLITE_FILENAME = "metrics.sqlite3"
+METRICS_PROJECTS_DIRNAME = "projects"
 
-
-def ensure_cache_dir():
-    """Create metrics_cache directory if it doesn't exist."""
-    METRICS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# Storage namespace of the current context. None is the default project, stored
+# at the cache root; other projects live in metrics_cache/projects/<namespace>/.
+_storage_namespace: ContextVar[Optional[str]] = ContextVar("metrics_storage_namespace", default=None)
+_NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
 
 
-def save_metrics(version_id: str, metrics: Dict[str, Any]) -> None:
+@contextmanager
+def project_storage(namespace: Optional[str]):
     """
-    Save metrics to a JSON file.
+    Route storage calls made in this context to a project's namespace.
     
     Args:
-        version_id: Unique identifier for the Speckle version
-        metrics: Dictionary of calculated metrics
+        namespace: Project namespace, or None for the default project at the cache root
+    """
+    if namespace is not None and not _NAMESPACE_PATTERN.match(namespace):
+        raise ValueError(f"Invalid storage namespace: {namespace!r}")
+    token = _storage_namespace.set(namespace)
+    try:
+        yield
+    finally:
+        _storage_namespace.reset(token)
+
+
+def get_storage_namespace() -> Optional[str]:
+    return _storage_namespace.get()
+
+
+def get_storage_dir() -> Path:
+    """Directory holding the metrics of the current storage namespace."""
+    namespace = _storage_namespace.get()
+    if namespace is None:
+        return METRICS_CACHE_DIR
+    return METRICS_CACHE_DIR / METRICS_PROJECTS_DIRNAME / namespace
+
+# In-process LRU of parsed metric documents: file path -> (mtime_ns, size, metrics)
+_documents_cache: "OrderedDict[Path, tuple[int, int, Dict[str, Any]]]" = OrderedDict()
+_documents_cache_lock = threading.Lock()
+_documents_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+
+def _get_documents_cache_max_entries() -> int:
+    value = os.getenv("METRICS_DOCUMENT_CACHE_SIZE", "32")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 32
+
+
+def _invalidate_cached_document(file_path: Path) -> None:
+    with _documents_cache_lock:
+        if _documents_cache.pop(file_path, None) is not None:
+            _documents_cache_stats["invalidations"] += 1
+
+
+def _load_document(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Parse a metrics file, serving it from the in-process LRU when the file's
+    mtime and size are unchanged since it was cached.
+
+    The returned dictionary is shared between callers and must not be mutated.
+    """
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        _invalidate_cached_document(file_path)
+        return None
+
+    with _documents_cache_lock:
+        cached = _documents_cache.get(file_path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            _documents_cache.move_to_end(file_path)
+            _documents_cache_stats["hits"] += 1
+            return cached[2]
+        _documents_cache_stats["misses"] += 1
+
+    with open(file_path, "r") as f:
+        document = json.load(f)
+
+    max_entries = _get_documents_cache_max_entries()
+    if max_entries == 0:
+        return document
+
+    with _documents_cache_lock:
+        _documents_cache[file_path] = (stat.st_mtime_ns, stat.st_size, document)
+        _documents_cache.move_to_end(file_path)
+        while len(_documents_cache) > max_entries:
+            _documents_cache.popitem(last=False)
+            _documents_cache_stats["evictions"] += 1
+
+    return document
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Return hit/miss/eviction counters of the parsed-document cache.
+
+    Returns:
+        Dictionary with counters plus the current and maximum cache size
+    """
+    with _documents_cache_lock:
+        stats = dict(_documents_cache_stats)
+        stats["size"] = len(_documents_cache)
+    stats["max_size"] = _get_documents_cache_max_entries()
+    return stats
+
+
+def clear_cache() -> None:
+    """Drop all cached documents and reset the cache counters."""
+    with _documents_cache_lock:
+        _documents_cache.clear()
+        for key in _documents_cache_stats:
+            _documents_cache_stats[key] = 0
+
+
+# Append-only version manifest (metrics_cache/index.jsonl), mirrored in memory
+# per storage directory.
+_index_lock = threading.RLock()
+
+
+class _ManifestIndex:
+    """
+    In-memory mirror of one manifest. `entries` maps version_id -> record;
+    `order` holds (sort_key, saved_at, version_id) tuples sorted oldest to newest;
+    `size` is the number of manifest bytes applied so far, and `inode`/`mtime_ns`
+    identify the manifest file as it was when they were read.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.order: List[tuple] = []
+        self.size = 0
+        self.inode: Optional[int] = None
+        self.mtime_ns: Optional[int] = None
+
+    def reset(self) -> None:
+        self.entries.clear()
+        self.order.clear()
+        self.size = 0
+        self.inode = None
+        self.mtime_ns = None
+
+    def mark_read(self, stat: os.stat_result) -> None:
+        self.inode, self.mtime_ns = stat.st_ino, stat.st_mtime_ns
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) == (self.inode, self.mtime_ns, self.size)
+
+
+_indexes: Dict[Path, _ManifestIndex] = {}
+
+
+def _get_index_path() -> Path:
+    return get_storage_dir() / METRICS_INDEX_FILENAME
+
+
+def _get_index(index_path: Path) -> _ManifestIndex:
+    with _index_lock:
+        index = _indexes.get(index_path)
+        if index is None:
+            index = _indexes[index_path] = _ManifestIndex()
+        return index
+
+
+def _to_iso(value: Any) -> Optional[str]:
+    """Normalise a datetime or ISO string to a UTC ISO-8601 string."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _index_sort_key(record: Dict[str, Any]) -> tuple:
+    return (record.get("created_at") or record["saved_at"], record["saved_at"], record["version_id"])
+
+
+def _apply_index_record(index: _ManifestIndex, record: Dict[str, Any]) -> None:
+    """Apply one manifest record to the in-memory index."""
+    version_id = record["version_id"]
+    previous = index.entries.pop(version_id, None)
+    if previous is not None:
+        position = bisect.bisect_left(index.order, _index_sort_key(previous))
+        if position < len(index.order) and index.order[position][2] == version_id:
+            del index.order[position]
+
+    if record.get("deleted"):
+        return
+
+    index.entries[version_id] = record
+    bisect.insort(index.order, _index_sort_key(record))
+
+
+def _read_index_records(index: _ManifestIndex, index_path: Path, start: int) -> int:
+    """Apply manifest records from byte offset `start`; return the new read position."""
+    with open(index_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Partially written record from a concurrent writer; re-read it next time
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                offset += len(line)
+                continue
+            record.setdefault("offset", offset)
+            _apply_index_record(index, record)
+            offset += len(line)
+    return offset
+
+
+def _append_index_record(record: Dict[str, Any]) -> None:
+    """Append a record to the manifest and the in-memory index."""
+    index_path = _get_index_path()
+    with _index_lock:
+        index = _refresh_index()
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with open(index_path, "ab") as f:
+            record["offset"] = f.tell()
+            f.write(line.encode("utf-8"))
+            end = f.tell()
+            stat = os.fstat(f.fileno())
+        _apply_index_record(index, record)
+        # Only skip ahead if nobody else wrote in between; otherwise the next refresh reloads
+        if index.size == record["offset"] and stat.st_size == end:
+            index.size = end
+            index.mark_read(stat)
+
+
+def _refresh_index() -> _ManifestIndex:
+    """
+    Bring the in-memory index up to date with the manifest.
+
+    Costs a single stat() when nothing changed. When the manifest's inode,
+    modification time or size differ from what was read, it was appended to
+    by another process or rewritten (possibly to the same size), and it is
+    re-read from the start. A missing manifest is rebuilt from the cache
+    directory.
+    
+    Returns:
+        The in-memory index of the current storage namespace
+    """
+    index_path = _get_index_path()
+    with _index_lock:
+        index = _get_index(index_path)
+        try:
+            stat = index_path.stat()
+        except FileNotFoundError:
+            rebuild_index()
+            return index
+
+        if not index.is_current(stat):
+            index.reset()
+            index.size = _read_index_records(index, index_path, 0)
+            # A record appended while reading changes the size or mtime, so the next refresh reloads
+            index.mark_read(stat)
+        return index
+
+
+def rebuild_index() -> int:
+    """
+    Rebuild the version manifest from the metrics files on disk.
+
+    Creation times already recorded in the manifest are kept; files without a
+    record fall back to their modification time.
+
+    Returns:
+        Number of indexed versions
     """
     ensure_cache_dir()
+    index_path = _get_index_path()
+
+    with _index_lock:
+        index = _get_index(index_path)
+        known = dict(index.entries)
+        if index_path.exists():
+            index.reset()
+            _read_index_records(index, index_path, 0)
+            known.update(index.entries)
+
+        records = []
+        for file_path in get_storage_dir().glob("*.json"):
+            version_id = file_path.stem
+            saved_at = _to_iso(datetime.fromtimestamp(file_path.stat().st_mtime, tz=timezone.utc))
+            previous = known.get(version_id, {})
+            records.append({
+                "version_id": version_id,
+                "created_at": previous.get("created_at"),
+                "saved_at": previous.get("saved_at") or saved_at,
+                "definitions_hash": previous.get("definitions_hash"),
+            })
+        records.sort(key=_index_sort_key)
+
+        tmp_path = index_path.with_suffix(".jsonl.tmp")
+        offset = 0
+        with open(tmp_path, "wb") as f:
+            for record in records:
+                record["offset"] = offset
+                line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+                f.write(line)
+                offset += len(line)
+        os.replace(tmp_path, index_path)
+
+        index.reset()
+        for record in records:
+            _apply_index_record(index, record)
+        index.size = offset
+        index.mark_read(index_path.stat())
+
+    print(f"Rebuilt metrics index with {len(records)} versions")
+    return len(records)
+
+
+def get_version_entry(version_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up the manifest record of a saved version.
+    
+    Returns:
+        Record with version_id, created_at, saved_at, definitions_hash and offset, or None
+    """
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.get_version_entry(version_id)
+    
+    ensure_cache_dir()
+    with _index_lock:
+        entry = _refresh_index().entries.get(version_id)
+        return dict(entry) if entry else None
+
+
+def get_latest_version_id() -> Optional[str]:
+    """Return the newest saved version by Speckle creation time, or None."""
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.get_latest_version_id()
     
-    file_path = METRICS_CACHE_DIR / f"{version_id}.json"
+    ensure_cache_dir()
+    with _index_lock:
+        order = _refresh_index().order
+        return order[-1][2] if order else None
+
+
+def _get_storage_backend() -> str:
+    """Storage backend selected by METRICS_STORAGE_BACKEND: "json" (default) or "sqlite"."""
+    return os.getenv("METRICS_STORAGE_BACKEND", "json").strip().lower() or "json"
+
+
+def get_sqlite_path() -> Path:
+    """
+    Location of the SQLite database of the current storage namespace,
+    overridable with METRICS_SQLITE_PATH (other projects get a suffixed file next to it).
+    """
+    value = os.getenv("METRICS_SQLITE_PATH", "").strip()
+    if not value:
+        return get_storage_dir() / METRICS_SQLITE_FILENAME
+    path = Path(value)
+    namespace = _storage_namespace.get()
+    if namespace is None:
+        return path
+    return path.with_name(f"{path.stem}.{namespace}{path.suffix}")
+
+
+_sqlite_stores: Dict[Path, Any] = {}
+_sqlite_stores_lock = threading.Lock()
+
+
+def _get_sqlite_store():
+    """Return the shared SQLiteMetricsStore when the sqlite backend is selected, else None."""
+    if _get_storage_backend() != "sqlite":
+        return None
+
+    from infrastructure.sqlite_metrics_storage import SQLiteMetricsStore
+
+    db_path = get_sqlite_path()
+    with _sqlite_stores_lock:
+        store = _sqlite_stores.get(db_path)
+        if store is None:
+            store = SQLiteMetricsStore(db_path)
+            _sqlite_stores[db_path] = store
+    return store
+
+
+def ensure_cache_dir():
+    """Create the metrics_cache directory (of the current namespace) if it doesn't exist."""
+    get_storage_dir().mkdir(parents=True, exist_ok=True)
+
+
+def serialize_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert MetricResult objects to JSON-serializable dicts, rounding values to 2 decimals.
     
-    # Convert MetricResult objects to dicts for JSON serialization
+    Args:
+        metrics: Dictionary of calculated metrics
+        
+    Returns:
+        Dictionary of plain metric dicts
+    """
     serializable_metrics = {}
     for key, metric in metrics.items():
         if hasattr(metric, '__dict__'):
@@ -61,8 +455,47 @@ def save_metrics(version_id: str, metrics: Dict[str, Any]) -> None:
         else:
             serializable_metrics[key] = metric
     
+    return serializable_metrics
+
+
+def save_metrics(
+    version_id: str,
+    metrics: Dict[str, Any],
+    created_at: Any = None,
+    definitions_hash: Optional[str] = None,
+) -> None:
+    """
+    Save metrics to a JSON file and record the version in the manifest.
+    
+    Args:
+        version_id: Unique identifier for the Speckle version
+        metrics: Dictionary of calculated metrics
+        created_at: Speckle creation time of the version (datetime or ISO string)
+        definitions_hash: Hash of the rulebook/metric definitions used for the calculation
+    """
+    store = _get_sqlite_store()
+    if store is not None:
+        store.save_metrics(version_id, metrics, created_at=created_at, definitions_hash=definitions_hash)
+        return
+    
+    ensure_cache_dir()
+    with _index_lock:
+        # Make sure legacy caches are indexed before this version is appended
+        _refresh_index()
+    
+    file_path = get_storage_dir() / f"{version_id}.json"
+    
+    serializable_metrics = serialize_metrics(metrics)
+    
     with open(file_path, "w") as f:
         json.dump(serializable_metrics, f, indent=2, default=str)
+    _invalidate_cached_document(file_path)
+    _append_index_record({
+        "version_id": version_id,
+        "created_at": _to_iso(created_at),
+        "saved_at": datetime.now(timezone.utc).isoformat(),
+        "definitions_hash": definitions_hash,
+    })
     
     print(f"Metrics saved to {file_path}")
 
@@ -77,14 +510,17 @@ def get_metrics(version_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary of metrics or None if not found
     """
-    file_path = METRICS_CACHE_DIR / f"{version_id}.json"
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.get_metrics(version_id)
     
-    if not file_path.exists():
+    file_path = get_storage_dir() / f"{version_id}.json"
+    
+    document = _load_document(file_path)
+    if document is None:
         print(f"No metrics found for version {version_id}")
-        return None
     
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return document
 
 
 def list_all_metrics() -> Dict[str, str]:
@@ -92,18 +528,19 @@ def list_all_metrics() -> Dict[str, str]:
     List all saved metric versions with their file paths.
     
     Returns:
-        Dictionary mapping version_id to file path
+        Dictionary mapping version_id to file path, oldest version first
     """
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.list_all_metrics()
+    
     ensure_cache_dir()
     
     versions = {}
     try:
-        all_files = list(METRICS_CACHE_DIR.iterdir())
-        json_files = [f for f in all_files if f.suffix == ".json"]
-        
-        for file_path in json_files:
-            version_id = file_path.stem
-            versions[version_id] = str(file_path)
+        with _index_lock:
+            for _, _, version_id in _refresh_index().order:
+                versions[version_id] = str(get_storage_dir() / f"{version_id}.json")
     except Exception as e:
         print(f"Error listing metrics: {e}")
     
@@ -120,42 +557,111 @@ def delete_metrics(version_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    file_path = METRICS_CACHE_DIR / f"{version_id}.json"
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.delete_metrics(version_id)
+    
+    file_path = get_storage_dir() / f"{version_id}.json"
+    
+    _invalidate_cached_document(file_path)
     
     if file_path.exists():
         file_path.unlink()
+        _append_index_record({"version_id": version_id, "deleted": True})
         print(f"Metrics deleted for version {version_id}")
         return True
     
+    if get_version_entry(version_id) is not None:
+        _append_index_record({"version_id": version_id, "deleted": True})
+    
     return False
 
 
 def get_latest_metrics() -> Optional[Dict[str, Any]]:
     """
-    Retrieve the most recently saved metrics.
+    Retrieve the metrics of the newest Speckle version.
     
     Returns:
         Dictionary of metrics or None if no metrics found
     """
-    ensure_cache_dir()
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.get_latest_metrics()
     
-    # List all JSON files
     try:
-        all_files = list(METRICS_CACHE_DIR.iterdir())
-        json_files = [f for f in all_files if f.suffix == ".json"]
+        version_id = get_latest_version_id()
     except Exception as e:
-        print(f"Error listing metrics: {e}")
+        print(f"Error reading metrics index: {e}")
         return None
     
-    if not json_files:
+    if version_id is None:
         return None
     
-    # Get the most recently modified file
-    latest_file = max(json_files, key=lambda f: f.stat().st_mtime)
-    
     try:
-        with open(latest_file, "r") as f:
-            return json.load(f)
+        document = _load_document(get_storage_dir() / f"{version_id}.json")
+        if document is None:
+            # File removed behind our back; resync the manifest once
+            rebuild_index()
+            version_id = get_latest_version_id()
+            if version_id is None:
+                return None
+            document = _load_document(get_storage_dir() / f"{version_id}.json")
+        return document
     except Exception as e:
         print(f"Error loading metrics: {e}")
         return None
+
+
+
+def get_metric_history(
+    metric: str,
+    level: Any = None,
+    cluster: Any = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """
+    Values of one metric across the newest versions, newest first.
+    
+    Args:
+        metric: Metric key, e.g. "green_space_index"
+        level: Return the value of this level instead of the total
+        cluster: Return the value of this cluster instead of the total
+        limit: Maximum number of versions
+        
+    Returns:
+        List of {"version_id", "created_at", "value"} dicts
+    """
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.get_metric_history(metric, level=level, cluster=cluster, limit=limit)
+    
+    # JSON backend: walk the manifest newest first and load each document
+    ensure_cache_dir()
+    with _index_lock:
+        index = _refresh_index()
+        newest = reversed(index.order[-limit:]) if limit > 0 else []
+        versions = [(version_id, index.entries[version_id].get("created_at")) for _, _, version_id in newest]
+    
+    history = []
+    for version_id, created_at in versions:
+        document = _load_document(get_storage_dir() / f"{version_id}.json")
+        metric_data = (document or {}).get(metric)
+        if not isinstance(metric_data, dict):
+            continue
+        if level is not None:
+            value = (metric_data.get("value_per_level") or {}).get(str(level))
+        elif cluster is not None:
+            value = (metric_data.get("value_per_cluster") or {}).get(str(cluster))
+        else:
+            value = metric_data.get("total_value")
+        history.append({
+            "version_id": version_id,
+            "created_at": created_at,
+            "value": value,
+        })
+    return history
+
+
+if __name__ == "__main__":
+    # Rebuild the version manifest for an existing metrics_cache directory
+    rebuild_index()
@@ -0,0 +1,224 @@
+"""
+Auth state shared between worker processes.
+
+By default clerk_auth keeps its JWKS cache, verified tokens and auth-failure
+windows in module globals, so every uvicorn/gunicorn worker fetches JWKS on its
+own and the failure limit is multiplied by the worker count. With
+AUTH_STATE_BACKEND=sqlite that state lives in one SQLite file (WAL mode) that
+all workers on the box open, without any external service.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from infrastructure.metrics_storage import BACKEND_DIR
+
+AUTH_STATE_FILENAME = "auth_state.sqlite3"
+
+# Recorded failures between checks of the tracked-IP cap
+_CAP_CHECK_INTERVAL = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries (expires_at);
+
+CREATE TABLE IF NOT EXISTS auth_failure_ips (
+    ip TEXT PRIMARY KEY,
+    last_failure REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_auth_failure_ips_last ON auth_failure_ips (last_failure);
+
+CREATE TABLE IF NOT EXISTS auth_failures (
+    ip TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (ip, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_auth_failures_bucket ON auth_failures (bucket);
+"""
+
+
+def _bucket_range(now: float, window_seconds: float, buckets: int) -> tuple[int, int]:
+    """Current bucket and the oldest bucket still inside the window."""
+    bucket = int(now // (window_seconds / buckets))
+    return bucket, bucket - buckets + 1
+
+
+class SQLiteSharedState:
+    """Expiring key/value entries and bucketed auth-failure counters in one SQLite file."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5.0)
+        self._records_since_cap_check = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, namespace: str, key: str, now: Optional[float] = None) -> Optional[Any]:
+        """Return the JSON value stored under (namespace, key), or None if missing or expired."""
+        entry = self.get_entry(namespace, key, now)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, namespace: str, key: str, now: Optional[float] = None) -> Optional[tuple[Any, Optional[float]]]:
+        """Return (value, expires_at) stored under (namespace, key), or None if missing or expired."""
+        current_time = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None or (row[1] is not None and current_time >= row[1]):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        expires_at: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Store a JSON-serializable value, replacing any previous one.
+
+        Args:
+            namespace: Group of entries, e.g. "jwks" or "tokens"
+            key: Entry key within the namespace
+            value: JSON-serializable value
+            expires_at: Unix time after which the entry is ignored (None = never)
+            now: Current time, used to sweep expired entries
+        """
+        current_time = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, separators=(",", ":")), expires_at),
+            )
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (current_time,))
+
+    def delete(self, namespace: str, key: Optional[str] = None) -> None:
+        """Delete one entry, or the whole namespace when key is None."""
+        with self._lock, self._conn:
+            if key is None:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            else:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                )
+
+    def record_failure(
+        self,
+        ip_address: str,
+        now: float,
+        window_seconds: float,
+        buckets: int,
+        max_tracked_ips: int,
+    ) -> None:
+        """Count one failure for an IP and sweep buckets and IPs that left the window."""
+        bucket, oldest_bucket = _bucket_range(now, window_seconds, buckets)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO auth_failures (ip, bucket, count) VALUES (?, ?, 1)
+                ON CONFLICT (ip, bucket) DO UPDATE SET count = count + 1
+                """,
+                (ip_address, bucket),
+            )
+            self._conn.execute(
+                """
+                INSERT INTO auth_failure_ips (ip, last_failure) VALUES (?, ?)
+                ON CONFLICT (ip) DO UPDATE SET last_failure = MAX(last_failure, excluded.last_failure)
+                """,
+                (ip_address, now),
+            )
+            self._conn.execute("DELETE FROM auth_failures WHERE bucket < ?", (oldest_bucket,))
+            self._conn.execute(
+                "DELETE FROM auth_failure_ips WHERE last_failure < ?", (now - window_seconds,)
+            )
+
+            self._records_since_cap_check += 1
+            if self._records_since_cap_check >= _CAP_CHECK_INTERVAL:
+                self._records_since_cap_check = 0
+                self._enforce_ip_cap(max_tracked_ips)
+
+    def _enforce_ip_cap(self, max_tracked_ips: int) -> None:
+        """Forget the least recently failing IPs beyond the cap (callers hold the lock)."""
+        row = self._conn.execute(
+            "SELECT last_failure FROM auth_failure_ips ORDER BY last_failure DESC LIMIT 1 OFFSET ?",
+            (max_tracked_ips,),
+        ).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            """
+            DELETE FROM auth_failures WHERE ip IN (
+                SELECT ip FROM auth_failure_ips WHERE last_failure <= ?
+            )
+            """,
+            (row[0],),
+        )
+        self._conn.execute("DELETE FROM auth_failure_ips WHERE last_failure <= ?", (row[0],))
+
+    def count_failures(self, ip_address: str, now: float, window_seconds: float, buckets: int) -> int:
+        _, oldest_bucket = _bucket_range(now, window_seconds, buckets)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM auth_failures WHERE ip = ? AND bucket >= ?",
+                (ip_address, oldest_bucket),
+            ).fetchone()
+        return int(row[0])
+
+    def clear_failures(self, ip_address: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM auth_failures WHERE ip = ?", (ip_address,))
+            self._conn.execute("DELETE FROM auth_failure_ips WHERE ip = ?", (ip_address,))
+
+
+def _get_auth_state_backend() -> str:
+    """Auth state backend selected by AUTH_STATE_BACKEND: "memory" (default) or "sqlite"."""
+    return os.getenv("AUTH_STATE_BACKEND", "memory").strip().lower() or "memory"
+
+
+def get_auth_state_path() -> Path:
+    """Location of the shared auth state database, overridable with AUTH_STATE_PATH."""
+    value = os.getenv("AUTH_STATE_PATH", "").strip()
+    return Path(value) if value else BACKEND_DIR / "metrics_cache" / AUTH_STATE_FILENAME
+
+
+_shared_states: Dict[Path, SQLiteSharedState] = {}
+_shared_states_lock = threading.Lock()
+
+
+def get_shared_state() -> Optional[SQLiteSharedState]:
+    """Return the process-wide SQLiteSharedState when the sqlite backend is selected, else None."""
+    if _get_auth_state_backend() != "sqlite":
+        return None
+
+    db_path = get_auth_state_path()
+    with _shared_states_lock:
+        state = _shared_states.get(db_path)
+        if state is None:
+            state = SQLiteSharedState(db_path)
+            _shared_states[db_path] = state
+    return state
@@ -0,0 +1,345 @@
+"""
+SQLite-backed metrics storage.
+
+Persists MetricResult totals, per-level and per-cluster values and chart data
+as indexed rows, so questions like "green_space_index on level 540 across the
+last 200 versions" are answered with one indexed query instead of loading
+every cached JSON document.
+
+Selected with METRICS_STORAGE_BACKEND=sqlite (see metrics_storage.py).
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from infrastructure.metrics_storage import serialize_metrics, _to_iso
+
+# Keys stored in dedicated columns/tables; anything else goes to metrics.extra
+_METRIC_COLUMNS = ("name", "benchmark", "total_value", "formula", "action")
+_METRIC_KEY_ORDER = (
+    "name", "benchmark", "total_value", "value_per_level",
+    "value_per_cluster", "chart_data", "formula", "action",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version_id TEXT PRIMARY KEY,
+    created_at TEXT,
+    saved_at TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    definitions_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_versions_sort_key ON versions (sort_key);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    version_id TEXT NOT NULL REFERENCES versions (version_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    benchmark REAL,
+    total_value REAL,
+    formula TEXT,
+    action TEXT,
+    chart_label TEXT,
+    has_chart INTEGER NOT NULL DEFAULT 0,
+    extra TEXT,
+    PRIMARY KEY (version_id, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_metric ON metrics (metric, version_id);
+
+CREATE TABLE IF NOT EXISTS metric_levels (
+    version_id TEXT NOT NULL REFERENCES versions (version_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    level TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (version_id, metric, level)
+);
+CREATE INDEX IF NOT EXISTS idx_metric_levels_lookup ON metric_levels (metric, level, version_id);
+
+CREATE TABLE IF NOT EXISTS metric_clusters (
+    version_id TEXT NOT NULL REFERENCES versions (version_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    cluster TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (version_id, metric, cluster)
+);
+CREATE INDEX IF NOT EXISTS idx_metric_clusters_lookup ON metric_clusters (metric, cluster, version_id);
+
+CREATE TABLE IF NOT EXISTS chart_values (
+    version_id TEXT NOT NULL REFERENCES versions (version_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (version_id, metric, bucket)
+);
+"""
+
+
+class SQLiteMetricsStore:
+    """Metrics storage with the same surface as the JSON functions in metrics_storage."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+            self._conn.commit()
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(versions)")}
+        if "definitions_hash" not in columns:
+            self._conn.execute("ALTER TABLE versions ADD COLUMN definitions_hash TEXT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save_metrics(
+        self,
+        version_id: str,
+        metrics: Dict[str, Any],
+        created_at: Any = None,
+        definitions_hash: Optional[str] = None,
+    ) -> None:
+        """Replace all rows of a version with the given metrics."""
+        document = serialize_metrics(metrics)
+        created_at = _to_iso(created_at)
+        saved_at = datetime.now(timezone.utc).isoformat()
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM versions WHERE version_id = ?", (version_id,))
+            self._conn.execute(
+                "INSERT INTO versions (version_id, created_at, saved_at, sort_key, definitions_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (version_id, created_at, saved_at, created_at or saved_at, definitions_hash),
+            )
+            for position, (metric_key, metric) in enumerate(document.items()):
+                self._insert_metric(version_id, metric_key, position, metric)
+
+        print(f"Metrics saved to {self.db_path} (version {version_id})")
+
+    def _insert_metric(self, version_id: str, metric_key: str, position: int, metric: Any) -> None:
+        if not isinstance(metric, dict):
+            metric = {"value": metric}
+
+        chart_data = metric.get("chart_data")
+        extra = {
+            key: value for key, value in metric.items()
+            if key not in _METRIC_KEY_ORDER
+        }
+        self._conn.execute(
+            "INSERT INTO metrics (version_id, metric, position, name, benchmark, total_value, "
+            "formula, action, chart_label, has_chart, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                version_id, metric_key, position,
+                *(metric.get(column) for column in _METRIC_COLUMNS),
+                chart_data.get("label") if isinstance(chart_data, dict) else None,
+                1 if isinstance(chart_data, dict) else 0,
+                json.dumps(extra, default=str) if extra else None,
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO metric_levels (version_id, metric, level, position, value) VALUES (?, ?, ?, ?, ?)",
+            [
+                (version_id, metric_key, str(level), i, value)
+                for i, (level, value) in enumerate((metric.get("value_per_level") or {}).items())
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO metric_clusters (version_id, metric, cluster, position, value) VALUES (?, ?, ?, ?, ?)",
+            [
+                (version_id, metric_key, str(cluster), i, value)
+                for i, (cluster, value) in enumerate((metric.get("value_per_cluster") or {}).items())
+            ],
+        )
+        if isinstance(chart_data, dict):
+            self._conn.executemany(
+                "INSERT INTO chart_values (version_id, metric, bucket, position, value) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (version_id, metric_key, str(bucket), i, value)
+                    for i, (bucket, value) in enumerate((chart_data.get("values") or {}).items())
+                ],
+            )
+
+    def get_metrics(self, version_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the metrics document of a version, in the JSON storage format."""
+        with self._lock:
+            metric_rows = self._conn.execute(
+                "SELECT * FROM metrics WHERE version_id = ? ORDER BY position", (version_id,)
+            ).fetchall()
+            if not metric_rows:
+                print(f"No metrics found for version {version_id}")
+                return None
+            levels = self._grouped(
+                "SELECT metric, level, value FROM metric_levels WHERE version_id = ? ORDER BY metric, position",
+                version_id,
+            )
+            clusters = self._grouped(
+                "SELECT metric, cluster, value FROM metric_clusters WHERE version_id = ? ORDER BY metric, position",
+                version_id,
+            )
+            charts = self._grouped(
+                "SELECT metric, bucket, value FROM chart_values WHERE version_id = ? ORDER BY metric, position",
+                version_id,
+            )
+
+        document = {}
+        for row in metric_rows:
+            metric_key = row["metric"]
+            document[metric_key] = {
+                "name": row["name"],
+                "benchmark": row["benchmark"],
+                "total_value": row["total_value"],
+                "value_per_level": levels.get(metric_key, {}),
+                "value_per_cluster": clusters.get(metric_key, {}),
+                "chart_data": (
+                    {"label": row["chart_label"], "values": charts.get(metric_key, {})}
+                    if row["has_chart"] else None
+                ),
+                "formula": row["formula"],
+                "action": row["action"],
+            }
+            if row["extra"]:
+                document[metric_key].update(json.loads(row["extra"]))
+        return document
+
+    def _grouped(self, query: str, version_id: str) -> Dict[str, Dict[str, Any]]:
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for metric_key, key, value in self._conn.execute(query, (version_id,)):
+            grouped.setdefault(metric_key, {})[key] = value
+        return grouped
+
+    def list_all_metrics(self) -> Dict[str, str]:
+        """Map version_id to its location in the database, oldest version first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT version_id FROM versions ORDER BY sort_key, saved_at").fetchall()
+        return {row["version_id"]: f"{self.db_path}#{row['version_id']}" for row in rows}
+
+    def delete_metrics(self, version_id: str) -> bool:
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM versions WHERE version_id = ?", (version_id,)).rowcount
+        if deleted:
+            print(f"Metrics deleted for version {version_id}")
+        return bool(deleted)
+
+    def get_version_entry(self, version_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version_id, created_at, saved_at, definitions_hash FROM versions WHERE version_id = ?",
+                (version_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_latest_version_id(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version_id FROM versions ORDER BY sort_key DESC, saved_at DESC LIMIT 1"
+            ).fetchone()
+        return row["version_id"] if row else None
+
+    def get_latest_metrics(self) -> Optional[Dict[str, Any]]:
+        version_id = self.get_latest_version_id()
+        return self.get_metrics(version_id) if version_id else None
+
+    def get_metric_history(
+        self,
+        metric: str,
+        level: Any = None,
+        cluster: Any = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """
+        Values of one metric across the newest versions, newest first.
+
+        Returns the total value by default, or the value of a single level or cluster.
+        """
+        if level is not None:
+            query = (
+                "SELECT v.version_id, v.created_at, l.value FROM metric_levels l "
+                "JOIN versions v ON v.version_id = l.version_id "
+                "WHERE l.metric = ? AND l.level = ? ORDER BY v.sort_key DESC, v.saved_at DESC LIMIT ?"
+            )
+            params = (metric, str(level), limit)
+        elif cluster is not None:
+            query = (
+                "SELECT v.version_id, v.created_at, c.value FROM metric_clusters c "
+                "JOIN versions v ON v.version_id = c.version_id "
+                "WHERE c.metric = ? AND c.cluster = ? ORDER BY v.sort_key DESC, v.saved_at DESC LIMIT ?"
+            )
+            params = (metric, str(cluster), limit)
+        else:
+            query = (
+                "SELECT v.version_id, v.created_at, m.total_value AS value FROM metrics m "
+                "JOIN versions v ON v.version_id = m.version_id "
+                "WHERE m.metric = ? ORDER BY v.sort_key DESC, v.saved_at DESC LIMIT ?"
+            )
+            params = (metric, limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+
+def import_json_cache(store: SQLiteMetricsStore, cache_dir: Path) -> int:
+    """
+    One-shot import of metrics_cache/*.json documents into a SQLite store.
+
+    Creation times and definition hashes are taken from the JSON manifest when it has them.
+
+    Returns:
+        Number of imported versions
+    """
+    cache_dir = Path(cache_dir)
+    records_by_version = {}
+    index_path = cache_dir / "index.jsonl"
+    if index_path.exists():
+        with open(index_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not record.get("deleted"):
+                    records_by_version[record["version_id"]] = record
+
+    imported = 0
+    for file_path in sorted(cache_dir.glob("*.json")):
+        try:
+            with open(file_path) as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {file_path.name}: {e}")
+            continue
+        version_id = file_path.stem
+        record = records_by_version.get(version_id, {})
+        store.save_metrics(
+            version_id,
+            document,
+            created_at=record.get("created_at"),
+            definitions_hash=record.get("definitions_hash"),
+        )
+        imported += 1
+
+    print(f"Imported {imported} versions into {store.db_path}")
+    return imported
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): PYTHONPATH=src python -m infrastructure.sqlite_metrics_storage
+    from infrastructure.metrics_storage import METRICS_CACHE_DIR, get_sqlite_path
+
+    import_json_cache(SQLiteMetricsStore(get_sqlite_path()), METRICS_CACHE_DIR)
@@ -13,7 +13,9 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from adapters.api.metrics import router as metrics_router
+from application.metrics_jobs import shutdown_jobs
 from application.metrics_workflow import run_application
+from infrastructure.clerk_auth import start_jwks_refresher, stop_jwks_refresher
 
 app = FastAPI(title="Digital Tissue Backend")
 
@@ -38,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["ETag", "X-Metrics-Version"],
 )
 
 # Register API routers
@@ -69,6 +72,23 @@ def startup_event():
             print("WARNING: No metrics cache found on Render. Deploy metrics first.")
 
 
+@app.on_event("startup")
+async def start_auth_background_tasks():
+    """Prefetch Clerk JWKS and keep it fresh in the background."""
+    await start_jwks_refresher()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the metrics calculation worker pool."""
+    shutdown_jobs()
+
+
+@app.on_event("shutdown")
+async def stop_auth_background_tasks():
+    await stop_jwks_refresher()
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
 
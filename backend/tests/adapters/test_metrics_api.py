@@ -0,0 +1,139 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from adapters.api.metrics import router
+from adapters.api.responses import clear_materialized
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import clear_cache, save_metrics
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIP_AUTH", "true")
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path)
+    clear_cache()
+    clear_materialized()
+
+    app = FastAPI()
+    app.include_router(router)
+    yield TestClient(app)
+
+    clear_materialized()
+    clear_cache()
+
+
+def save_version(version_id: str, created_at: str, total_value: float) -> None:
+    save_metrics(
+        version_id,
+        {"daylight_potential": {"benchmark": 0.25, "total_value": total_value}},
+        created_at=created_at,
+    )
+
+
+def test_fetch_metrics_returns_enriched_payload_with_revalidated_etag(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+
+    response = client.get("/api/metrics/v1", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.json()["daylight_potential"]["name"] == "Daylight Potential"
+    assert response.json()["daylight_potential"]["total_value"] == 0.42
+    assert response.headers["etag"].startswith('"')
+    # The body can change (forced re-save, reloaded definitions), so it is never immutable
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_fetch_metrics_returns_304_for_matching_etag(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+    etag = client.get("/api/metrics/v1").headers["etag"]
+
+    response = client.get("/api/metrics/v1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_fetch_metrics_serves_precompressed_gzip(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+
+    response = client.get("/api/metrics/v1", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["daylight_potential"]["total_value"] == 0.42
+
+
+def test_fetch_latest_metrics_revalidates_and_reports_version(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+    save_version("v2", "2026-02-01T00:00:00Z", 0.5)
+
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["x-metrics-version"] == "v2"
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.json()["daylight_potential"]["total_value"] == 0.5
+
+
+def test_resaved_version_gets_new_etag(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+    first = client.get("/api/metrics/v1").headers["etag"]
+
+    save_version("v1", "2026-01-01T00:00:00Z", 0.43)
+    second = client.get("/api/metrics/v1")
+
+    assert second.headers["etag"] != first
+    assert second.json()["daylight_potential"]["total_value"] == 0.43
+
+
+def test_fetch_metrics_unknown_version_returns_404(client):
+    assert client.get("/api/metrics/missing").status_code == 404
+
+
+def test_fetch_metrics_projects_metrics_and_fields(client):
+    save_metrics(
+        "v1",
+        {
+            "daylight_potential": {"benchmark": 0.25, "total_value": 0.42, "value_per_level": {"1": 0.4}},
+            "green_space_index": {"benchmark": 0.8, "total_value": 0.86, "value_per_level": {"1": 0.9}},
+        },
+    )
+
+    response = client.get("/api/metrics/v1?metrics=green_space_index&fields=total_value,benchmark")
+
+    assert response.status_code == 200
+    assert response.json() == {"green_space_index": {"benchmark": 0.8, "total_value": 0.86}}
+
+
+def test_projection_order_does_not_change_etag(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+
+    first = client.get("/api/metrics/v1?fields=total_value,benchmark")
+    second = client.get("/api/metrics/v1?fields=benchmark,total_value")
+
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["etag"] != client.get("/api/metrics/v1").headers["etag"]
+
+
+def test_projection_rejects_unknown_fields_and_metrics(client):
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+
+    assert client.get("/api/metrics/v1?fields=geometry").status_code == 400
+    assert client.get("/api/metrics?metrics=unknown_metric").status_code == 400
+
+
+def test_read_routes_serve_a_configured_project(client, monkeypatch):
+    monkeypatch.setenv("SPECKLE_PROJECTS", "p1:m1")
+    save_version("v1", "2026-01-01T00:00:00Z", 0.42)
+    with metrics_storage.project_storage("p1_m1"):
+        save_version("v1", "2026-01-01T00:00:00Z", 0.9)
+
+    project = {"project_id": "p1", "model_id": "m1"}
+    assert client.get("/api/metrics/v1").json()["daylight_potential"]["total_value"] == 0.42
+    assert client.get("/api/metrics/v1", params=project).json()["daylight_potential"]["total_value"] == 0.9
+    assert client.get("/api/metrics", params=project).json()["daylight_potential"]["total_value"] == 0.9
+    assert list(client.get("/api/metrics/history", params=project).json()["versions"]) == ["v1"]
+
+    assert client.get("/api/metrics", params={"project_id": "p2", "model_id": "m2"}).status_code == 404
+    assert client.get("/api/metrics", params={"project_id": "p1"}).status_code == 400
@@ -0,0 +1,166 @@
+import json
+import threading
+
+import pytest
+from specklepy.api import operations
+from specklepy.objects.base import Base
+from specklepy.objects.models.collections.collection import Collection
+from specklepy.transports.memory import MemoryTransport
+
+from adapters.speckle import object_cache
+from adapters.speckle.object_cache import ObjectCacheTransport, ReceiveStats, get_object_cache
+
+
+class FakeServerTransport(MemoryTransport):
+    """Serves objects like ServerTransport: only closure children missing locally are sent."""
+
+    def __init__(self):
+        super().__init__(name="FakeServer")
+        self.downloaded = []
+
+    def copy_object_and_children(self, id, target_transport):
+        root = self.objects[id]
+        children = list(json.loads(root).get("__closure", {}).keys())
+        found = target_transport.has_objects(children)
+        target_transport.begin_write()
+        for child_id in children:
+            if not found[child_id]:
+                self.downloaded.append(child_id)
+                target_transport.save_object(child_id, self.objects[child_id])
+        self.downloaded.append(id)
+        target_transport.save_object(id, root)
+        target_transport.end_write()
+        return root
+
+
+def receive_object(object_id, server):
+    cache = get_object_cache()
+    with cache.receiving(object_id):
+        return operations.receive(object_id, server, cache)
+
+
+def make_version(server, names):
+    elements = []
+    for name in names:
+        element = Base()
+        element.name = name
+        elements.append(element)
+    return operations.send(Collection(name="UNITS", elements=elements), [server], use_default_cache=False)
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPECKLE_OBJECT_CACHE_PATH", str(tmp_path / "objects.sqlite3"))
+    monkeypatch.setattr(object_cache, "_object_caches", {})
+    yield tmp_path
+    for cache in object_cache._object_caches.values():
+        cache.close()
+
+
+def test_warm_receive_downloads_nothing():
+    server = FakeServerTransport()
+    root_id = make_version(server, ["a", "b"])
+
+    first = receive_object(root_id, server)
+    downloaded_cold = len(server.downloaded)
+    second = receive_object(root_id, server)
+
+    assert downloaded_cold == 3
+    assert len(server.downloaded) == downloaded_cold
+    assert [e.name for e in second.elements] == [e.name for e in first.elements] == ["a", "b"]
+
+
+def test_new_version_downloads_only_new_children():
+    server = FakeServerTransport()
+    receive_object(make_version(server, ["a", "b"]), server)
+    server.downloaded.clear()
+
+    data = receive_object(make_version(server, ["a", "b", "c"]), server)
+
+    assert len(server.downloaded) == 2  # new root and element "c"
+    assert [e.name for e in data.elements] == ["a", "b", "c"]
+
+
+def test_cache_is_capped_with_lru_eviction(tmp_path):
+    cache = ObjectCacheTransport(tmp_path / "capped.sqlite3", max_bytes=10)
+    cache.save_object("old", "x" * 6)
+    cache.end_write()
+    cache.finish_receive()
+    cache.save_object("new", "y" * 6)
+    cache.end_write()
+
+    assert cache.finish_receive() == 1
+    assert cache.get_object("old") is None
+    assert cache.get_object("new") == "y" * 6
+    cache.close()
+
+
+def test_root_with_evicted_children_is_received_again():
+    server = FakeServerTransport()
+    root_id = make_version(server, ["a", "b"])
+    receive_object(root_id, server)
+
+    cache = get_object_cache()
+    child_id = next(iter(json.loads(cache.get_object(root_id))["__closure"]))
+    cache.discard(child_id)
+    server.downloaded.clear()
+
+    data = receive_object(root_id, server)
+
+    assert server.downloaded == [child_id, root_id]
+    assert [e.name for e in data.elements] == ["a", "b"]
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("SPECKLE_OBJECT_CACHE", "false")
+    assert get_object_cache() is None
+
+
+def test_concurrent_receives_overlap_and_count_separately():
+    server = FakeServerTransport()
+    first_id = make_version(server, ["a"])
+    second_id = make_version(server, ["b", "c"])
+    receive_object(first_id, server)
+    cache = get_object_cache()
+    both_inside = threading.Barrier(2, timeout=5)
+    stats = {}
+
+    def receive(object_id):
+        with cache.receiving(object_id) as receive_stats:
+            both_inside.wait()
+            operations.receive(object_id, server, cache)
+        stats[object_id] = receive_stats
+
+    threads = [threading.Thread(target=receive, args=(object_id,)) for object_id in (first_id, second_id)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not both_inside.broken
+    assert (stats[first_id].downloads, stats[first_id].kind) == (0, "warm")
+    assert stats[second_id].downloads == 3
+
+
+def receive_with_stats(object_id, server):
+    with get_object_cache().receiving(object_id) as stats:
+        operations.receive(object_id, server, get_object_cache())
+    return stats
+
+
+def test_receives_are_reported_cold_warm_and_partial():
+    server = FakeServerTransport()
+    first_id = make_version(server, [f"element-{i}" for i in range(20)])
+
+    cold = receive_with_stats(first_id, server)
+    warm = receive_with_stats(first_id, server)
+    partial = receive_with_stats(make_version(server, [f"element-{i}" for i in range(21)]), server)
+
+    # Objects read back after being downloaded in the same receive are not hits
+    assert (cold.kind, cold.hits, cold.downloads) == ("cold", 0, 21)
+    assert (warm.kind, warm.hits, warm.downloads) == ("warm", 21, 0)
+    assert (partial.kind, partial.hits, partial.downloads) == ("partial", 20, 2)
+
+
+def test_receive_without_objects_is_not_warm():
+    assert ReceiveStats().kind == "empty"
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from adapters.speckle import get_client as get_client_module
+from adapters.speckle.get_client import get_client, reset_client
+
+
+class FakeSpeckleClient:
+    instances = []
+
+    def __init__(self, host):
+        self.host = host
+        self.token = None
+        self.healthy = True
+        self.active_user = self
+        FakeSpeckleClient.instances.append(self)
+
+    def authenticate_with_token(self, token):
+        self.token = token
+
+    def get(self):
+        if not self.healthy:
+            raise RuntimeError("Token expired")
+        return object()
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    FakeSpeckleClient.instances = []
+    monkeypatch.setattr(get_client_module, "SpeckleClient", FakeSpeckleClient)
+    monkeypatch.setattr(get_client_module, "_dotenv_loaded", True)
+    monkeypatch.setenv("SPECKLE_TOKEN", "token-1")
+    monkeypatch.setenv("SPECKLE_CLIENT_HEALTH_CHECK_SECONDS", "0")
+    reset_client()
+    yield
+    reset_client()
+
+
+def test_client_is_created_once_and_reused():
+    assert get_client() is get_client()
+    assert len(FakeSpeckleClient.instances) == 1
+
+
+def test_threads_share_one_client():
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(get_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FakeSpeckleClient.instances) == 1
+    assert all(client is clients[0] for client in clients)
+
+
+def test_expired_client_is_re_authenticated():
+    first = get_client()
+    first.healthy = False
+
+    second = get_client()
+
+    assert second is not first
+    assert second.token == "token-1"
+
+
+def test_health_check_is_throttled(monkeypatch):
+    monkeypatch.setenv("SPECKLE_CLIENT_HEALTH_CHECK_SECONDS", "3600")
+    first = get_client()
+    first.healthy = False
+
+    assert get_client() is first
+
+
+def test_changed_token_creates_new_client(monkeypatch):
+    first = get_client()
+    monkeypatch.setenv("SPECKLE_TOKEN", "token-2")
+
+    second = get_client()
+
+    assert second is not first
+    assert second.token == "token-2"
+
+
+def test_missing_token_raises(monkeypatch):
+    monkeypatch.delenv("SPECKLE_TOKEN")
+    with pytest.raises(ValueError):
+        get_client()
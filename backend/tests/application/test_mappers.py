@@ -0,0 +1,46 @@
+from specklepy.objects.base import Base
+
+from adapters.speckle.mappers import FULL, LIGHTWEIGHT, get_mapping_mode, speckle_to_facade, speckle_to_unit
+from domain.model.elements import GeometrySummary
+from domain.model.enum import ProgramType
+
+
+def make_speckle_unit():
+    mesh = Base()
+    mesh.vertices = [0.0, 0.0, 0.0, 4.0, 0.0, 0.0, 4.0, 2.0, 3.0, 0.0, 2.0, 3.0]
+    obj = Base()
+    obj.properties = {"cluster_id": "C1", "level": 2, "program": "living", "material": "Timber"}
+    obj.area = 12.345
+    obj.displayValue = [mesh]
+    return obj
+
+
+def test_full_mode_keeps_the_speckle_object(monkeypatch):
+    monkeypatch.delenv("SPECKLE_MAPPING_MODE", raising=False)
+    obj = make_speckle_unit()
+
+    unit = speckle_to_unit(obj)
+
+    assert get_mapping_mode() == FULL
+    assert unit.geometry is obj
+
+
+def test_lightweight_mode_keeps_only_scalars_and_a_summary():
+    unit = speckle_to_unit(make_speckle_unit(), LIGHTWEIGHT)
+
+    assert (unit.cluster_id, unit.level, unit.name, unit.area) == ("C1", 2, ProgramType.LIVING, 12.35)
+    assert unit.geometry == GeometrySummary(
+        centroid=(2.0, 1.0, 1.5), bbox_min=(0.0, 0.0, 0.0), bbox_max=(4.0, 2.0, 3.0)
+    )
+
+
+def test_lightweight_mode_is_selected_by_environment(monkeypatch):
+    monkeypatch.setenv("SPECKLE_MAPPING_MODE", "lightweight")
+
+    facade = speckle_to_facade(make_speckle_unit())
+
+    assert isinstance(facade.geometry, GeometrySummary)
+
+
+def test_summary_is_none_without_vertices():
+    assert GeometrySummary.from_vertices([]) is None
@@ -0,0 +1,139 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from application import metrics_backfill, metrics_service, metrics_workflow
+from application.metrics_backfill import backfill_versions, get_checkpoint_path
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import (
+    clear_cache,
+    get_latest_metrics,
+    get_version_entry,
+    list_all_metrics,
+    rebuild_index,
+    save_metrics,
+)
+from domain.loader import get_definitions_hash
+
+"""
+These tests check that a backfill pages through all versions, skips the ones
+already stored, bounds its concurrency and resumes from its checkpoint.
+"""
+
+
+class FakeVersions:
+    """get_versions returning `count` versions, newest first, in cursor-linked pages."""
+
+    def __init__(self, count):
+        self.ids = [f"v{i}" for i in range(count, 0, -1)]
+        self.calls = []
+
+    def get_versions(self, model_id, project_id, limit=25, cursor=None):
+        self.calls.append(cursor)
+        start = int(cursor) if cursor else 0
+        items = [
+            SimpleNamespace(id=version_id, created_at=f"2026-01-01T00:00:{60 - int(version_id[1:]):02d}Z")
+            for version_id in self.ids[start:start + limit]
+        ]
+        return SimpleNamespace(items=items, cursor=str(start + limit), total_count=len(self.ids))
+
+
+@pytest.fixture
+def fake_speckle(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(metrics_service, "calculate_all_metrics", lambda model: {"metric": {"total_value": model}})
+    monkeypatch.setattr(metrics_workflow, "calculate_all_metrics", lambda model: {"metric": {"total_value": model}})
+    monkeypatch.setattr(metrics_workflow, "ServerTransport", lambda stream_id, client: None)
+    versions = FakeVersions(7)
+    monkeypatch.setattr(metrics_backfill, "get_client", lambda: SimpleNamespace(version=versions))
+    clear_cache()
+    yield versions
+    clear_cache()
+
+
+def test_backfill_calculates_missing_versions_and_skips_stored(fake_speckle, monkeypatch):
+    save_metrics("v3", {"metric": {"total_value": 3}}, definitions_hash=get_definitions_hash())
+    received = []
+    monkeypatch.setattr(
+        metrics_workflow, "receive_data", lambda version, transport: received.append(version.id) or 1.0
+    )
+    progress = []
+
+    report = backfill_versions(page_size=3, concurrency=2, on_progress=lambda stage, value: progress.append(value))
+
+    assert sorted(received) == ["v1", "v2", "v4", "v5", "v6", "v7"]
+    assert (report.total, report.calculated, report.skipped, report.failed) == (7, 6, 1, {})
+    assert sorted(list_all_metrics()) == [f"v{i}" for i in range(1, 8)]
+    assert get_version_entry("v7")["created_at"] == "2026-01-01T00:00:53+00:00"
+    assert fake_speckle.calls == [None, "3", "6"]
+    assert progress[-1] == 1.0
+    assert report.versions_per_minute > 0
+    assert not get_checkpoint_path().exists()
+
+
+def test_backfill_bounds_concurrency(fake_speckle, monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def receive_data(version, transport):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return 1.0
+
+    monkeypatch.setattr(metrics_workflow, "receive_data", receive_data)
+
+    backfill_versions(page_size=7, concurrency=3)
+
+    assert 1 < peak[0] <= 3
+
+
+def test_backfill_resumes_from_checkpoint(fake_speckle, monkeypatch):
+    def receive_data(version, transport):
+        if version.id == "v4":
+            raise KeyboardInterrupt
+        return 1.0
+
+    monkeypatch.setattr(metrics_workflow, "receive_data", receive_data)
+    with pytest.raises(KeyboardInterrupt):
+        backfill_versions(page_size=3, concurrency=1)
+    assert get_checkpoint_path().exists()
+
+    monkeypatch.setattr(metrics_workflow, "receive_data", lambda version, transport: 1.0)
+    fake_speckle.calls.clear()
+    report = backfill_versions(page_size=3, concurrency=1)
+
+    # The first page is not fetched again; v3 and v2 were saved before the interruption
+    assert fake_speckle.calls == ["3", "6"]
+    assert (report.calculated, report.skipped) == (5, 2)
+    assert len(list_all_metrics()) == 7
+    assert not get_checkpoint_path().exists()
+
+
+def test_failed_versions_are_reported(fake_speckle, monkeypatch):
+    def receive_data(version, transport):
+        if version.id == "v2":
+            raise RuntimeError("download failed")
+        return 1.0
+
+    monkeypatch.setattr(metrics_workflow, "receive_data", receive_data)
+
+    report = backfill_versions(page_size=10, concurrency=2)
+
+    assert report.failed == {"v2": "download failed"}
+    assert report.calculated == 6
+
+
+def test_checkpoint_is_not_indexed_as_a_version(fake_speckle, monkeypatch):
+    save_metrics("v1", {"metric": {"total_value": 1}})
+    metrics_backfill._save_checkpoint("3", metrics_backfill.BackfillReport("project", "model"))
+
+    rebuild_index()
+
+    assert list(list_all_metrics()) == ["v1"]
+    assert get_latest_metrics() == {"metric": {"total_value": 1}}
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from application import metrics_jobs
+from application.metrics_jobs import (
+    FAILED,
+    SUCCEEDED,
+    JobQueueFullError,
+    get_job,
+    shutdown_jobs,
+    submit_calculation_job,
+)
+
+"""
+These tests check that calculations run on the worker pool, report their stage,
+that the queue applies backpressure once it is full, and that a running
+backfill neither delays calculations nor allows a second backfill.
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    shutdown_jobs(wait=True)
+    yield
+    shutdown_jobs(wait=True)
+
+
+def wait_for(job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job.status in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_runs_calculation_and_records_version(monkeypatch):
+    def fake_calculation(on_progress=None, force=False):
+        on_progress("calculating", 0.7)
+        return "version_1", {}, "calculated"
+
+    monkeypatch.setattr(metrics_jobs, "calculate_latest_metrics", fake_calculation)
+
+    job = wait_for(submit_calculation_job().id)
+
+    assert job.status == SUCCEEDED
+    assert job.stage == "done"
+    assert job.progress == 1.0
+    assert job.version_id == "version_1"
+    assert job.outcome == "calculated"
+
+
+def test_job_reports_failure(monkeypatch):
+    monkeypatch.setattr(metrics_jobs, "calculate_latest_metrics", lambda on_progress=None, force=False: None)
+
+    job = wait_for(submit_calculation_job().id)
+
+    assert job.status == FAILED
+    assert "No versions found" in job.error
+
+
+def test_full_queue_raises(monkeypatch):
+    monkeypatch.setenv("METRICS_JOB_QUEUE_DEPTH", "2")
+    release = threading.Event()
+
+    def blocking_calculation(on_progress=None, force=False):
+        release.wait(5)
+        return "version_1", {}, "calculated"
+
+    monkeypatch.setattr(metrics_jobs, "calculate_latest_metrics", blocking_calculation)
+
+    first = submit_calculation_job()
+    second = submit_calculation_job()
+    with pytest.raises(JobQueueFullError):
+        submit_calculation_job()
+
+    release.set()
+    wait_for(first.id)
+    wait_for(second.id)
+    assert submit_calculation_job() is not None
+
+
+def test_backfill_job_records_summary(monkeypatch):
+    class FakeReport:
+        def to_dict(self):
+            return {"calculated": 2, "versions_per_minute": 10.0}
+
+    def fake_backfill(force=False, on_progress=None):
+        on_progress("backfilling", 0.5)
+        return FakeReport()
+
+    monkeypatch.setattr(metrics_jobs, "backfill_versions", fake_backfill)
+
+    job = wait_for(metrics_jobs.submit_backfill_job().id)
+
+    assert job.status == SUCCEEDED
+    assert job.to_dict()["kind"] == "backfill"
+    assert job.summary == {"calculated": 2, "versions_per_minute": 10.0}
+
+
+def test_backfill_runs_beside_calculations_and_only_once(monkeypatch):
+    monkeypatch.setenv("METRICS_JOB_QUEUE_DEPTH", "1")
+    release = threading.Event()
+
+    def blocking_backfill(force=False, on_progress=None):
+        release.wait(5)
+        raise RuntimeError("stopped")
+
+    monkeypatch.setattr(metrics_jobs, "backfill_versions", blocking_backfill)
+    monkeypatch.setattr(
+        metrics_jobs, "calculate_latest_metrics", lambda on_progress=None, force=False: ("version_1", {}, "calculated")
+    )
+
+    backfill = metrics_jobs.submit_backfill_job()
+    with pytest.raises(JobQueueFullError):
+        metrics_jobs.submit_backfill_job()
+
+    # The calculation neither waits for the backfill nor counts against its queue
+    assert wait_for(submit_calculation_job().id).status == SUCCEEDED
+
+    release.set()
+    assert wait_for(backfill.id).status == FAILED
+    assert metrics_jobs.submit_backfill_job() is not None
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from application import metrics_service
+from application.metrics_service import CALCULATED, COALESCED, SKIPPED, calculate_version_once
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import clear_cache
+
+"""
+These tests check that calculations are skipped when up-to-date metrics exist
+and that concurrent calls for the same version share one calculation.
+"""
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(metrics_service, "calculate_all_metrics", lambda model: {"metric": {"total_value": model}})
+    clear_cache()
+    yield tmp_path
+    clear_cache()
+
+
+def test_existing_version_with_same_definitions_is_skipped():
+    calls = []
+
+    def load_model():
+        calls.append(1)
+        return 0.5
+
+    first = calculate_version_once("v1", load_model)
+    second = calculate_version_once("v1", load_model)
+
+    assert first[1] == CALCULATED
+    assert second == ({"metric": {"total_value": 0.5}}, SKIPPED)
+    assert len(calls) == 1
+
+
+def test_force_recalculates_existing_version():
+    calculate_version_once("v1", lambda: 0.5)
+
+    metrics, outcome = calculate_version_once("v1", lambda: 0.7, force=True)
+
+    assert outcome == CALCULATED
+    assert metrics == {"metric": {"total_value": 0.7}}
+
+
+def test_changed_definitions_trigger_recalculation(monkeypatch):
+    calculate_version_once("v1", lambda: 0.5)
+    monkeypatch.setattr(metrics_service, "get_definitions_hash", lambda: "changed")
+
+    _, outcome = calculate_version_once("v1", lambda: 0.6)
+
+    assert outcome == CALCULATED
+
+
+def test_concurrent_calls_share_one_calculation():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_load_model():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 0.5
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(calculate_version_once("v1", slow_load_model)))
+    owner.start()
+    started.wait(5)
+
+    joiner = threading.Thread(target=lambda: results.append(calculate_version_once("v1", slow_load_model)))
+    joiner.start()
+    joiner.join(0.2)  # give the joiner time to block on the in-flight calculation
+    release.set()
+    owner.join(5)
+    joiner.join(5)
+
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in results) == [CALCULATED, COALESCED]
@@ -0,0 +1,87 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from application import metrics_service, metrics_workflow
+from config import PROJECT_ID, SOURCE_MODEL_ID, ProjectConfig, get_projects
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import clear_cache, get_latest_version_id, project_storage
+
+"""
+These tests check that several project/model pairs are calculated concurrently
+into separate storage namespaces, with a bounded number of Speckle fetches.
+"""
+
+
+@pytest.fixture(autouse=True)
+def fake_speckle(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(metrics_workflow, "_fetch_semaphore", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(metrics_workflow, "get_client", lambda: object())
+    monkeypatch.setattr(metrics_workflow, "ServerTransport", lambda stream_id, client: stream_id)
+    monkeypatch.setattr(
+        metrics_workflow,
+        "get_latest_version",
+        lambda client, project_id, model_id: SimpleNamespace(id=f"{model_id}-v1", created_at=None),
+    )
+    monkeypatch.setattr(metrics_service, "calculate_all_metrics", lambda model: {"metric": {"total_value": model}})
+    monkeypatch.setattr(metrics_workflow, "calculate_all_metrics", lambda model: {"metric": {"total_value": model}})
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def test_get_projects_parses_pairs_and_defaults(monkeypatch):
+    monkeypatch.delenv("SPECKLE_PROJECTS", raising=False)
+    assert get_projects() == [ProjectConfig(PROJECT_ID, SOURCE_MODEL_ID)]
+
+    monkeypatch.setenv("SPECKLE_PROJECTS", "p1:m1, p2:m2,p1:m1")
+    assert get_projects() == [ProjectConfig("p1", "m1"), ProjectConfig("p2", "m2")]
+
+    monkeypatch.setenv("SPECKLE_PROJECTS", "p1")
+    with pytest.raises(ValueError):
+        get_projects()
+
+
+def test_projects_are_stored_in_separate_namespaces(monkeypatch):
+    monkeypatch.setattr(metrics_workflow, "receive_data", lambda version, transport: f"{transport}-model")
+    projects = [ProjectConfig(PROJECT_ID, SOURCE_MODEL_ID), ProjectConfig("p2", "m2")]
+    progress = []
+
+    runs = metrics_workflow.calculate_projects(
+        projects, on_progress=lambda project_id, stage, value: progress.append((project_id, stage))
+    )
+
+    assert [run.error for run in runs] == [None, None]
+    assert runs[1].result == ("m2-v1", {"metric": {"total_value": "p2-model"}}, "calculated")
+    assert get_latest_version_id() == f"{SOURCE_MODEL_ID}-v1"
+    with project_storage("p2_m2"):
+        assert get_latest_version_id() == "m2-v1"
+    assert ("p2", "done") in progress and (PROJECT_ID, "done") in progress
+
+
+def test_fetches_are_bounded_and_failures_isolated(monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def receive_data(version, transport):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        if transport == "broken":
+            raise RuntimeError("download failed")
+        return 1.0
+
+    monkeypatch.setattr(metrics_workflow, "receive_data", receive_data)
+    projects = [ProjectConfig(f"p{i}", f"m{i}") for i in range(5)] + [ProjectConfig("broken", "m")]
+
+    runs = metrics_workflow.calculate_projects(projects)
+
+    assert peak[0] == 2
+    assert [run.error is None for run in runs] == [True] * 5 + [False]
+    assert all(run.result[2] == "calculated" for run in runs[:5])
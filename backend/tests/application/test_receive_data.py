@@ -1,4 +1,7 @@
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
+from adapters.speckle import object_cache
+from adapters.speckle.object_cache import ObjectCacheTransport
 from adapters.speckle.receive_data import receive_data
 
 """
@@ -6,7 +9,20 @@ This test checks that operations.receive is called with the correct arguments
 and returns a Model object with units, open spaces, and facades.
 """
 
-def test_receive_data_returns_received():
+def make_mock_result():
+    collections = []
+    for name in ("UNITS", "OPEN_SPACES", "FACADES"):
+        collection = MagicMock()
+        collection.name = name
+        collection.elements = []
+        collections.append(collection)
+    mock_result = MagicMock()
+    mock_result.elements = collections
+    return mock_result
+
+
+def test_receive_data_returns_received(monkeypatch):
+    monkeypatch.setenv("SPECKLE_OBJECT_CACHE", "false")
     mock_version = MagicMock()
     mock_version.referenced_object = "mock_object_id"
     mock_transport = MagicMock()
@@ -35,4 +51,61 @@ def test_receive_data_returns_received():
         assert result is not None
         assert hasattr(result, 'units')
         assert hasattr(result, 'open_spaces')
-        assert hasattr(result, 'facades')
\ No newline at end of file
+        assert hasattr(result, 'facades')
+
+def test_receive_data_uses_local_object_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPECKLE_OBJECT_CACHE_PATH", str(tmp_path / "objects.sqlite3"))
+    monkeypatch.setattr(object_cache, "_object_caches", {})
+    mock_version = MagicMock()
+    mock_version.referenced_object = "mock_object_id"
+    mock_transport = MagicMock()
+
+    with patch("adapters.speckle.receive_data.operations.receive", return_value=make_mock_result()) as mock_receive:
+        receive_data(mock_version, mock_transport)
+
+    object_id, remote, local = mock_receive.call_args.args
+    assert (object_id, remote) == ("mock_object_id", mock_transport)
+    assert isinstance(local, ObjectCacheTransport)
+
+
+def make_element(level, cluster_id, area, **properties):
+    return SimpleNamespace(
+        properties={"level": level, "cluster_id": cluster_id, **properties},
+        area=area,
+        speckle_type="Objects.Other.Element",
+    )
+
+
+def make_collection(name, elements):
+    collection = MagicMock()
+    collection.name = name
+    collection.elements = elements
+    return collection
+
+
+def test_receive_data_maps_in_one_pass_and_tolerates_missing_collections(monkeypatch):
+    monkeypatch.setenv("SPECKLE_OBJECT_CACHE", "false")
+    mock_result = MagicMock()
+    mock_result.elements = [
+        make_collection("UNITS", [
+            make_element(1, "A", 10.0, program="living"),
+            make_element(2, "A", 20.0, program="working"),
+            make_element(2, "B", 5.0, program="living"),
+        ]),
+        make_collection("ANNOTATIONS", [object()]),
+        make_collection("FACADES", [make_element(2, "B", 7.5, material="Glass")]),
+    ]
+
+    with patch("adapters.speckle.receive_data.operations.receive", return_value=mock_result):
+        model = receive_data(MagicMock(referenced_object="root"), MagicMock())
+
+    assert len(model.units) == 3
+    assert model.open_spaces == []
+    assert sorted(model.levels) == [1, 2]
+    assert sorted(model.clusters) == ["A", "B"]
+    columnar = model.columnar
+    assert columnar is not None
+    assert len(columnar.units) == 3 and len(columnar.facades) == 1
+    assert columnar.units.area.sum() == 35.0
+    assert list(columnar.sum_by_level(columnar.units, columnar.units.area)) == [10.0, 25.0]
+    assert len(columnar.open_spaces) == 0
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import pytest
+
+from adapters.speckle.snapshots import SnapshotVersion, load_snapshot, record_snapshot
+from application import metrics_workflow
+from application.metrics_service import calculate_full_metrics
+from domain.model.elements import Facade, GeometrySummary, OpenSpace, Unit
+from domain.model.enum import MaterialType, ProgramType
+from domain.model.model import Model
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import clear_cache, get_version_entry
+
+
+def make_model():
+    units = [
+        Unit(cluster_id="A", speckle_type="Unit", level=3, name=ProgramType.LIVING, area=50.0,
+             geometry=GeometrySummary((1.0, 2.0, 3.0), (0.0, 0.0, 0.0), (2.0, 4.0, 6.0)), element_id="u1"),
+        Unit(cluster_id="B", speckle_type="Unit", level=6, name=ProgramType.WORKING, area=80.25,
+             geometry=None, element_id="u2"),
+    ]
+    facades = [
+        Facade(cluster_id="A", speckle_type="Facade", level=3, material=MaterialType.GLASS, area=12.5,
+               thickness=0, geometry=None, element_id="f1"),
+    ]
+    open_spaces = [
+        OpenSpace(cluster_id="A", speckle_type="OpenSpace", level=9, area=100.0, geometry=None, element_id="g1"),
+    ]
+    return Model(units=units, facades=facades, open_spaces=open_spaces, levels=[3, 6], clusters=["A", "B"])
+
+
+def test_snapshot_round_trip_preserves_metrics(tmp_path):
+    model = make_model()
+    version = SnapshotVersion(id="v1", created_at="2026-01-01T10:00:00+00:00")
+
+    path = record_snapshot(version, model, tmp_path)
+    replayed_version, replayed = load_snapshot(path)
+
+    assert path == tmp_path / "v1.json.gz"
+    assert replayed_version == version
+    assert replayed.units == model.units
+    assert replayed.units[0].geometry.centroid == (1.0, 2.0, 3.0)
+    assert sorted(replayed.levels) == [3, 6]
+    assert calculate_full_metrics(replayed) == calculate_full_metrics(model)
+
+
+def test_unknown_snapshot_format_is_rejected(tmp_path):
+    path = tmp_path / "bad.json.gz"
+    path.write_bytes(gzip.compress(json.dumps({"format": 99}).encode()))
+
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+
+
+def test_workflow_replays_snapshot_without_network(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path / "cache")
+    clear_cache()
+    path = record_snapshot(SnapshotVersion(id="v1", created_at="2026-01-01T10:00:00Z"), make_model(), tmp_path)
+    monkeypatch.setenv("SPECKLE_SNAPSHOT_REPLAY", str(path))
+    monkeypatch.setattr(metrics_workflow, "get_client", lambda: pytest.fail("contacted Speckle"))
+    stages = []
+
+    version_id, metrics, outcome = metrics_workflow.calculate_latest_metrics(
+        on_progress=lambda stage, progress: stages.append(stage)
+    )
+
+    assert (version_id, outcome) == ("v1", "calculated")
+    assert metrics["daylight_potential"].total_value == pytest.approx(12.5 / 130.25)
+    assert get_version_entry("v1")["created_at"] == "2026-01-01T10:00:00+00:00"
+    assert stages == ["loading_snapshot", "calculating", "done"]
+    clear_cache()
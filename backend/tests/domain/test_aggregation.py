@@ -0,0 +1,70 @@
+import pytest
+
+from domain.metrics.aggregation import Aggregate
+from domain.model.columnar import ColumnarModel, MATERIAL_CODES
+from domain.model.elements import Facade, Unit
+from domain.model.enum import MaterialType, ProgramType
+
+"""
+These tests check that an Aggregate groups sums and counts by level, cluster,
+program and material, and derives ratios and means only for groups with elements.
+"""
+
+
+def make_unit(level, cluster, program, area):
+    return Unit(cluster_id=cluster, speckle_type="Unit", geometry=None, level=level, name=program, area=area)
+
+
+def make_facade(level, cluster, material, area):
+    return Facade(cluster_id=cluster, speckle_type="Facade", geometry=None, level=level,
+                  material=material, area=area, thickness=0.2)
+
+
+@pytest.fixture
+def columnar():
+    units = [
+        make_unit(0, "A", ProgramType.LIVING, 100.0),
+        make_unit(0, "B", ProgramType.WORKING, 50.0),
+        make_unit(3, "A", ProgramType.LIVING, 30.0),
+        make_unit(6, "C", ProgramType.SUPPORT, 0.0),
+    ]
+    facades = [
+        make_facade(0, "A", MaterialType.GLASS, 20.0),
+        make_facade(0, "A", MaterialType.CONCRETE, 40.0),
+        make_facade(3, "B", MaterialType.GLASS, 6.0),
+        make_facade(9, "D", MaterialType.GLASS, 5.0),
+    ]
+    return ColumnarModel.from_elements(units, facades, [])
+
+
+def test_sums_and_counts_per_group(columnar):
+    area = Aggregate(columnar, columnar.units, columnar.units.area)
+
+    assert (area.total, area.count) == (180.0, 4)
+    assert area.sum_per_program() == {ProgramType.LIVING: 130.0, ProgramType.WORKING: 50.0}
+    assert area.mean_per_level([6, 3, 0, 12]) == {6: 0.0, 3: 30.0, 0: 75.0}
+    assert area.mean_per_cluster(["A", "C"]) == {"A": 65.0, "C": 0.0}
+
+    facade_area = Aggregate(columnar, columnar.facades, columnar.facades.area)
+    assert facade_area.sum_per_material() == {MaterialType.CONCRETE: 40.0, MaterialType.GLASS: 31.0}
+
+
+def test_mask_selects_elements(columnar):
+    glass = columnar.facades.material == MATERIAL_CODES["Glass"]
+    windows = Aggregate(columnar, columnar.facades, columnar.facades.area, glass)
+    counts = Aggregate(columnar, columnar.facades, mask=glass)
+
+    assert (windows.total, windows.count) == (31.0, 3)
+    assert counts.total == 3.0
+    assert counts.sum_per_material() == {MaterialType.GLASS: 3.0}
+
+
+def test_ratios_skip_groups_without_denominator_elements(columnar):
+    glass = columnar.facades.material == MATERIAL_CODES["Glass"]
+    windows = Aggregate(columnar, columnar.facades, columnar.facades.area, glass)
+    program = Aggregate(columnar, columnar.units, columnar.units.area)
+
+    assert windows.ratio(program) == pytest.approx(31.0 / 180.0)
+    # Level 6 has a unit of area 0 (ratio 0.0); level 9 has facades but no units
+    assert windows.ratio_per_level(program, [0, 3, 6, 9]) == pytest.approx({0: 20 / 150, 3: 0.2, 6: 0.0})
+    assert windows.ratio_per_cluster(program, ["A", "B", "C", "D"]) == pytest.approx({"A": 20 / 130, "B": 6 / 50, "C": 0.0})
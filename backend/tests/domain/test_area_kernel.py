@@ -0,0 +1,168 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from domain.loader import load_rulebook
+from domain.metrics.area_kernel import CARBON_TARGET, calculate_area_metrics, get_rulebook_tables
+from domain.metrics.daylight_potential import aggregate_unit_area
+from domain.model.columnar import ColumnarModel
+from domain.model.elements import Facade, Unit
+from domain.model.enum import MaterialType, ProgramType
+
+"""
+These tests check that the fused area kernel matches a direct per-group
+computation of the area-based metrics, including facades without a
+thickness and units or facades with an unknown program or material.
+"""
+
+LEVELS = [0, 3, 6, 9]
+CLUSTERS = ["A", "B", "C", "D"]
+
+
+def make_unit(level, cluster, program, area):
+    return Unit(cluster_id=cluster, speckle_type="Unit", geometry=None, level=level, name=program, area=area)
+
+
+def make_facade(level, cluster, material, area, thickness):
+    return Facade(cluster_id=cluster, speckle_type="Facade", geometry=None, level=level,
+                  material=material, area=area, thickness=thickness)
+
+
+@pytest.fixture
+def elements():
+    units = [
+        make_unit(0, "A", ProgramType.LIVING, 100.0),
+        make_unit(0, "A", ProgramType.CIRCULATION, 20.0),
+        make_unit(0, "B", ProgramType.WORKING, 50.0),
+        make_unit(3, "A", ProgramType.LIVING, 30.0),
+        make_unit(3, "B", ProgramType.SUPPORT, 10.0),
+        make_unit(3, "B", "Unknown", 5.0),
+        make_unit(6, "C", ProgramType.COMMUNITY, 40.0),
+    ]
+    facades = [
+        make_facade(0, "A", MaterialType.GLASS, 20.0, 0.02),
+        make_facade(0, "B", MaterialType.CONCRETE, 40.0, None),
+        make_facade(3, "A", MaterialType.TIMBER, 10.0, 0.3),
+        make_facade(6, "C", "Unknown", 15.0, 0.1),
+        make_facade(9, "D", MaterialType.STEEL, 5.0, 0.01),
+    ]
+    return units, facades
+
+
+def naive_metrics(units, facades):
+    """Direct evaluation of the area-based metrics over element lists."""
+    rulebook = load_rulebook()
+    programs, materials = rulebook["program_types"], rulebook["material_types"]
+
+    def program(unit):
+        return getattr(unit.name, "value", unit.name)
+
+    total_area = sum(unit.area for unit in units)
+    known = [unit for unit in units if program(unit) in programs]
+    counts = {}
+    for unit in known:
+        counts[program(unit)] = counts.get(program(unit), 0) + 1
+    known_units = sum(counts.values())
+    diversity = 1 - sum(n * n for n in counts.values()) / known_units ** 2 if known_units else 0.0
+
+    carbon = 0.0
+    for facade in facades:
+        material = materials.get(getattr(facade.material, "value", facade.material))
+        if material is None:
+            continue
+        carbon += facade.area * (facade.thickness or 0.0) * material["density"] * material["carbon_factor"]
+
+    def area_of(predicate):
+        return sum(unit.area for unit in known if predicate(programs[program(unit)], program(unit)))
+
+    if total_area == 0:
+        return {"program_diversity_index": diversity, "circulation_efficiency": 0.0, "occupancy_efficiency": 0.0,
+                "carbon_efficiency": 0.0}
+    return {
+        "program_diversity_index": diversity,
+        "circulation_efficiency": 1 - area_of(lambda rules, name: name == "Circulation") / total_area,
+        "occupancy_efficiency": area_of(lambda rules, name: rules["is_usable"]) / total_area,
+        "carbon_efficiency": max(0.0, 1 - carbon / total_area / CARBON_TARGET),
+    }
+
+
+def test_kernel_matches_naive_per_group(elements):
+    units, facades = elements
+    result = calculate_area_metrics(ColumnarModel.from_elements(units, facades, []), LEVELS, CLUSTERS)
+
+    expected_total = naive_metrics(units, facades)
+    for name, value in expected_total.items():
+        grouped = getattr(result, name)
+        assert grouped.total_value == pytest.approx(value), name
+
+        # Levels and clusters without units are left out
+        assert set(grouped.value_per_level) == {0, 3, 6}
+        assert set(grouped.value_per_cluster) == {"A", "B", "C"}
+        for level in grouped.value_per_level:
+            expected = naive_metrics([u for u in units if u.level == level], [f for f in facades if f.level == level])
+            assert grouped.value_per_level[level] == pytest.approx(expected[name]), (name, level)
+        for cluster in grouped.value_per_cluster:
+            expected = naive_metrics([u for u in units if u.cluster_id == cluster],
+                                     [f for f in facades if f.cluster_id == cluster])
+            assert grouped.value_per_cluster[cluster] == pytest.approx(expected[name]), (name, cluster)
+
+
+def test_chart_shares(elements):
+    units, facades = elements
+    result = calculate_area_metrics(ColumnarModel.from_elements(units, facades, []), LEVELS, CLUSTERS)
+
+    # The concrete facade has no thickness and adds no carbon
+    glass = 20.0 * 0.02 * 2500 * 1.0
+    timber = 10.0 * 0.3 * 500 * 0.05
+    steel = 5.0 * 0.01 * 7850 * 2.0
+    total = glass + timber + steel
+    assert result.carbon_shares == pytest.approx({
+        "Glass": glass / total * 100,
+        "Timber": timber / total * 100,
+        "Steel": steel / total * 100,
+    })
+    assert sum(result.program_shares.values()) == pytest.approx(100.0)
+    assert result.program_shares["Living"] == pytest.approx(2 / 6 * 100)
+    # Community is green; circulation, support and the unknown program are neither usable nor green
+    assert result.occupancy_shares == pytest.approx({
+        "Usable": 180.0 / 255.0 * 100,
+        "Green": 40.0 / 255.0 * 100,
+        "Other": 35.0 / 255.0 * 100,
+    })
+
+
+def test_shares_follow_the_rulebook_green_flag(elements):
+    units, facades = elements
+    columnar = ColumnarModel.from_elements(units, facades, [])
+    tables = get_rulebook_tables()
+    not_green = replace(tables, is_green=np.zeros_like(tables.is_green))
+
+    result = calculate_area_metrics(columnar, LEVELS, CLUSTERS, not_green)
+
+    assert result.occupancy_shares == pytest.approx({"Usable": 220.0 / 255.0 * 100, "Other": 35.0 / 255.0 * 100})
+
+
+def test_areas_are_relative_to_the_daylight_net_floor_area(elements):
+    units, facades = elements
+    columnar = ColumnarModel.from_elements(units, facades, [])
+    result = calculate_area_metrics(columnar, LEVELS, CLUSTERS)
+
+    net_floor_area = aggregate_unit_area(columnar)
+    usable = {0: 150.0, 3: 30.0, 6: 40.0}
+    assert usable == pytest.approx({
+        level: value * net_floor_area.sum_per_level_code[columnar.level_index(level)]
+        for level, value in result.occupancy_efficiency.value_per_level.items()
+    })
+
+
+def test_empty_model_scores_zero():
+    result = calculate_area_metrics(ColumnarModel.from_elements([], [], []), LEVELS, CLUSTERS)
+
+    assert result.occupancy_efficiency.total_value == 0.0
+    assert result.carbon_efficiency.value_per_level == {}
+    assert (result.program_shares, result.occupancy_shares, result.carbon_shares) == ({}, {}, {})
+
+
+def test_rulebook_tables_are_cached():
+    assert get_rulebook_tables() is get_rulebook_tables()
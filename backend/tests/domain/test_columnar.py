@@ -0,0 +1,88 @@
+import random
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from domain.metrics.daylight_potential import get_daylight_potential_metric, get_daylight_potential_metric_columnar
+from domain.model.columnar import MATERIAL_CODES, PROGRAM_CODES, UNKNOWN, ColumnarModel
+from domain.model.elements import Facade, OpenSpace, Unit
+from domain.model.enum import MaterialType, ProgramType
+from domain.model.model import Model
+
+"""
+These tests check that the columnar model encodes elements faithfully and that
+vectorized metrics match the list-based ones.
+"""
+
+
+def random_model(seed, units=300, facades=200):
+    rng = random.Random(seed)
+    return Model(
+        units=[
+            Unit(cluster_id=rng.choice("ABCD"), speckle_type="Unit", geometry=None, level=rng.randrange(0, 30, 3),
+                 name=rng.choice(list(ProgramType)), area=rng.uniform(0, 120))
+            for _ in range(units)
+        ],
+        facades=[
+            Facade(cluster_id=rng.choice("ABCDE"), speckle_type="Facade", geometry=None, level=rng.randrange(0, 33, 3),
+                   material=rng.choice(list(MaterialType)), area=rng.uniform(0, 40), thickness=0.2)
+            for _ in range(facades)
+        ],
+        open_spaces=[OpenSpace(cluster_id="A", speckle_type="OpenSpace", geometry=None, level=6, area=50.0)],
+        levels=list(range(-3, 36, 3)),
+        clusters=["A", "B", "C", "D", "E", "missing"],
+    )
+
+
+def test_columns_encode_levels_clusters_programs_and_materials():
+    model = random_model(1, units=20, facades=10)
+    columnar = ColumnarModel.from_model(model)
+
+    units = columnar.units
+    assert len(units) == 20
+    for i, unit in enumerate(model.units):
+        assert columnar.level_values[units.level_code[i]] == unit.level
+        assert columnar.clusters[units.cluster[i]] == unit.cluster_id
+        assert units.program[i] == PROGRAM_CODES[unit.name.value]
+        assert units.material[i] == UNKNOWN
+    assert list(columnar.facades.material) == [MATERIAL_CODES[f.material.value] for f in model.facades]
+    assert columnar.level_index(4) is None
+    assert columnar.cluster_index("missing") is None
+
+
+def test_sum_by_level_matches_python_grouping():
+    model = random_model(2)
+    columnar = model.get_columnar()
+
+    sums = columnar.sum_by_level(columnar.units, columnar.units.area)
+    counts = columnar.sum_by_level(columnar.units)
+
+    for level in {unit.level for unit in model.units}:
+        level_units = [unit for unit in model.units if unit.level == level]
+        position = columnar.level_index(level)
+        assert counts[position] == len(level_units)
+        assert sums[position] == pytest.approx(sum(unit.area for unit in level_units))
+
+
+@pytest.mark.parametrize("seed", [3, 4, 5])
+def test_columnar_daylight_matches_list_based(seed):
+    model = random_model(seed)
+
+    expected = get_daylight_potential_metric(model.facades, model.units, model.levels, model.clusters)
+    actual = get_daylight_potential_metric_columnar(model.get_columnar(), model.levels, model.clusters)
+
+    assert list(actual.value_per_level) == list(expected.value_per_level)
+    assert list(actual.value_per_cluster) == list(expected.value_per_cluster)
+    for key, value in asdict(expected).items():
+        assert asdict(actual)[key] == pytest.approx(value)
+
+
+def test_empty_model_has_empty_columns():
+    model = Model(units=[], facades=[], open_spaces=[], levels=[], clusters=[])
+
+    metric = get_daylight_potential_metric_columnar(model.get_columnar(), model.levels, model.clusters)
+
+    assert metric.total_value == 0.0
+    assert metric.value_per_level == {} and metric.value_per_cluster == {}
+    assert model.get_columnar().units.level.dtype == np.int64
@@ -0,0 +1,114 @@
+import random
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from domain.metrics.green_space_index import (
+    calculate_green_space_index_avg,
+    calculate_green_space_index_per_cluster,
+    calculate_green_space_index_per_level,
+    get_distance_to_nearest_green,
+    get_distances_to_nearest_green,
+    get_green_space_index_metric,
+    get_green_space_index_metric_columnar,
+)
+from domain.model.elements import OpenSpace, Unit
+from domain.model.enum import ProgramType
+from domain.model.model import Model
+
+"""
+These tests check the binary-search green space engine against the direct
+definition: each residential unit scores max(0, 1 - distance / 300) for the
+vertical distance to its nearest green space.
+"""
+
+
+def make_unit(level, cluster="A", program=ProgramType.LIVING):
+    return Unit(cluster_id=cluster, speckle_type="Unit", geometry=None, level=level, name=program, area=10.0)
+
+
+def make_green(level):
+    return OpenSpace(cluster_id="G", speckle_type="OpenSpace", geometry=None, level=level, area=50.0)
+
+
+def brute_force_metric(units, green_spaces, levels, clusters):
+    def score(unit):
+        distance = min((abs(unit.level - g.level) for g in green_spaces), default=300.0)
+        return max(0, 1 - distance / 300)
+
+    residential = [unit for unit in units if unit.name == ProgramType.LIVING]
+
+    def average(group):
+        return sum(score(unit) for unit in group) / len(group)
+
+    per_level = {level: [u for u in residential if u.level == level] for level in levels}
+    per_cluster = {cluster: [u for u in residential if u.cluster_id == cluster] for cluster in clusters}
+    return (
+        average(residential),
+        {level: average(group) for level, group in per_level.items() if group},
+        {cluster: average(group) for cluster, group in per_cluster.items() if group},
+    )
+
+
+def test_distances_use_nearest_green_level_on_either_side():
+    green_levels = np.array([0, 30, 90])
+
+    distances = get_distances_to_nearest_green(np.array([-10, 0, 14, 16, 60, 200]), green_levels)
+
+    assert distances.tolist() == [10, 0, 14, 14, 30, 110]
+    assert get_distance_to_nearest_green(make_unit(45), [make_green(90), make_green(30)]) == 15
+    assert get_distance_to_nearest_green(make_unit(45), []) == 300.0
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_metric_matches_direct_definition(seed):
+    rng = random.Random(seed)
+    units = [
+        make_unit(rng.randrange(0, 400, 4), rng.choice("ABC"), rng.choice([ProgramType.LIVING, ProgramType.WORKING]))
+        for _ in range(500)
+    ]
+    green_spaces = [make_green(rng.randrange(0, 400, 4)) for _ in range(rng.randrange(0, 6))]
+    levels = list(range(0, 404, 4))
+    clusters = ["C", "B", "A", "D"]
+
+    metric = get_green_space_index_metric(units, green_spaces, levels, clusters)
+    total, per_level, per_cluster = brute_force_metric(units, green_spaces, levels, clusters)
+
+    assert metric.total_value == pytest.approx(total)
+    assert list(metric.value_per_level) == list(per_level)
+    assert metric.value_per_level == pytest.approx(per_level)
+    assert list(metric.value_per_cluster) == list(per_cluster)
+    assert metric.value_per_cluster == pytest.approx(per_cluster)
+
+
+def test_columnar_metric_uses_model_columns():
+    units = [make_unit(0, "A"), make_unit(10, "B"), make_unit(10, "B", ProgramType.SUPPORT)]
+    model = Model(units=units, facades=[], open_spaces=[make_green(4)], levels=[0, 10], clusters=["A", "B"])
+
+    columnar = get_green_space_index_metric_columnar(model.get_columnar(), model.levels, model.clusters)
+
+    assert asdict(columnar) == asdict(get_green_space_index_metric(units, model.open_spaces, [0, 10], ["A", "B"]))
+    assert columnar.value_per_cluster == pytest.approx({"A": 1 - 4 / 300, "B": 1 - 6 / 300})
+
+
+def test_model_without_residential_units_scores_zero():
+    metric = get_green_space_index_metric([make_unit(0, program=ProgramType.WORKING)], [make_green(4)], [0], ["A"])
+
+    assert metric.total_value == 0.0
+    assert (metric.value_per_level, metric.value_per_cluster) == ({}, {})
+    assert metric.chart_data.values == {}
+
+
+def test_unit_list_helpers_score_every_given_unit():
+    units = [make_unit(0, "A"), make_unit(10, "B"), make_unit(10, "B", ProgramType.SUPPORT)]
+    green_spaces = [make_green(40)]
+    levels, clusters = [0, 10, 20], ["A", "B"]
+
+    # The helpers take already-filtered units, so the support unit is scored too
+    total, per_level, per_cluster = brute_force_metric(
+        [Unit(**{**asdict(unit), "name": ProgramType.LIVING}) for unit in units], green_spaces, levels, clusters
+    )
+    assert calculate_green_space_index_avg(units, green_spaces) == pytest.approx(total)
+    assert calculate_green_space_index_per_level(units, green_spaces, levels) == pytest.approx(per_level)
+    assert calculate_green_space_index_per_cluster(units, green_spaces, clusters) == pytest.approx(per_cluster)
@@ -0,0 +1,179 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from application.metrics_service import calculate_full_metrics, verify_metrics_match
+from domain.metrics.incremental import IncrementalMetrics
+from domain.model.elements import Facade, ModelElement, OpenSpace, Unit
+from domain.model.enum import MaterialType, ProgramType
+from domain.model.model import Model
+
+PROGRAMS = [ProgramType.LIVING, ProgramType.WORKING, ProgramType.LEISURE]
+MATERIALS = [MaterialType.GLASS, MaterialType.CONCRETE]
+
+
+def make_unit(i, rng):
+    return Unit(
+        cluster_id=rng.choice("ABC"), speckle_type="Unit", geometry=None, level=rng.randrange(0, 60, 3),
+        name=rng.choice(PROGRAMS), area=round(rng.uniform(0, 120), 2), element_id=f"unit-{i}",
+    )
+
+
+def make_facade(i, rng):
+    return Facade(
+        cluster_id=rng.choice("ABC"), speckle_type="Facade", geometry=None, level=rng.randrange(0, 60, 3),
+        material=rng.choice(MATERIALS), area=round(rng.uniform(0, 40), 2), thickness=0, element_id=f"facade-{i}",
+    )
+
+
+def make_open_space(i, rng):
+    return OpenSpace(
+        cluster_id=rng.choice("ABC"), speckle_type="OpenSpace", geometry=None, level=rng.randrange(0, 60, 3),
+        area=round(rng.uniform(10, 200), 2), element_id=f"green-{i}",
+    )
+
+
+def make_model(units, facades, open_spaces):
+    return Model(
+        units=units, facades=facades, open_spaces=open_spaces,
+        levels=list({unit.level for unit in units}), clusters=list({unit.cluster_id for unit in units}),
+    )
+
+
+def incremental_metrics(state, model):
+    full = calculate_full_metrics(model)
+    return {
+        **full,
+        "green_space_index": state.green_space_index_metric(model.levels, model.clusters),
+        "daylight_potential": state.daylight_potential_metric(model.levels, model.clusters),
+    }
+
+
+def test_incremental_updates_match_full_recompute_across_versions():
+    rng = random.Random(7)
+    units = [make_unit(i, rng) for i in range(200)]
+    facades = [make_facade(i, rng) for i in range(150)]
+    open_spaces = [make_open_space(i, rng) for i in range(5)]
+    model = make_model(units, facades, open_spaces)
+    state = IncrementalMetrics.from_model(model)
+    verify_metrics_match(incremental_metrics(state, model), calculate_full_metrics(model))
+
+    next_id = 1000
+    for _ in range(20):
+        # Edit a few elements: content changes produce new ids
+        for _ in range(3):
+            i = rng.randrange(len(units))
+            units[i] = replace(make_unit(next_id, rng), element_id=f"unit-{next_id}")
+            next_id += 1
+        facades.pop(rng.randrange(len(facades)))
+        facades.append(make_facade(next_id, rng))
+        if rng.random() < 0.3:
+            open_spaces[rng.randrange(len(open_spaces))] = make_open_space(next_id, rng)
+        next_id += 1
+
+        model = make_model(units, facades, open_spaces)
+        assert state.update(model)
+        verify_metrics_match(incremental_metrics(state, model), calculate_full_metrics(model))
+
+
+def test_only_changed_elements_are_applied():
+    rng = random.Random(1)
+    units = [make_unit(i, rng) for i in range(50)]
+    state = IncrementalMetrics.from_model(make_model(units, [], []))
+
+    units[0] = make_unit(99, rng)
+    state.update(make_model(units, [], []))
+
+    assert state.last_diff == (1, 1)
+
+
+def test_identical_elements_sharing_an_id_are_counted():
+    unit = Unit(cluster_id="A", speckle_type="Unit", geometry=None, level=3,
+                name=ProgramType.LIVING, area=10.0, element_id="same")
+    model = make_model([unit, unit], [], [])
+    state = IncrementalMetrics.from_model(model)
+
+    model = make_model([unit], [], [])
+    state.update(model)
+
+    verify_metrics_match(incremental_metrics(state, model), calculate_full_metrics(model))
+
+
+def test_elements_without_ids_cannot_be_diffed():
+    unit = Unit(cluster_id="A", speckle_type="Unit", geometry=None, level=3,
+                name=ProgramType.LIVING, area=10.0)
+    assert IncrementalMetrics.from_model(make_model([unit], [], [])) is None
+
+
+def test_verification_reports_mismatch():
+    rng = random.Random(3)
+    model = make_model([make_unit(i, rng) for i in range(20)], [make_facade(0, rng)], [make_open_space(0, rng)])
+    metrics = calculate_full_metrics(model)
+    tampered = {**metrics, "daylight_potential": replace(metrics["daylight_potential"], total_value=1.5)}
+
+    with pytest.raises(AssertionError, match="daylight_potential.total_value"):
+        verify_metrics_match(tampered, metrics)
+
+
+def test_calculate_all_metrics_verifies_incremental_results(monkeypatch):
+    from application import metrics_service
+
+    monkeypatch.setenv("INCREMENTAL_METRICS", "true")
+    monkeypatch.setenv("INCREMENTAL_VERIFY", "true")
+    monkeypatch.setattr(metrics_service, "_incremental_states", {})
+    rng = random.Random(5)
+    units = [make_unit(i, rng) for i in range(30)]
+    units[0] = replace(units[0], name=ProgramType.LIVING)
+    facades = [make_facade(i, rng) for i in range(10)]
+    open_spaces = [make_open_space(0, rng)]
+
+    metrics_service.calculate_all_metrics(make_model(units, facades, open_spaces))
+    units[5] = make_unit(500, rng)
+    metrics = metrics_service.calculate_all_metrics(make_model(units, facades, open_spaces))
+
+    assert metrics_service._incremental_states[None].last_diff == (1, 1)
+    assert list(metrics)[:2] == ["green_space_index", "daylight_potential"]
+    assert len(metrics) == 8
+
+
+def test_state_keeps_records_not_elements():
+    rng = random.Random(7)
+    model = make_model([make_unit(i, rng) for i in range(5)], [make_facade(0, rng)], [make_open_space(0, rng)])
+
+    state = IncrementalMetrics.from_model(model)
+
+    assert len(state._records) == 7
+    assert not any(isinstance(record, ModelElement) for record in state._records.values())
+
+
+def test_model_without_residential_units_matches_full_recompute():
+    rng = random.Random(11)
+    units = [replace(make_unit(i, rng), name=ProgramType.WORKING) for i in range(10)]
+    model = make_model(units, [make_facade(0, rng)], [make_open_space(0, rng)])
+    state = IncrementalMetrics.from_model(model)
+
+    metrics = incremental_metrics(state, model)
+
+    assert metrics["green_space_index"].total_value == 0.0
+    verify_metrics_match(metrics, calculate_full_metrics(model))
+
+
+def test_green_scores_are_kept_until_open_spaces_change():
+    rng = random.Random(13)
+    units = [replace(make_unit(i, rng), name=ProgramType.LIVING) for i in range(20)]
+    open_spaces = [make_open_space(0, rng)]
+    model = make_model(units, [], open_spaces)
+    state = IncrementalMetrics.from_model(model)
+    state.green_space_index_metric(model.levels, model.clusters)
+    scores = state._green_scores
+
+    units[0] = replace(make_unit(100, rng), name=ProgramType.LIVING)
+    state.update(make_model(units, [], open_spaces))
+    assert state._green_scores is scores
+
+    open_spaces.append(replace(make_open_space(1, rng), level=open_spaces[0].level + 30))
+    model = make_model(units, [], open_spaces)
+    state.update(model)
+    assert state._green_scores is not scores
+    verify_metrics_match(incremental_metrics(state, model), calculate_full_metrics(model))
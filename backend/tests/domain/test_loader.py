@@ -0,0 +1,46 @@
+import json
+import os
+
+from domain.loader import METRIC_DEFINITIONS, DefinitionsFile, LiveDefinitions, load_metrics
+
+
+def write_json(path, data, mtime_offset_ns=0):
+    path.write_text(json.dumps(data))
+    if mtime_offset_ns:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset_ns))
+
+
+def test_definitions_are_parsed_once_and_shared():
+    assert load_metrics() is load_metrics()
+    assert METRIC_DEFINITIONS["daylight_potential"]["name"] == "Daylight Potential"
+
+
+def test_definitions_file_reloads_when_mtime_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEFINITIONS_RELOAD_INTERVAL", "0")
+    path = tmp_path / "metrics.json"
+    write_json(path, {"metric": {"benchmark": 0.5}})
+    definitions = DefinitionsFile(path)
+    live = LiveDefinitions(definitions)
+    first_digest = definitions.digest()
+
+    assert live["metric"]["benchmark"] == 0.5
+
+    write_json(path, {"metric": {"benchmark": 0.7}}, mtime_offset_ns=1_000_000)
+
+    assert live["metric"]["benchmark"] == 0.7
+    assert definitions.digest() != first_digest
+
+
+def test_definitions_file_skips_mtime_check_within_interval(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEFINITIONS_RELOAD_INTERVAL", "3600")
+    path = tmp_path / "metrics.json"
+    write_json(path, {"metric": {"benchmark": 0.5}})
+    definitions = DefinitionsFile(path)
+    definitions.get()
+
+    write_json(path, {"metric": {"benchmark": 0.7}}, mtime_offset_ns=1_000_000)
+    assert definitions.get()["metric"]["benchmark"] == 0.5
+
+    definitions.reload()
+    assert definitions.get()["metric"]["benchmark"] == 0.7
@@ -0,0 +1,74 @@
+import pytest
+
+from domain.metrics import registry
+from domain.metrics.registry import MetricContext, evaluate_metrics, register_intermediate, register_metric
+from domain.model.elements import Facade, OpenSpace, Unit
+from domain.model.enum import MaterialType, ProgramType
+from domain.model.model import Model
+
+"""
+These tests check that the metric registry runs only the requested metrics and
+computes each shared intermediate once per model.
+"""
+
+
+@pytest.fixture
+def model():
+    return Model(
+        units=[Unit(cluster_id="A", speckle_type="Unit", geometry=None, level=0, name=ProgramType.LIVING, area=100.0)],
+        facades=[Facade(cluster_id="A", speckle_type="Facade", geometry=None, level=0,
+                        material=MaterialType.GLASS, area=20.0, thickness=0.1)],
+        open_spaces=[OpenSpace(cluster_id="A", speckle_type="OpenSpace", geometry=None, level=30, area=50.0)],
+        levels=[0],
+        clusters=["A"],
+    )
+
+
+@pytest.fixture
+def scratch_registry(monkeypatch):
+    monkeypatch.setattr(registry, "INTERMEDIATES", dict(registry.INTERMEDIATES))
+    monkeypatch.setattr(registry, "METRIC_REGISTRY", dict(registry.METRIC_REGISTRY))
+
+
+def test_only_requested_metrics_and_their_intermediates_run(model):
+    context = MetricContext(model)
+
+    metrics = evaluate_metrics(model, ["daylight_potential"], context=context)
+
+    assert list(metrics) == ["daylight_potential"]
+    assert metrics["daylight_potential"].total_value == pytest.approx(0.2)
+    assert context.computed == ["columnar", "window_area", "unit_area"]
+
+
+def test_all_metrics_share_intermediates(model):
+    context = MetricContext(model)
+
+    metrics = evaluate_metrics(model, context=context)
+
+    assert list(metrics) == list(registry.METRIC_REGISTRY)
+    assert sorted(context.computed) == sorted(set(context.computed))
+    assert metrics["green_space_index"].total_value == pytest.approx(0.9)
+
+
+def test_new_metric_reuses_memoized_intermediates(model, scratch_registry):
+    calls = []
+    register_intermediate("unit_count", lambda ctx: calls.append(1) or len(ctx["columnar"].units))
+    register_metric("units_a", lambda ctx: ctx["unit_count"], requires=("unit_count",))
+    register_metric("units_b", lambda ctx: ctx["unit_count"] * 2, requires=("unit_count",))
+
+    metrics = evaluate_metrics(model, ["units_b", "units_a"])
+
+    assert metrics == {"units_a": 1, "units_b": 2}
+    assert calls == [1]
+
+
+def test_registry_rejects_unknown_names_and_cycles(model, scratch_registry):
+    with pytest.raises(KeyError):
+        evaluate_metrics(model, ["no_such_metric"])
+    with pytest.raises(ValueError):
+        register_metric("broken", lambda ctx: None, requires=("no_such_intermediate",))
+
+    register_intermediate("loop", lambda ctx: ctx["loop"])
+    register_metric("looping", lambda ctx: None, requires=("loop",))
+    with pytest.raises(RuntimeError):
+        evaluate_metrics(model, ["looping"])
@@ -0,0 +1,58 @@
+import pytest
+
+from infrastructure import clerk_auth
+from infrastructure.clerk_auth import (
+    _is_auth_rate_limited,
+    _record_auth_failure,
+    get_auth_failure_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    monkeypatch.setenv("AUTH_FAILURE_WINDOW_SECONDS", "60")
+    monkeypatch.setenv("AUTH_FAILURE_MAX_ATTEMPTS", "3")
+    monkeypatch.setattr(clerk_auth, "_auth_failure_stats", {"evictions": 0, "expirations": 0})
+    clerk_auth._auth_failures_by_ip.clear()
+    yield
+    clerk_auth._auth_failures_by_ip.clear()
+
+
+def test_failures_outside_window_stop_counting():
+    for now in (100.0, 110.0, 125.0):
+        _record_auth_failure("198.51.100.1", now=now)
+
+    assert _is_auth_rate_limited("198.51.100.1", now=126.0) is True
+    assert _is_auth_rate_limited("198.51.100.1", now=200.0) is False
+
+
+def test_window_memory_does_not_grow_with_failures():
+    for i in range(1000):
+        _record_auth_failure("198.51.100.1", now=100.0 + i * 0.01)
+
+    window = clerk_auth._auth_failures_by_ip["198.51.100.1"]
+    assert len(window.counts) == 10
+    assert window.total == 1000
+
+
+def test_tracked_ips_are_capped_with_lru_eviction(monkeypatch):
+    monkeypatch.setenv("AUTH_FAILURE_MAX_TRACKED_IPS", "100")
+
+    for i in range(1000):
+        _record_auth_failure(f"10.0.{i // 256}.{i % 256}", now=100.0)
+
+    stats = get_auth_failure_stats()
+    assert stats["tracked_ips"] == 100
+    assert stats["evictions"] == 900
+    assert "10.0.3.231" in clerk_auth._auth_failures_by_ip
+    assert "10.0.0.0" not in clerk_auth._auth_failures_by_ip
+
+
+def test_idle_ips_are_swept_by_later_failures():
+    for i in range(5):
+        _record_auth_failure(f"10.0.0.{i}", now=100.0)
+
+    _record_auth_failure("198.51.100.1", now=200.0)
+
+    assert list(clerk_auth._auth_failures_by_ip) == ["198.51.100.1"]
+    assert get_auth_failure_stats()["expirations"] == 5
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+import pytest
+
+from infrastructure import clerk_auth
+from infrastructure.clerk_auth import _get_signing_key, get_clerk_jwks
+
+JWKS = {"keys": [{"kid": "kid-1", "kty": "oct", "k": "c2VjcmV0", "alg": "HS256"}]}
+
+
+@pytest.fixture(autouse=True)
+def reset_jwks(monkeypatch):
+    monkeypatch.setenv("CLERK_DOMAIN", "test.clerk.accounts.dev")
+    monkeypatch.setattr(clerk_auth, "_clerk_jwks_cache", None)
+    monkeypatch.setattr(clerk_auth, "_clerk_jwks_cache_time", None)
+    monkeypatch.setattr(clerk_auth, "_clerk_keys_by_kid", {})
+    monkeypatch.setattr(clerk_auth, "_clerk_keys_source", None)
+    monkeypatch.setattr(clerk_auth, "_jwks_refresh_task", None)
+    monkeypatch.setattr(clerk_auth, "_jwks_revalidate_task", None)
+    monkeypatch.setattr(clerk_auth, "_jwks_last_failed_revalidation", float("-inf"))
+    monkeypatch.setattr(clerk_auth, "_jwks_last_forced_refresh", float("-inf"))
+
+
+def counting_fetch(monkeypatch, jwks=JWKS, gate=None):
+    calls = []
+
+    def fetch(clerk_domain):
+        calls.append(clerk_domain)
+        if gate is not None:
+            gate.wait(5)
+        return jwks
+
+    monkeypatch.setattr(clerk_auth, "_fetch_clerk_jwks_sync", fetch)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_fetches_share_one_request(monkeypatch):
+    gate = threading.Event()
+    calls = counting_fetch(monkeypatch, gate=gate)
+
+    pending = asyncio.gather(get_clerk_jwks(), get_clerk_jwks(), get_clerk_jwks())
+    await asyncio.sleep(0.05)
+    gate.set()
+    results = await pending
+
+    assert len(calls) == 1
+    assert all(result is JWKS for result in results)
+
+
+@pytest.mark.asyncio
+async def test_stale_jwks_is_served_while_revalidating(monkeypatch):
+    stale = {"keys": []}
+    clerk_auth._set_clerk_jwks(stale, now=0.0)
+    calls = counting_fetch(monkeypatch)
+
+    result = await get_clerk_jwks()
+    assert result is stale
+
+    await asyncio.sleep(0.05)
+    assert len(calls) == 1
+    assert await get_clerk_jwks() is JWKS
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidation_backs_off(monkeypatch):
+    stale = {"keys": []}
+    clerk_auth._set_clerk_jwks(stale, now=0.0)
+    calls = []
+
+    def failing_fetch(clerk_domain):
+        calls.append(clerk_domain)
+        raise ConnectionError("Clerk is down")
+
+    monkeypatch.setattr(clerk_auth, "_fetch_clerk_jwks_sync", failing_fetch)
+
+    assert await get_clerk_jwks() is stale
+    assert clerk_auth._jwks_revalidate_task is not None
+    await clerk_auth._jwks_revalidate_task
+    for _ in range(5):
+        assert await get_clerk_jwks() is stale
+        await asyncio.sleep(0)
+
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_keys_are_constructed_once_per_jwks(monkeypatch):
+    counting_fetch(monkeypatch)
+    constructed = []
+    original_construct = clerk_auth.jwk.construct
+    monkeypatch.setattr(
+        clerk_auth.jwk, "construct",
+        lambda data, *args, **kwargs: constructed.append(data["kid"]) or original_construct(data, *args, **kwargs),
+    )
+
+    first = await _get_signing_key("kid-1")
+    second = await _get_signing_key("kid-1")
+
+    assert first is second
+    assert constructed == ["kid-1"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refresh_is_rate_limited(monkeypatch):
+    calls = counting_fetch(monkeypatch)
+    await get_clerk_jwks()
+
+    assert await _get_signing_key("unknown") is None
+    assert await _get_signing_key("unknown") is None
+
+    # One initial fetch plus a single forced refresh for the unknown kid
+    assert len(calls) == 2
@@ -0,0 +1,127 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from starlette.requests import Request
+
+from infrastructure import clerk_auth
+from infrastructure.clerk_auth import (
+    _cache_token_payload,
+    _get_local_token_payload,
+    _invalidate_token_cache,
+    get_token_cache_stats,
+    verify_clerk_token,
+)
+
+CLERK_DOMAIN = "test.clerk.accounts.dev"
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    public_jwk = jwk.construct(public_pem, algorithm="RS256").to_dict()
+    public_jwk["kid"] = "kid-1"
+    return private_pem, {"keys": [public_jwk]}
+
+
+@pytest.fixture(autouse=True)
+def auth_env(monkeypatch):
+    monkeypatch.setenv("CLERK_DOMAIN", CLERK_DOMAIN)
+    monkeypatch.setenv("CLERK_ISSUER", f"https://{CLERK_DOMAIN}")
+    monkeypatch.delenv("CLERK_FRONTEND_API_URL", raising=False)
+    monkeypatch.delenv("SKIP_AUTH", raising=False)
+    _invalidate_token_cache()
+    for key in clerk_auth._token_cache_stats:
+        clerk_auth._token_cache_stats[key] = 0
+    clerk_auth._auth_failures_by_ip.clear()
+    yield
+    _invalidate_token_cache()
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/metrics",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 12345),
+    })
+
+
+def make_token(private_pem: str, exp_offset: int = 60) -> str:
+    claims = {"sub": "user_1", "iss": f"https://{CLERK_DOMAIN}", "exp": int(time.time()) + exp_offset}
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": "kid-1"})
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_skip_signature_verification(signing_key):
+    private_pem, jwks = signing_key
+    token = make_token(private_pem)
+
+    with patch("infrastructure.clerk_auth.get_clerk_jwks", return_value=jwks):
+        with patch("infrastructure.clerk_auth.jwt.decode", wraps=jwt.decode) as decode:
+            first = await verify_clerk_token(make_request(token))
+            second = await verify_clerk_token(make_request(token))
+
+    assert first["sub"] == second["sub"] == "user_1"
+    assert decode.call_count == 1
+    stats = get_token_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_cached_payload_expires_at_token_exp():
+    _cache_token_payload("key", {"sub": "user_1", "exp": 1_000}, now=900.0)
+
+    assert _get_local_token_payload("key", 999.0) == {"sub": "user_1", "exp": 1_000}
+    assert _get_local_token_payload("key", 1_000.0) is None
+    assert get_token_cache_stats()["expirations"] == 1
+
+
+def test_payload_without_exp_is_not_cached():
+    _cache_token_payload("key", {"sub": "user_1"}, now=900.0)
+
+    assert _get_local_token_payload("key", 901.0) is None
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setenv("AUTH_TOKEN_CACHE_SIZE", "2")
+    for index in range(3):
+        _cache_token_payload(f"key-{index}", {"exp": 2_000}, now=1_000.0)
+
+    assert _get_local_token_payload("key-0", 1_001.0) is None
+    assert get_token_cache_stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_key_rotation_invalidates_cache(monkeypatch):
+    _cache_token_payload("key", {"exp": 2_000_000_000}, now=time.time())
+    monkeypatch.setattr(clerk_auth, "_clerk_jwks_cache", {"keys": [{"kid": "old"}]})
+    monkeypatch.setattr(clerk_auth, "_clerk_jwks_cache_time", 0)
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"keys": [{"kid": "new"}]}
+
+    monkeypatch.setattr(clerk_auth.requests, "get", lambda *args, **kwargs: FakeResponse())
+
+    await clerk_auth.get_clerk_jwks(force_refresh=True)
+
+    assert _get_local_token_payload("key", time.time()) is None
+    assert get_token_cache_stats()["invalidations"] == 1
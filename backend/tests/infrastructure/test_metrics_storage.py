@@ -0,0 +1,177 @@
+import os
+
+import pytest
+
+from infrastructure import metrics_storage
+from infrastructure.metrics_storage import (
+    METRICS_INDEX_FILENAME,
+    clear_cache,
+    delete_metrics,
+    get_cache_stats,
+    get_latest_metrics,
+    get_latest_version_id,
+    get_metrics,
+    get_version_entry,
+    list_all_metrics,
+    rebuild_index,
+    save_metrics,
+)
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache_dir(tmp_path, monkeypatch):
+    """Point the storage at a temporary metrics_cache directory."""
+    monkeypatch.setattr(metrics_storage, "METRICS_CACHE_DIR", tmp_path)
+    clear_cache()
+    yield tmp_path
+    clear_cache()
+
+
+def test_get_metrics_serves_repeat_reads_from_cache():
+    save_metrics("v1", {"green_space_index": {"total_value": 0.5}})
+
+    first = get_metrics("v1")
+    second = get_metrics("v1")
+
+    assert first == {"green_space_index": {"total_value": 0.5}}
+    assert second is first
+    stats = get_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_save_metrics_invalidates_cached_document():
+    save_metrics("v1", {"green_space_index": {"total_value": 0.5}})
+    get_metrics("v1")
+
+    save_metrics("v1", {"green_space_index": {"total_value": 0.7}})
+
+    assert get_metrics("v1") == {"green_space_index": {"total_value": 0.7}}
+
+
+def test_external_file_change_invalidates_cached_document(tmp_cache_dir):
+    save_metrics("v1", {"green_space_index": {"total_value": 0.5}})
+    get_metrics("v1")
+
+    file_path = tmp_cache_dir / "v1.json"
+    file_path.write_text('{"green_space_index": {"total_value": 0.75}}')
+    stat = file_path.stat()
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert get_metrics("v1") == {"green_space_index": {"total_value": 0.75}}
+
+
+def test_delete_metrics_drops_cached_document():
+    save_metrics("v1", {"green_space_index": {"total_value": 0.5}})
+    get_metrics("v1")
+
+    assert delete_metrics("v1") is True
+    assert get_metrics("v1") is None
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setenv("METRICS_DOCUMENT_CACHE_SIZE", "2")
+    for version_id in ("v1", "v2", "v3"):
+        save_metrics(version_id, {"metric": {"total_value": 1.0}})
+
+    get_metrics("v1")
+    get_metrics("v2")
+    get_metrics("v1")
+    get_metrics("v3")
+
+    stats = get_cache_stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+    get_metrics("v1")
+    assert get_cache_stats()["hits"] == 2
+
+
+def test_latest_metrics_follows_speckle_creation_time_not_save_order(tmp_cache_dir):
+    save_metrics("newer", {"metric": {"total_value": 2.0}}, created_at="2026-02-01T10:00:00Z")
+    save_metrics("older", {"metric": {"total_value": 1.0}}, created_at="2026-01-01T10:00:00Z")
+
+    assert get_latest_version_id() == "newer"
+    assert get_latest_metrics() == {"metric": {"total_value": 2.0}}
+    assert list(list_all_metrics()) == ["older", "newer"]
+
+
+def test_index_entry_records_creation_and_save_time():
+    save_metrics("v1", {"metric": {"total_value": 1.0}}, created_at="2026-01-01T10:00:00Z")
+
+    entry = get_version_entry("v1")
+
+    assert entry["created_at"] == "2026-01-01T10:00:00+00:00"
+    assert entry["saved_at"] is not None
+    assert entry["offset"] == 0
+
+
+def test_delete_metrics_removes_version_from_index():
+    save_metrics("v1", {"metric": {"total_value": 1.0}}, created_at="2026-01-01T10:00:00Z")
+    save_metrics("v2", {"metric": {"total_value": 2.0}}, created_at="2026-02-01T10:00:00Z")
+
+    delete_metrics("v2")
+
+    assert get_latest_version_id() == "v1"
+    assert list(list_all_metrics()) == ["v1"]
+
+
+def test_missing_index_is_rebuilt_from_existing_files(tmp_cache_dir):
+    (tmp_cache_dir / "legacy.json").write_text('{"metric": {"total_value": 3.0}}')
+
+    assert list(list_all_metrics()) == ["legacy"]
+    assert (tmp_cache_dir / METRICS_INDEX_FILENAME).exists()
+
+
+def test_rebuild_index_keeps_recorded_creation_times(tmp_cache_dir):
+    save_metrics("v1", {"metric": {"total_value": 1.0}}, created_at="2026-03-01T10:00:00Z")
+    (tmp_cache_dir / "copied.json").write_text('{"metric": {"total_value": 3.0}}')
+
+    assert rebuild_index() == 2
+    assert get_version_entry("v1")["created_at"] == "2026-03-01T10:00:00+00:00"
+    assert set(list_all_metrics()) == {"v1", "copied"}
+
+
+def _swap_creation_months(index_path):
+    return index_path.read_bytes().replace(b"2026-01", b"2026-XX").replace(b"2026-02", b"2026-01").replace(b"2026-XX", b"2026-02")
+
+
+def test_same_size_rewrite_of_the_index_is_reloaded(tmp_cache_dir):
+    save_metrics("v1", {"metric": {"total_value": 1.0}}, created_at="2026-01-01T10:00:00Z")
+    save_metrics("v2", {"metric": {"total_value": 2.0}}, created_at="2026-02-01T10:00:00Z")
+    assert get_latest_version_id() == "v2"
+    index_path = tmp_cache_dir / METRICS_INDEX_FILENAME
+    before = index_path.stat()
+
+    # Rewritten in place: same inode and size, newer modification time
+    content = _swap_creation_months(index_path)
+    with open(index_path, "r+b") as f:
+        f.write(content)
+    os.utime(index_path, ns=(before.st_atime_ns, before.st_mtime_ns + 1_000_000_000))
+    assert get_latest_version_id() == "v1"
+
+    # Replaced by a new file of the same size and modification time
+    before = index_path.stat()
+    replacement = tmp_cache_dir / "replacement.jsonl"
+    replacement.write_bytes(_swap_creation_months(index_path))
+    os.utime(replacement, ns=(before.st_atime_ns, before.st_mtime_ns))
+    os.replace(replacement, index_path)
+    assert get_latest_version_id() == "v2"
+
+
+def test_project_storage_keeps_namespaces_apart(tmp_cache_dir):
+    save_metrics("v1", {"metric": {"total_value": 1}})
+    with metrics_storage.project_storage("other_model"):
+        save_metrics("v2", {"metric": {"total_value": 2}})
+        assert get_latest_version_id() == "v2"
+        assert get_metrics("v1") is None
+
+    assert get_latest_version_id() == "v1"
+    assert list(list_all_metrics()) == ["v1"]
+    assert (tmp_cache_dir / "projects" / "other_model" / "v2.json").exists()
+
+
+def test_project_storage_rejects_path_like_namespaces():
+    with pytest.raises(ValueError):
+        with metrics_storage.project_storage("../elsewhere"):
+            pass
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+from starlette.requests import Request
+
+from infrastructure import clerk_auth, shared_state
+from infrastructure.shared_state import SQLiteSharedState, get_shared_state
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "auth_state.sqlite3"
+
+
+@pytest.fixture
+def sqlite_backend(db_path, monkeypatch):
+    """Select the sqlite auth state backend for clerk_auth."""
+    monkeypatch.setenv("AUTH_STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("AUTH_STATE_PATH", str(db_path))
+    monkeypatch.setenv("AUTH_FAILURE_WINDOW_SECONDS", "60")
+    monkeypatch.setenv("AUTH_FAILURE_MAX_ATTEMPTS", "3")
+    monkeypatch.setattr(shared_state, "_shared_states", {})
+    clerk_auth._auth_failures_by_ip.clear()
+    clerk_auth._verified_tokens.clear()
+    yield get_shared_state()
+    get_shared_state().close()
+    clerk_auth._verified_tokens.clear()
+
+
+def test_memory_backend_is_the_default(monkeypatch):
+    monkeypatch.delenv("AUTH_STATE_BACKEND", raising=False)
+    assert get_shared_state() is None
+
+
+def test_entries_are_visible_to_other_connections_until_expiry(db_path):
+    worker_a = SQLiteSharedState(db_path)
+    worker_b = SQLiteSharedState(db_path)
+
+    worker_a.set("tokens", "key", {"sub": "user"}, expires_at=200.0, now=100.0)
+
+    assert worker_b.get("tokens", "key", now=150.0) == {"sub": "user"}
+    assert worker_b.get("tokens", "key", now=200.0) is None
+
+    worker_b.delete("tokens")
+    assert worker_a.get("tokens", "key", now=150.0) is None
+
+
+def test_failure_windows_are_shared_between_workers(db_path):
+    worker_a = SQLiteSharedState(db_path)
+    worker_b = SQLiteSharedState(db_path)
+
+    worker_a.record_failure("198.51.100.1", 100.0, 60, 10, 100)
+    worker_b.record_failure("198.51.100.1", 110.0, 60, 10, 100)
+
+    assert worker_a.count_failures("198.51.100.1", 120.0, 60, 10) == 2
+    assert worker_b.count_failures("198.51.100.1", 200.0, 60, 10) == 0
+
+    worker_b.clear_failures("198.51.100.1")
+    assert worker_a.count_failures("198.51.100.1", 120.0, 60, 10) == 0
+
+
+def test_tracked_ips_are_capped(db_path, monkeypatch):
+    monkeypatch.setattr(shared_state, "_CAP_CHECK_INTERVAL", 1)
+    state = SQLiteSharedState(db_path)
+
+    for i in range(20):
+        state.record_failure(f"10.0.0.{i}", 100.0 + i, 60, 10, 5)
+
+    assert state.count_failures("10.0.0.19", 120.0, 60, 10) == 1
+    assert state.count_failures("10.0.0.0", 120.0, 60, 10) == 0
+
+
+def test_rate_limit_uses_shared_state(sqlite_backend):
+    for now in (100.0, 110.0, 125.0):
+        clerk_auth._record_auth_failure("198.51.100.1", now=now)
+
+    assert clerk_auth._auth_failures_by_ip == {}
+    assert clerk_auth._is_auth_rate_limited("198.51.100.1", now=126.0) is True
+    assert clerk_auth._is_auth_rate_limited("198.51.100.1", now=200.0) is False
+
+
+def test_verified_token_is_served_to_other_workers(sqlite_backend):
+    payload = {"sub": "user_1", "exp": time.time() + 600}
+    clerk_auth._cache_token_payload("key", payload)
+
+    # Another worker has an empty in-process cache
+    clerk_auth._verified_tokens.clear()
+    shared_hits = clerk_auth.get_token_cache_stats()["shared_hits"]
+
+    assert clerk_auth._get_shared_token_payload("key", time.time()) == payload
+    assert clerk_auth.get_token_cache_stats()["shared_hits"] == shared_hits + 1
+
+
+def test_shared_token_keeps_its_original_ttl_cap(sqlite_backend, monkeypatch):
+    monkeypatch.setenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300")
+    payload = {"sub": "user_1", "exp": 10_000}
+    clerk_auth._cache_token_payload("key", payload, now=1_000.0)
+    clerk_auth._verified_tokens.clear()
+
+    # Read by another worker shortly before the cap set at verification (1_300) runs out
+    assert clerk_auth._get_shared_token_payload("key", 1_250.0) == payload
+    assert clerk_auth._verified_tokens["key"][0] == 1_300.0
+    assert clerk_auth._get_local_token_payload("key", 1_300.0) is None
+
+def test_jwks_fetched_by_another_worker_is_reused(sqlite_backend, monkeypatch):
+    jwks = {"keys": [{"kid": "kid-1"}]}
+    sqlite_backend.set("jwks", "test.clerk.accounts.dev", {"jwks": jwks, "fetched_at": time.time()})
+    monkeypatch.setattr(
+        clerk_auth, "_fetch_clerk_jwks_sync", lambda domain: pytest.fail("JWKS fetched from network")
+    )
+
+    loaded, _ = clerk_auth._load_clerk_jwks_sync("test.clerk.accounts.dev", 3600, None)
+
+    assert loaded == jwks
+
+
+@pytest.mark.asyncio
+async def test_successful_requests_write_only_after_failures(sqlite_backend, monkeypatch):
+    monkeypatch.setenv("CLERK_DOMAIN", "test.clerk.accounts.dev")
+    monkeypatch.delenv("SKIP_AUTH", raising=False)
+
+    async def decode(token, clerk_domain):
+        return {"sub": "user_1"}
+
+    monkeypatch.setattr(clerk_auth, "_decode_clerk_token", decode)
+    calls = []
+    for name in ("count_failures", "clear_failures"):
+        method = getattr(sqlite_backend, name)
+        monkeypatch.setattr(
+            sqlite_backend, name,
+            lambda *args, _name=name, _method=method: calls.append((_name, threading.current_thread())) or _method(*args),
+        )
+    request = Request({
+        "type": "http", "method": "GET", "path": "/", "client": ("198.51.100.1", 1234),
+        "headers": [(b"authorization", b"Bearer token")],
+    })
+
+    await clerk_auth.verify_clerk_token(request)
+    assert [name for name, _ in calls] == ["count_failures"]
+
+    clerk_auth._record_auth_failure("198.51.100.1")
+    await clerk_auth.verify_clerk_token(request)
+    assert [name for name, _ in calls] == ["count_failures", "count_failures", "clear_failures"]
+    # The SQLite calls ran on worker threads, not on the event loop
+    assert all(thread is not threading.main_thread() for _, thread in calls)
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from domain.model.metric import ChartData, MetricResult
+from infrastructure import metrics_storage
+from infrastructure.sqlite_metrics_storage import SQLiteMetricsStore, import_json_cache
+
+
+def make_metric(total_value: float, level_value: float) -> MetricResult:
+    return MetricResult(
+        name="Green Space Index",
+        benchmark=0.8,
+        total_value=total_value,
+        value_per_level={540: level_value, 0: 1.0},
+        value_per_cluster={"01": 0.9},
+        chart_data=ChartData(label="Distance to green space", values={"< 0.44": 3.456}),
+        formula="formula",
+        action="action",
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteMetricsStore(tmp_path / "metrics.sqlite3")
+    yield store
+    store.close()
+
+
+def test_sqlite_store_round_trips_json_document_format(store):
+    store.save_metrics("v1", {"green_space_index": make_metric(0.861, 0.321)}, created_at="2026-01-01T00:00:00Z")
+
+    document = store.get_metrics("v1")
+
+    assert document == {
+        "green_space_index": {
+            "name": "Green Space Index",
+            "benchmark": 0.8,
+            "total_value": 0.86,
+            "value_per_level": {"540": 0.32, "0": 1.0},
+            "value_per_cluster": {"01": 0.9},
+            "chart_data": {"label": "Distance to green space", "values": {"< 0.44": 3.46}},
+            "formula": "formula",
+            "action": "action",
+        }
+    }
+
+
+def test_sqlite_store_orders_versions_by_creation_time(store):
+    store.save_metrics("newer", {"green_space_index": make_metric(0.9, 0.5)}, created_at="2026-02-01T00:00:00Z")
+    store.save_metrics("older", {"green_space_index": make_metric(0.7, 0.4)}, created_at="2026-01-01T00:00:00Z")
+
+    assert list(store.list_all_metrics()) == ["older", "newer"]
+    assert store.get_latest_version_id() == "newer"
+    assert store.get_latest_metrics()["green_space_index"]["total_value"] == 0.9
+
+
+def test_sqlite_store_queries_level_history(store):
+    for day, value in enumerate([0.1, 0.2, 0.3], start=1):
+        store.save_metrics(
+            f"v{day}",
+            {"green_space_index": make_metric(0.5, value)},
+            created_at=f"2026-01-0{day}T00:00:00Z",
+        )
+
+    history = store.get_metric_history("green_space_index", level=540, limit=2)
+
+    assert [row["version_id"] for row in history] == ["v3", "v2"]
+    assert [row["value"] for row in history] == [0.3, 0.2]
+
+
+def test_sqlite_store_delete_removes_all_rows(store):
+    store.save_metrics("v1", {"green_space_index": make_metric(0.5, 0.5)})
+
+    assert store.delete_metrics("v1") is True
+    assert store.get_metrics("v1") is None
+    assert store.get_metric_history("green_space_index", cluster="01") == []
+
+
+def test_import_json_cache(store, tmp_path):
+    cache_dir = tmp_path / "metrics_cache"
+    cache_dir.mkdir()
+    (cache_dir / "a1.json").write_text(json.dumps({"daylight_potential": {"total_value": 0.25, "chart_data": None}}))
+    (cache_dir / "index.jsonl").write_text(
+        json.dumps({"version_id": "a1", "created_at": "2026-01-01T00:00:00+00:00", "saved_at": "x"}) + "\n"
+    )
+
+    assert import_json_cache(store, cache_dir) == 1
+    assert store.get_version_entry("a1")["created_at"] == "2026-01-01T00:00:00+00:00"
+    assert store.get_metrics("a1")["daylight_potential"]["total_value"] == 0.25
+
+
+def test_metrics_storage_delegates_to_sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("METRICS_SQLITE_PATH", str(tmp_path / "backend.sqlite3"))
+
+    metrics_storage.save_metrics("v1", {"green_space_index": make_metric(0.5, 0.5)})
+
+    assert metrics_storage.get_metrics("v1")["green_space_index"]["total_value"] == 0.5
+    assert list(metrics_storage.list_all_metrics()) == ["v1"]
+    assert not list(tmp_path.glob("*.json"))